@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark and retrieval-quality check: token-aware chunker vs. the character chunker
+
+Usage: python bench_policy_chunking.py [--scale 20] [--max-tokens 128] [--overlap 16]
+Uses the shipped policy PDFs. Retrieval uses the embedding model when installed,
+otherwise a TF-IDF stand-in (reported in the output).
+"""
+import re
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rag.chunking import TokenChunker, model_tokenizer
+from rag.pdf_extract import iter_pdf_pages
+
+POLICIES_DIR = Path(__file__).parent / "policies"
+MODEL_MAX_TOKENS = 254  # MiniLM's 256-token window minus [CLS]/[SEP]
+
+# (question, text that a useful retrieved chunk must contain)
+QUESTIONS = [
+    ("How much do I get back if I cancel 3 days before check-in on a moderate policy?", "2-5 days before check-in"),
+    ("What happens if the owner cancels my booking?", "Immediate automatic refund"),
+    ("Do I get a refund if a hurricane hits?", "Natural disasters"),
+    ("When is the cleaning fee refunded under strict cancellation?", "Cleaning fees"),
+    ("Which digital wallets can I pay with?", "Apple Pay"),
+    ("How long do bank transfers take to process?", "3-5 business days"),
+    ("Do you store my credit card on your servers?", "No card storage"),
+    ("What should I do if my account is hacked?", "Change password immediately"),
+    ("Will you give my data to the police?", "Law Enforcement"),
+    ("How do I download a copy of my data?", "Data download tool"),
+    ("What happens to my data if the company is sold?", "Merger, Acquisition"),
+    ("How do I stop marketing emails?", "Unsubscribe link"),
+]
+
+def load_documents():
+    return {path.name: list(iter_pdf_pages(str(path))) for path in sorted(POLICIES_DIR.glob("*.pdf"))}
+
+def char_chunks(pages):
+    from rag.policy_loader import policy_loader
+    return [c for c in policy_loader.chunk_text(" ".join(pages)) if len(c.strip()) >= 10]
+
+def token_chunks(chunker, pages):
+    return [c["text"] for c in chunker.chunk_stream(pages)]
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def count_tokens(tokenizer, texts):
+    if tokenizer is not None:
+        return [len(e.ids) for e in tokenizer.encode_batch(texts, add_special_tokens=False)]
+    return [len(re.findall(r"\w+|[^\w\s]", text)) for text in texts]
+
+def make_ranker():
+    """(label, rank(query, chunks) -> chunk indices best first)"""
+    from rag.embeddings import embedding_service
+    if embedding_service.model is not None:
+        def rank(query, chunks, cache={}):
+            key = id(chunks)
+            if key not in cache:
+                cache[key] = embedding_service.encode_batch(chunks)
+            return np.argsort(-(cache[key] @ embedding_service.encode(query)))
+        return f"embeddings ({embedding_service.model_name})", embedding_service.model, rank
+
+    def rank(query, chunks):
+        tokenize = lambda text: re.findall(r"\w+", text.lower())
+        docs = [tokenize(chunk) for chunk in chunks]
+        df = {}
+        for doc in docs:
+            for term in set(doc):
+                df[term] = df.get(term, 0) + 1
+        idf = {term: np.log(len(docs) / count) + 1 for term, count in df.items()}
+        query_terms = tokenize(query)
+        scores = [sum(doc.count(term) * idf.get(term, 0) for term in query_terms) / (len(doc) ** 0.5 or 1) for doc in docs]
+        return np.argsort(-np.array(scores))
+    return "TF-IDF stand-in (sentence-transformers not installed)", None, rank
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=int, default=20, help="repeat the corpus N times for the large-document timing")
+    parser.add_argument("--max-tokens", type=int, default=128)
+    parser.add_argument("--overlap", type=int, default=16)
+    args = parser.parse_args()
+
+    documents = load_documents()
+    ranker_label, model, rank = make_ranker()
+    tokenizer = model_tokenizer(model)
+    chunker = TokenChunker(tokenizer, max_tokens=args.max_tokens, overlap_tokens=args.overlap)
+
+    print("=" * 78)
+    print(f"🧪 Policy chunking: chars-500-50 vs {chunker.name}")
+    print(f"   retrieval: {ranker_label}")
+    print("=" * 78)
+
+    # Speed, on the shipped corpus and on a large synthetic document
+    all_pages = [page for pages in documents.values() for page in pages]
+    big_pages = all_pages * args.scale
+    for label, pages in (("shipped PDFs", all_pages), (f"{args.scale}x corpus", big_pages)):
+        old_time, old = timed(lambda: char_chunks(pages))
+        new_time, new = timed(lambda: token_chunks(chunker, pages))
+        print(f"\n⚡ {label} ({sum(map(len, pages)) / 1e3:.0f}k chars)")
+        print(f"   chars   {old_time * 1000:8.1f} ms  {len(old):5d} chunks")
+        print(f"   tokens  {new_time * 1000:8.1f} ms  {len(new):5d} chunks")
+
+    # Chunk sizes in model tokens
+    old_chunks = [chunk for pages in documents.values() for chunk in char_chunks(pages)]
+    new_chunks = [chunk for pages in documents.values() for chunk in token_chunks(chunker, pages)]
+    print("\n📏 Tokens per chunk" + ("" if tokenizer else " (approximate: no model tokenizer)"))
+    for label, chunks in (("chars", old_chunks), ("tokens", new_chunks)):
+        counts = count_tokens(tokenizer, chunks)
+        over = sum(count > MODEL_MAX_TOKENS for count in counts)
+        print(f"   {label:<7} mean {statistics.mean(counts):6.1f}  max {max(counts):4d}  "
+              f"truncated by the model: {over} of {len(counts)}")
+
+    # Retrieval quality: does a top-k chunk contain the answer?
+    print("\n🔍 Retrieval (answer text in top-k chunks)")
+    corpus_text = " ".join(all_pages)
+    questions = [(q, answer) for q, answer in QUESTIONS if answer in corpus_text]
+    for label, chunks in (("chars", old_chunks), ("tokens", new_chunks)):
+        hits = {1: 0, 3: 0}
+        for question, answer in questions:
+            order = rank(question, chunks)
+            for k in hits:
+                hits[k] += any(answer in chunks[i] for i in order[:k])
+        print(f"   {label:<7} hit@1 {hits[1] / len(questions):.2f}   hit@3 {hits[3] / len(questions):.2f}   "
+              f"({len(questions)} questions)")
+
+if __name__ == "__main__":
+    main()
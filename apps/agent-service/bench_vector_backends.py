@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ChromaDB vs. the in-process NumPy index on policy-sized collections
+
+Usage: python bench_vector_backends.py [--sizes 300 3000] [--queries 200] [--k 3]
+"""
+import sys
+import time
+import uuid
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rag.numpy_index import NumpyVectorClient
+
+POLICY_TYPES = ["Cancellation Policy", "Payment Policy", "Privacy Policy", "General Policy"]
+
+def make_data(size, queries, dim=384, seed=0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query_vectors = rng.normal(size=(queries, dim)).astype(np.float32)
+    query_vectors /= np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    ids = [f"chunk_{i}" for i in range(size)]
+    documents = [f"policy chunk {i}" for i in range(size)]
+    metadatas = [{"policy_type": POLICY_TYPES[i % len(POLICY_TYPES)], "chunk_index": i} for i in range(size)]
+    return vectors, query_vectors, ids, documents, metadatas
+
+def bench(label, collection, data, k):
+    vectors, query_vectors, ids, documents, metadatas = data
+
+    started = time.perf_counter()
+    collection.add(ids=ids, embeddings=vectors, documents=documents, metadatas=metadatas)
+    insert = time.perf_counter() - started
+
+    def latencies(where):
+        times, results = [], []
+        for query in query_vectors:
+            started = time.perf_counter()
+            result = collection.query(query_embeddings=query[None, :], n_results=k, where=where)
+            times.append(time.perf_counter() - started)
+            results.append(result["ids"][0])
+        return statistics.median(times) * 1000, results
+
+    plain, plain_ids = latencies(None)
+    filtered, _ = latencies({"policy_type": "Cancellation Policy"})
+    print(f"   {label:<18} insert {insert * 1000:8.1f} ms   query p50 {plain:6.3f} ms   "
+          f"filtered p50 {filtered:6.3f} ms")
+    return plain_ids
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[300, 3000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    try:
+        import chromadb
+        chroma_client = chromadb.Client()
+    except ImportError:
+        chroma_client = None
+        print("⚠️ chromadb not installed, benchmarking the NumPy index only")
+
+    print("=" * 80)
+    print(f"🧪 Vector backend benchmark ({args.queries} queries, top-{args.k}, 384-dim)")
+    print("=" * 80)
+
+    for size in args.sizes:
+        data = make_data(size, args.queries)
+        print(f"\n📦 {size} vectors")
+
+        numpy_ids = bench("numpy (persisted)", NumpyVectorClient(tempfile.mkdtemp()).create_collection("bench"), data, args.k)
+        if chroma_client:
+            chroma_ids = bench("chroma", chroma_client.create_collection(f"bench-{uuid.uuid4().hex[:8]}"), data, args.k)
+            # NumPy search is exact, so this is Chroma's HNSW recall
+            overlap = statistics.mean(len(set(a) & set(b)) / args.k for a, b in zip(numpy_ids, chroma_ids))
+            print(f"   top-{args.k} agreement: {overlap:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: recall@k and memory of compact (float16 / int8 / PCA) NumPy index storage
+
+Usage: python bench_vector_compact.py [--size 100000] [--queries 200] [--k 5] [--dims 128]
+Synthetic embeddings with a low-rank cluster structure (like sentence embeddings,
+unlike isotropic noise). Recall is measured against the exact float32 search;
+"scoring memory" is what stays resident in RAM to answer queries (the float32
+matrix itself is memory-mapped and only read for re-ranked rows).
+"""
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rag.numpy_index import NumpyVectorClient
+
+def make_data(size, queries, dim=384, latent=48, clusters=200, seed=0):
+    rng = np.random.default_rng(seed)
+    basis = rng.normal(size=(latent, dim)).astype(np.float32)
+    centers = rng.normal(size=(clusters, latent)).astype(np.float32)
+
+    def sample(count):
+        points = centers[rng.integers(clusters, size=count)] + 0.6 * rng.normal(size=(count, latent)).astype(np.float32)
+        vectors = points @ basis + 0.3 * rng.normal(size=(count, dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return sample(size), sample(queries)
+
+def run(label, compact, vectors, query_vectors, k, truth=None):
+    client = NumpyVectorClient(tempfile.mkdtemp(), compact={**compact, "collections": {"bench"}} if compact else None)
+    collection = client.create_collection("bench")
+    ids = [f"item_{i}" for i in range(len(vectors))]
+    started = time.perf_counter()
+    collection.add(ids=ids, embeddings=vectors)
+    insert = time.perf_counter() - started
+
+    times, results = [], []
+    for query in query_vectors:
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=query[None, :], n_results=k, include=[])
+        times.append(time.perf_counter() - started)
+        results.append(result["ids"][0])
+
+    stats = collection.compact_stats()
+    memory = stats["compact_bytes"] if stats else vectors.nbytes + 4 * len(vectors)
+    recall = statistics.mean(len(set(a) & set(b)) / k for a, b in zip(results, truth)) if truth else 1.0
+    print(f"   {label:<30} recall@{k} {recall:6.3f}   scoring memory {memory / 2**20:8.1f} MiB "
+          f"({memory / (vectors.nbytes + 4 * len(vectors)):5.1%})   query p50 {statistics.median(times) * 1000:7.2f} ms   "
+          f"insert {insert:6.2f} s")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dims", type=int, default=128, help="PCA dimensions for the reduced variants")
+    parser.add_argument("--rerank", type=int, default=4, help="re-rank factor for the re-ranked variants")
+    args = parser.parse_args()
+
+    vectors, query_vectors = make_data(args.size, args.queries)
+
+    print("=" * 100)
+    print(f"🧪 Compact vector storage ({args.size} x 384 vectors, {args.queries} queries, top-{args.k})")
+    print("=" * 100)
+
+    truth = run("float32 (exact)", None, vectors, query_vectors, args.k)
+    for mode in ("float16", "int8"):
+        for dims in (0, args.dims):
+            for rerank in (0, args.rerank):
+                label = f"{mode}{f' + PCA {dims}' if dims else ''}{f' + rerank x{rerank}' if rerank else ''}"
+                compact = {"mode": mode, "dims": dims, "rerank": rerank, "min_rows": 0}
+                run(label, compact, vectors, query_vectors, args.k, truth)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Bootstrap the similar-trip RAG index from historical ACCEPTED bookings (offline)
+
+Usage: python bootstrap_itineraries.py [--batch 64] [--rate 20] [--generate] [--limit N] [--restart]
+
+Similar-trip retrieval stays off until the index holds enough itineraries, so a fresh
+deployment starts cold. This runs services/itinerary_bootstrap.py in its own process,
+at low CPU priority and at most --rate bookings per second; an interrupted run picks
+up from its checkpoint.
+
+The agent service must be stopped: both processes would write the same vector store
+(the service's in-memory NumPy collections overwrite the file on their next write, and
+Chroma's persistent client is not safe across processes), and the service's cached
+counts would go stale. While the service is running, use
+POST /admin/bootstrap-itineraries instead, which runs the same job inside it. This
+script refuses to start when the service answers on AGENT_SERVICE_URL.
+"""
+import os
+import sys
+import asyncio
+import logging
+import argparse
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from services.itinerary_bootstrap import itinerary_bootstrapper, LLMUnavailableError
+
+logger = logging.getLogger("bootstrap_itineraries")
+
+def service_running(url: str) -> bool:
+    """True if the agent service answers its health check"""
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/health", timeout=2):
+            return True
+    except urllib.error.HTTPError:
+        # Answering with an error status (e.g. degraded health) still means it is running
+        return True
+    except Exception:
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch", type=int, default=64, help="bookings fetched, embedded and stored per batch")
+    parser.add_argument("--rate", type=float, default=20.0, help="max bookings per second")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many bookings")
+    parser.add_argument("--generate", action="store_true", help="generate missing plans with the LLM instead of synthesizing them")
+    parser.add_argument("--include-upcoming", action="store_true", help="also index bookings that have not checked out yet")
+    parser.add_argument("--refresh", action="store_true", help="re-index bookings that already have a stored itinerary")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first booking")
+    parser.add_argument("--checkpoint", default=str(itinerary_bootstrapper.checkpoint_path))
+    parser.add_argument("--nice", type=int, default=10, help="CPU niceness increment (0 to keep normal priority)")
+    args = parser.parse_args()
+    if args.batch <= 0 or args.rate <= 0:
+        parser.error("--batch and --rate must be positive")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    service_url = os.getenv("AGENT_SERVICE_URL", "http://localhost:8000")
+    if service_running(service_url):
+        logger.error(
+            f"❌ The agent service is running at {service_url}; stop it first, or run the job inside it "
+            f"with POST {service_url}/admin/bootstrap-itineraries"
+        )
+        sys.exit(1)
+
+    if args.nice and hasattr(os, "nice"):
+        os.nice(args.nice)
+
+    itinerary_bootstrapper.checkpoint_path = Path(args.checkpoint)
+    try:
+        asyncio.run(itinerary_bootstrapper.run(
+            batch=args.batch, rate=args.rate, limit=args.limit, generate=args.generate,
+            include_upcoming=args.include_upcoming, refresh=args.refresh, restart=args.restart
+        ))
+    except LLMUnavailableError as e:
+        logger.error(f"❌ {e}; check Ollama and run again to resume")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.info(f"⏸️ Interrupted after booking {itinerary_bootstrapper.checkpoint.state['last_booking_id']}; run again to resume")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Export all-MiniLM-L6-v2 to ONNX and quantize it to int8 for EMBEDDING_BACKEND=onnx
+
+Usage: python export_onnx_model.py [--output ./agent_data/onnx/all-MiniLM-L6-v2]
+Needs torch, transformers and onnx (export only; the service itself only needs
+onnxruntime and tokenizers).
+"""
+import os
+import argparse
+from pathlib import Path
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+
+def export(output: Path, opset: int):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    output.mkdir(parents=True, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
+    model = AutoModel.from_pretrained(MODEL_ID).eval()
+
+    # tokenizer.json is what the service loads with the `tokenizers` library
+    tokenizer.save_pretrained(output)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    fp32_path = output / "model.onnx"
+    dynamic = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        model,
+        (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+        str(fp32_path),
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": dynamic,
+            "attention_mask": dynamic,
+            "token_type_ids": dynamic,
+            "last_hidden_state": dynamic
+        },
+        opset_version=opset
+    )
+    print(f"✅ Exported {fp32_path} ({os.path.getsize(fp32_path) / 1e6:.1f} MB)")
+    return fp32_path
+
+def quantize(fp32_path: Path) -> Path:
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    int8_path = fp32_path.with_name("model_quantized.onnx")
+    quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    print(f"✅ Quantized {int8_path} ({os.path.getsize(int8_path) / 1e6:.1f} MB)")
+    return int8_path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default=os.getenv("EMBEDDING_ONNX_DIR", "./agent_data/onnx/all-MiniLM-L6-v2"))
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    fp32_path = export(Path(args.output), args.opset)
+    quantize(fp32_path)
+    print("Next: python test_onnx_embeddings.py  (parity check + benchmark against torch)")
+
+if __name__ == "__main__":
+    main()
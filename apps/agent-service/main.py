@@ -1,4 +1,5 @@
 # main.py
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -36,26 +37,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Import routes
-from routes.health_routes import router as health_router
-from routes.agent_routes import router as agent_router
-from routes.admin_routes import router as admin_router
+# Import routes (timed: importing the RAG modules used to load the embedding model here)
+from utils.startup_report import startup_report
+
+with startup_report.track("route_imports"):
+    from routes.health_routes import router as health_router
+    from routes.agent_routes import router as agent_router
+    from routes.admin_routes import router as admin_router
 
 # Include routers
 app.include_router(health_router)
 app.include_router(agent_router)
 app.include_router(admin_router)
 
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    logger.info("🚀 Starting Airbnb AI Agent Service...")
-    
-    # Test connections
+async def _check_connections():
+    """Test MySQL and Ollama without holding up startup"""
     try:
         from utils.mysql_client import mysql_client
-        if mysql_client.test_connection():
+        with startup_report.track("mysql"):
+            connected = await asyncio.to_thread(mysql_client.test_connection)
+        if connected:
             logger.info("✅ MySQL connection successful")
         else:
             logger.warning("⚠️ MySQL connection failed")
@@ -64,29 +65,87 @@ async def startup_event():
     
     try:
         from utils.llm_client import llm_client
-        if llm_client.test_connection():
+        with startup_report.track("ollama"):
+            connected = await asyncio.to_thread(llm_client.test_connection)
+        if connected:
             logger.info("✅ Ollama connection successful")
         else:
             logger.warning("⚠️ Ollama connection failed")
     except Exception as e:
         logger.error(f"❌ Ollama connection error: {e}")
+
+async def _record_embedding_load():
+    """Add the background embedding model load to the startup report once it finishes"""
+    from rag.embeddings import embedding_service
     
-    # Load policy documents into RAG
+    await embedding_service.wait_until_ready()
+    startup_report.record("embedding_model", embedding_service.load_seconds or 0.0, embedding_service.status())
+
+async def _sync_policies():
+    """Bring the policy index up to date (instant when no policy file changed)"""
     try:
         from rag.policy_loader import policy_loader
         logger.info("📚 Loading policy documents...")
-        policy_loader.ingest_policies()
-        logger.info("✅ Policy documents loaded successfully")
+        with startup_report.track("policy_ingestion"):
+            summary = await asyncio.to_thread(policy_loader.ingest_policies)
+        logger.info(f"✅ Policy documents loaded successfully ({summary.get('added', 0)} new chunks)")
     except Exception as e:
         logger.warning(f"⚠️ Policy loading failed (non-critical): {e}")
+
+_startup_tasks = []
+
+# Startup event
+@app.on_event("startup")
+async def startup_event():
+    """Initialize services on startup"""
+    logger.info("🚀 Starting Airbnb AI Agent Service...")
+    
+    # Load the embedding model in the background; RAG requests wait for it (see /health/startup)
+    from rag.embeddings import embedding_service
+    embedding_service.start_background_load()
+    
+    # Connection checks and policy sync run after the server starts accepting requests;
+    # policy sync only waits for the model if a policy file changed or some chunks need embedding
+    _startup_tasks.extend([
+        asyncio.create_task(_check_connections()),
+        asyncio.create_task(_record_embedding_load()),
+        asyncio.create_task(_sync_policies())
+    ])
     
-    logger.info("✅ Agent service ready!")
+    # Index generated itineraries in the background (also drains entries left from the last run)
+    from rag.write_queue import rag_write_queue
+    rag_write_queue.start()
+    
+    # Pre-generate plans for upcoming check-ins during idle LLM time
+    try:
+        from services.pregeneration_service import plan_pregenerator
+        plan_pregenerator.start()
+    except Exception as e:
+        logger.warning(f"⚠️ Plan pre-generation not started: {e}")
+    
+    startup_report.record("accepting_requests", startup_report.elapsed())
+    logger.info("✅ Agent service ready! (embedding model loading in background)")
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("👋 Shutting down Agent Service...")
+    
+    for task in _startup_tasks:
+        task.cancel()
+    
+    from services.pregeneration_service import plan_pregenerator
+    await plan_pregenerator.stop()
+    
+    from services.itinerary_bootstrap import itinerary_bootstrapper
+    await itinerary_bootstrapper.stop()
+    
+    from rag.write_queue import rag_write_queue
+    await rag_write_queue.stop()
+    
+    from services.tavily_service import tavily_service
+    await tavily_service.close()
 
 if __name__ == "__main__":
     import uvicorn
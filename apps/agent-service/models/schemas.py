@@ -22,6 +22,18 @@ class AgentRequest(BaseModel):
     preferences: Optional[UserPreferences] = Field(default_factory=UserPreferences)
     secret: str = Field(..., description="Secret token from backend")
 
+class BatchPlanRequest(BaseModel):
+    """Request to generate travel plans for many bookings at once"""
+    booking_ids: List[int] = Field(..., min_length=1, description="Bookings to plan (ACCEPTED only)")
+    preferences: Optional[UserPreferences] = Field(default_factory=UserPreferences)
+    secret: str = Field(..., description="Secret token from backend")
+
+class BookingEvent(BaseModel):
+    """Booking lifecycle event sent by the backend"""
+    booking_id: int
+    user_id: Optional[int] = None
+    secret: str = Field(..., description="Secret token from backend")
+
 # ============================================
 # RESPONSE MODELS
 # ============================================
@@ -109,5 +121,6 @@ class HealthResponse(BaseModel):
     """Health check response"""
     status: str
     services: Dict[str, str]
+    circuits: Optional[Dict[str, Dict[str, Any]]] = None
     timestamp: str
 
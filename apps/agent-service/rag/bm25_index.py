@@ -0,0 +1,182 @@
+# rag/bm25_index.py
+import os
+import re
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset("""
+a an and are as at be by can could do does for from had has have how i if in is it its
+me my of on or our so that the their them there these they this to was we what when
+where which who will with would you your
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word/number tokens without stop words, plurals folded ("refunds" -> "refund")"""
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 4 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of documents
+
+    Postings are stored CSR-style: one sorted term array, an offsets array, and flat
+    doc-id / term-frequency arrays in the smallest integer dtypes that fit. A query
+    scores only the postings of its terms, accumulated into one dense array.
+    Each document may belong to a group (e.g. its policy type) that searches can filter on.
+    """
+
+    def __init__(self, ids: List[str], terms: np.ndarray, offsets: np.ndarray, postings: np.ndarray,
+                 frequencies: np.ndarray, doc_lengths: np.ndarray, groups: Optional[np.ndarray] = None,
+                 doc_groups: Optional[np.ndarray] = None, k1: float = 1.2, b: float = 0.75):
+        self.ids = list(ids)
+        self.terms = terms
+        self.offsets = offsets
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self.groups = groups if groups is not None else np.array([], dtype=str)
+        self.doc_groups = doc_groups if doc_groups is not None else np.full(len(self.ids), -1, dtype=np.int16)
+        self.k1 = k1
+        self.b = b
+
+        self._term_rows = {term: row for row, term in enumerate(terms.tolist())}
+        average = float(doc_lengths.mean()) if len(doc_lengths) else 1.0
+        # Per-document part of the BM25 denominator, computed once
+        self._length_norm = (k1 * (1 - b + b * doc_lengths / max(average, 1e-9))).astype(np.float32)
+        doc_freq = np.diff(offsets).astype(np.float64)
+        self._idf = np.log(1 + (len(self.ids) - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+    @classmethod
+    def build(cls, ids: Sequence[str], texts: Sequence[str], groups: Optional[Sequence[Optional[str]]] = None,
+              **params) -> "BM25Index":
+        """Index `texts` (one per id), optionally tagging each with a group name"""
+        term_docs: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lengths = np.zeros(len(ids), dtype=np.uint32)
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc] = len(tokens)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for term, count in counts.items():
+                term_docs.setdefault(term, []).append((doc, count))
+
+        terms = sorted(term_docs)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for row, term in enumerate(terms):
+            offsets[row + 1] = offsets[row] + len(term_docs[term])
+        postings = np.empty(offsets[-1], dtype=np.min_scalar_type(max(len(ids) - 1, 0)))
+        frequencies = np.empty(offsets[-1], dtype=np.uint16)
+        for row, term in enumerate(terms):
+            docs = term_docs[term]
+            postings[offsets[row]:offsets[row + 1]] = [doc for doc, _ in docs]
+            frequencies[offsets[row]:offsets[row + 1]] = [min(count, 65535) for _, count in docs]
+
+        group_names = sorted({group for group in groups or [] if group is not None})
+        codes = {group: code for code, group in enumerate(group_names)}
+        doc_groups = np.array([codes.get(group, -1) for group in groups] if groups else [-1] * len(ids), dtype=np.int16)
+
+        return cls(list(ids), np.array(terms, dtype=str), offsets, postings, frequencies, doc_lengths,
+                   np.array(group_names, dtype=str), doc_groups, **params)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the postings arrays"""
+        return sum(a.nbytes for a in (self.terms, self.offsets, self.postings, self.frequencies,
+                                       self.doc_lengths, self.doc_groups))
+
+    def search(self, query: str, k: int = 10, groups: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Top-k documents as [{'id', 'score', 'matched', 'coverage'}], best first
+
+        `coverage` is the share of the query's IDF weight that the document matches
+        (1.0 = every distinct query term appears in it). With `groups`, only documents
+        in those groups are returned.
+        """
+        query_terms = [term for term in dict.fromkeys(tokenize(query)) if term in self._term_rows]
+        if not query_terms or not self.ids:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        matched_weight = np.zeros(len(self.ids), dtype=np.float32)
+        matched_terms: Dict[int, List[str]] = {}
+        total_weight = 0.0
+        for term in query_terms:
+            row = self._term_rows[term]
+            docs = self.postings[self.offsets[row]:self.offsets[row + 1]]
+            tf = self.frequencies[self.offsets[row]:self.offsets[row + 1]].astype(np.float32)
+            idf = self._idf[row]
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+            matched_weight[docs] += idf
+            total_weight += float(idf)
+            for doc in docs.tolist():
+                matched_terms.setdefault(doc, []).append(term)
+
+        # Query terms missing from the vocabulary count against coverage too
+        unknown = len(set(tokenize(query))) - len(query_terms)
+        total_weight += unknown * float(self._idf.max())
+
+        if groups is not None:
+            wanted = set(groups)
+            codes = [code for code, group in enumerate(self.groups.tolist()) if group in wanted]
+            scores[~np.isin(self.doc_groups, codes)] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [{
+            'id': self.ids[doc],
+            'score': float(scores[doc]),
+            'matched': matched_terms[doc],
+            'coverage': float(matched_weight[doc] / total_weight)
+        } for doc in candidates.tolist()]
+
+    def save(self, path: Path):
+        """Write atomically as .npz"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path, version=np.array(FORMAT_VERSION), ids=np.array(self.ids, dtype=str), terms=self.terms,
+            offsets=self.offsets, postings=self.postings, frequencies=self.frequencies,
+            doc_lengths=self.doc_lengths, groups=self.groups, doc_groups=self.doc_groups,
+            params=np.array([self.k1, self.b])
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BM25Index"]:
+        """Index saved by `save`, or None if missing or from another format version"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != FORMAT_VERSION:
+                    return None
+                k1, b = data["params"].tolist()
+                return cls(data["ids"].tolist(), data["terms"], data["offsets"], data["postings"],
+                           data["frequencies"], data["doc_lengths"], data["groups"], data["doc_groups"],
+                           k1=k1, b=b)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load keyword index {path}: {e}")
+            return None
@@ -0,0 +1,147 @@
+# rag/chunking.py
+import re
+import logging
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A sentence ends at . ! or ? (plus closing quotes/brackets) followed by whitespace;
+# bullet points (common in the policy PDFs) also start a new sentence
+SENTENCE_END = re.compile(r'[.!?]["\'\)\]”’]*\s+|\s+(?=[●•▪◦○])')
+
+# Stand-in for the model tokenizer: words and single punctuation marks (WordPiece splits at least this finely)
+_APPROX_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+Span = Tuple[int, int]
+
+class TokenChunker:
+    """
+    Pack whole sentences into chunks of at most `max_tokens` model tokens
+
+    Consecutive chunks share their last/first `overlap_tokens` tokens. Sentences longer
+    than the budget are split at token boundaries. Text is consumed in one pass over
+    streamed pieces; each sentence is tokenized once, and chunks carry their character
+    offsets into the joined text.
+    """
+
+    def __init__(self, tokenizer=None, max_tokens: int = 128, overlap_tokens: int = 16):
+        if overlap_tokens >= max_tokens:
+            raise ValueError("overlap_tokens must be smaller than max_tokens")
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    @property
+    def name(self) -> str:
+        kind = "model" if self.tokenizer is not None else "approx"
+        return f"tokens-{kind}-{self.max_tokens}-{self.overlap_tokens}"
+
+    def _token_spans(self, sentences: List[str]) -> List[List[Span]]:
+        """Character spans of each sentence's tokens (without special tokens)"""
+        if self.tokenizer is not None:
+            encodings = self.tokenizer.encode_batch(sentences, add_special_tokens=False)
+            return [[span for span in encoding.offsets if span[1] > span[0]] for encoding in encodings]
+        return [[match.span() for match in _APPROX_TOKEN.finditer(sentence)] for sentence in sentences]
+
+    def chunk_stream(self, pieces: Iterable[str], separator: str = " ") -> Iterator[Dict[str, Any]]:
+        """
+        Yield {'text', 'start', 'end', 'tokens'} for text arriving in pieces
+
+        Offsets refer to separator.join(pieces).
+        """
+        buffer = ""          # text not yet fully chunked
+        buffer_offset = 0    # global offset of buffer[0]
+        scanned = 0          # buffer position up to which sentences have been packed
+        window: List[Span] = []  # global token spans of the chunk being built
+
+        def emit(tokens: List[Span]) -> Dict[str, Any]:
+            start, end = tokens[0][0], tokens[-1][1]
+            return {
+                'text': buffer[start - buffer_offset:end - buffer_offset],
+                'start': start,
+                'end': end,
+                'tokens': len(tokens)
+            }
+
+        def tail(tokens: List[Span], keep: int) -> List[Span]:
+            """Last `keep` tokens, moved forward to a word start so overlap never begins mid-word"""
+            if keep <= 0:
+                return []
+            i = len(tokens) - keep
+            while 0 < i < len(tokens) and tokens[i][0] == tokens[i - 1][1]:
+                i += 1
+            return tokens[i:]
+
+        def pack(sentence_spans: List[List[Span]]) -> Iterator[Dict[str, Any]]:
+            nonlocal window
+            for tokens in sentence_spans:
+                if not tokens:
+                    continue
+                if len(window) + len(tokens) > self.max_tokens and window:
+                    yield emit(window)
+                    # Carry the overlap, shrinking it if the next sentence needs the room
+                    keep = min(self.overlap_tokens, max(self.max_tokens - len(tokens), 0))
+                    window = tail(window, keep)
+
+                # A sentence that alone exceeds the budget is split at token boundaries
+                while len(window) + len(tokens) > self.max_tokens:
+                    room = self.max_tokens - len(window)
+                    window.extend(tokens[:room])
+                    tokens = tokens[room:]
+                    yield emit(window)
+                    window = tail(window, self.overlap_tokens)
+                window.extend(tokens)
+
+        def sentences_in(end: int) -> Tuple[List[str], List[int], int]:
+            """Complete sentences in buffer[scanned:end], their global start offsets, and where the rest begins"""
+            texts, starts = [], []
+            position = scanned
+            for match in SENTENCE_END.finditer(buffer, scanned, end):
+                texts.append(buffer[position:match.end()].rstrip())
+                starts.append(buffer_offset + position)
+                position = match.end()
+            return texts, starts, position
+
+        first = True
+        for piece in pieces:
+            buffer = piece if first else buffer + separator + piece
+            first = False
+
+            # Everything before the last sentence break is final; the tail may continue in the next piece
+            texts, starts, position = sentences_in(len(buffer))
+            spans = self._token_spans(texts) if texts else []
+            yield from pack([[(s + base, e + base) for s, e in sentence] for sentence, base in zip(spans, starts)])
+            scanned = position
+
+            # Drop text that no chunk can reference any more
+            keep_from = window[0][0] - buffer_offset if window else scanned
+            keep_from = min(keep_from, scanned)
+            buffer = buffer[keep_from:]
+            buffer_offset += keep_from
+            scanned -= keep_from
+
+        # Final (possibly unterminated) sentence
+        tail = buffer[scanned:]
+        if tail.strip():
+            spans = self._token_spans([tail])[0]
+            yield from pack([[(s + buffer_offset + scanned, e + buffer_offset + scanned) for s, e in spans]])
+        if window:
+            yield emit(window)
+
+def model_tokenizer(model) -> Optional[Any]:
+    """A `tokenizers.Tokenizer` (no truncation/padding) for a loaded embedding model, if it has one"""
+    if model is None:
+        return None
+    try:
+        from tokenizers import Tokenizer
+        source = getattr(model, 'tokenizer', None)
+        source = getattr(source, 'backend_tokenizer', source)  # HF fast tokenizer -> tokenizers.Tokenizer
+        if source is None or not hasattr(source, 'to_str'):
+            return None
+        tokenizer = Tokenizer.from_str(source.to_str())
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        return tokenizer
+    except Exception as e:
+        logger.warning(f"⚠️ Model tokenizer unavailable, approximating tokens: {e}")
+        return None
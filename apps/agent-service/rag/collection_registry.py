@@ -0,0 +1,104 @@
+# rag/collection_registry.py
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class CollectionHandle:
+    """
+    Proxy for a vector store collection that caches count()
+
+    Writes made through the handle (add/upsert/update/delete) invalidate the cached
+    count; everything else is passed through to the wrapped collection.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._lock = threading.Lock()
+        self._count: Optional[int] = None
+        self._writes = 0  # bumped on every write, so a count racing a write isn't cached
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._collection, name)
+
+    def __repr__(self) -> str:
+        return f"CollectionHandle({self._collection.name!r}, count={self._count})"
+
+    def count(self) -> int:
+        with self._lock:
+            if self._count is not None:
+                return self._count
+            writes = self._writes
+        count = self._collection.count()
+        with self._lock:
+            if self._writes == writes:
+                self._count = count
+        return count
+
+    def _write(self, method: str, *args, **kwargs):
+        try:
+            return getattr(self._collection, method)(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._writes += 1
+                self._count = None
+
+    def add(self, *args, **kwargs):
+        return self._write("add", *args, **kwargs)
+
+    def upsert(self, *args, **kwargs):
+        return self._write("upsert", *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._write("update", *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write("delete", *args, **kwargs)
+
+class CollectionRegistry:
+    """Collections of one client, opened once and shared as CollectionHandles"""
+
+    def __init__(self, client):
+        self.client = client
+        self._handles: Dict[str, CollectionHandle] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> CollectionHandle:
+        handle = self._handles.get(name)
+        if handle is not None:
+            return handle
+
+        with self._lock:
+            handle = self._handles.get(name)
+            if handle is not None:
+                return handle
+            try:
+                collection = self.client.get_collection(name)
+                logger.info(f"✅ Collection '{name}' loaded")
+            except Exception:
+                collection = self.client.create_collection(
+                    name=name,
+                    metadata=metadata or {"description": f"Collection: {name}"}
+                )
+                logger.info(f"✅ Collection '{name}' created")
+            handle = self._handles[name] = CollectionHandle(collection)
+            return handle
+
+    def invalidate(self, name: Optional[str] = None):
+        """Forget cached handles (e.g. after a collection was deleted through the client)"""
+        with self._lock:
+            if name is None:
+                self._handles.clear()
+            else:
+                self._handles.pop(name, None)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Open collections, their cached counts (None = not cached) and compact storage, if any"""
+        stats = {}
+        for name, handle in self._handles.items():
+            stats[name] = {"cached_count": handle._count, "writes": handle._writes}
+            compact = getattr(handle._collection, "compact_stats", lambda: None)()
+            if compact:
+                stats[name]["compact"] = compact
+        return stats
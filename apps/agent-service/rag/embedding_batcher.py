@@ -0,0 +1,90 @@
+# rag/embedding_batcher.py
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingBatcher:
+    """
+    Coalesce concurrent single-text encode calls into one model batch
+
+    Callers get a Future; a worker thread waits up to `window_ms` after the first
+    request (or until `max_batch` texts are queued) and runs one encode over the batch.
+    A lone request with no recent concurrency is encoded immediately.
+    """
+
+    def __init__(self, encode_batch: Callable[[List[str]], Any]):
+        self.encode_batch = encode_batch
+        self.window = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "3")) / 1000
+        self.max_batch = int(os.getenv("EMBEDDING_BATCH_MAX", "32"))
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._last_batch_size = 0
+        self.stats = {'requests': 0, 'batches': 0, 'largest_batch': 0, 'errors': 0}
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text; the future resolves to its embedding"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, future))
+        self.stats['requests'] += 1
+        return future
+
+    def _collect(self) -> list:
+        """Block for the first request, then gather more until the window closes or the batch is full"""
+        batch = [self._queue.get()]
+        if self._last_batch_size <= 1 and self._queue.empty():
+            return batch
+
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self.encode_batch(texts)
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"❌ Batched encoding error ({len(texts)} texts): {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+            self._last_batch_size = len(batch)
+            self.stats['batches'] += 1
+            self.stats['largest_batch'] = max(self.stats['largest_batch'], len(batch))
+
+    def get_stats(self) -> Dict[str, Any]:
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'window_ms': self.window * 1000,
+            'max_batch': self.max_batch,
+            'avg_batch': round(self.stats['requests'] / batches, 2) if batches else 0,
+            'queue_depth': self._queue.qsize()
+        }
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    Embedding vectors keyed by (model name, normalized text hash)
+
+    Tier 1 is an in-process LRU. Tier 2 (enabled by EMBEDDING_CACHE_DIR) is a
+    memory-mapped float32 matrix with a SQLite key -> row index, so several
+    worker processes can share the vectors. Tier 2 is a ring buffer: when it is
+    full the oldest rows are overwritten.
+    """
+
+    def __init__(self, model_name: str, dim: int):
+        self.model_name = model_name
+        self.dim = dim
+        self.max_entries = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        self.disk_dir = os.getenv("EMBEDDING_CACHE_DIR", "")
+        self.disk_capacity = int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", "200000"))
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._vectors = None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        if self.disk_dir:
+            try:
+                self._open_disk()
+            except Exception as e:
+                logger.error(f"❌ Embedding disk cache unavailable: {e}")
+                self._conn = None
+                self._vectors = None
+
+    def _open_disk(self):
+        directory = Path(self.disk_dir) / self.model_name.replace("/", "_")
+        directory.mkdir(parents=True, exist_ok=True)
+        vectors_path = directory / "vectors.f32"
+
+        self._conn = sqlite3.connect(
+            str(directory / "index.db"),
+            check_same_thread=False,
+            timeout=30,
+            isolation_level=None  # autocommit; slot reservation uses explicit transactions
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, slot INTEGER NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_slot ON entries (slot)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO meta (name, value) VALUES ('next_slot', 0)")
+
+        shape = (self.disk_capacity, self.dim)
+        mode = "r+" if vectors_path.exists() else "w+"
+        self._vectors = np.memmap(str(vectors_path), dtype=np.float32, mode=mode, shape=shape)
+        logger.info(f"✅ Embedding disk cache: {vectors_path} ({self.disk_capacity} rows)")
+
+    def key(self, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha1(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Cached vector (read-only float32) or None"""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                return vector
+
+            if self._conn is not None:
+                row = self._conn.execute("SELECT slot FROM entries WHERE key = ?", (key,)).fetchone()
+                if row:
+                    vector = np.array(self._vectors[row[0]], dtype=np.float32)
+                    vector.setflags(write=False)
+                    self._remember(key, vector)
+                    self.stats['disk_hits'] += 1
+                    return vector
+
+            self.stats['misses'] += 1
+            return None
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        return [self.get(key) for key in keys]
+
+    def put(self, key: str, vector) -> np.ndarray:
+        """Store a vector in both tiers; returns the cached read-only copy"""
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+
+        with self._lock:
+            self._remember(key, vector)
+
+            if self._conn is not None:
+                try:
+                    self._write_disk(key, vector)
+                except Exception as e:
+                    logger.warning(f"⚠️ Embedding disk cache write failed: {e}")
+
+        return vector
+
+    def _write_disk(self, key: str, vector: np.ndarray):
+        # Reserve a slot atomically across processes, evicting whatever used it
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone():
+                self._conn.execute("COMMIT")
+                return
+            next_slot = self._conn.execute("SELECT value FROM meta WHERE name = 'next_slot'").fetchone()[0]
+            slot = next_slot % self.disk_capacity
+            self._conn.execute("UPDATE meta SET value = ? WHERE name = 'next_slot'", (next_slot + 1,))
+            self._conn.execute("DELETE FROM entries WHERE slot = ?", (slot,))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+        # Write the row before publishing the key so readers never see a half-written vector
+        self._vectors[slot] = vector
+        self._vectors.flush()
+        self._conn.execute("INSERT OR REPLACE INTO entries (key, slot) VALUES (?, ?)", (key, slot))
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['disk_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'memory_entries': len(self._memory),
+            'disk_enabled': self._conn is not None,
+            'hit_rate': round((self.stats['hits'] + self.stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        }
@@ -1,57 +1,180 @@
 # rag/embeddings.py
+import os
+import time
+import asyncio
 import logging
+import threading
+import importlib.util
 from typing import List
 
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+from .embedding_batcher import EmbeddingBatcher
+
 logger = logging.getLogger(__name__)
 
-try:
-    from sentence_transformers import SentenceTransformer
-    EMBEDDINGS_AVAILABLE = True
-except ImportError:
-    logger.warning("⚠️ sentence-transformers not installed")
-    EMBEDDINGS_AVAILABLE = False
+# Shared dummy vector returned when embeddings are unavailable (never copied per call)
+ZERO_VECTOR = np.zeros(384, dtype=np.float32)  # MiniLM output dimension
+ZERO_VECTOR.setflags(write=False)
+
+def zero_vectors(count: int) -> np.ndarray:
+    """Read-only (count, 384) view of ZERO_VECTOR without allocating"""
+    return np.broadcast_to(ZERO_VECTOR, (count, ZERO_VECTOR.shape[0]))
+
+# "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime, see rag/onnx_embedder.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+
+# Checked without importing: sentence-transformers pulls in torch, which is slow to import
+if EMBEDDING_BACKEND == "onnx":
+    EMBEDDINGS_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ("onnxruntime", "tokenizers"))
+else:
+    EMBEDDINGS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
+if not EMBEDDINGS_AVAILABLE:
+    logger.warning(f"⚠️ Embedding backend '{EMBEDDING_BACKEND}' not installed")
 
 class EmbeddingService:
     """Generate embeddings for RAG retrieval"""
-    
+
     def __init__(self):
-        if EMBEDDINGS_AVAILABLE:
-            try:
+        self.model_name = 'all-MiniLM-L6-v2'
+        self.dim = 384  # MiniLM output dimension
+        self.backend = EMBEDDING_BACKEND
+        self.onnx_dir = os.getenv("EMBEDDING_ONNX_DIR", "./agent_data/onnx/all-MiniLM-L6-v2")
+
+        # Quantized vectors differ slightly from torch ones, so each backend gets its own cache keys
+        cache_name = self.model_name if self.backend == "torch" else f"{self.model_name}:{self.backend}"
+        self.cache = EmbeddingCache(cache_name, self.dim)
+
+        # The model is loaded lazily on a background thread (see start_background_load)
+        self._model = None
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._load_thread = None
+        self.load_seconds = None
+        self.ready_timeout = float(os.getenv("EMBEDDING_READY_TIMEOUT", "300"))
+
+        # Concurrent single-text encodes (one per chat query) share one model call
+        self.batching = os.getenv("EMBEDDING_BATCHING", "true").lower() == "true"
+        self.batcher = EmbeddingBatcher(lambda texts: self.model.encode(texts))
+
+    def start_background_load(self):
+        """Start loading the model on a daemon thread (no-op if already started)"""
+        with self._load_lock:
+            if self._load_thread is None:
+                self._load_thread = threading.Thread(target=self._load_model, name="embedding-model-loader", daemon=True)
+                self._load_thread.start()
+
+    def _load_model(self):
+        started = time.perf_counter()
+        try:
+            if EMBEDDINGS_AVAILABLE and self.backend == "onnx":
+                from .onnx_embedder import OnnxEmbedder
+
+                self._model = OnnxEmbedder(self.onnx_dir)
+            elif EMBEDDINGS_AVAILABLE:
+                from sentence_transformers import SentenceTransformer
+
                 # Use lightweight model
-                self.model = SentenceTransformer('all-MiniLM-L6-v2')
-                logger.info("✅ Embedding model loaded: all-MiniLM-L6-v2")
-            except Exception as e:
-                logger.error(f"❌ Embedding model load error: {e}")
-                self.model = None
-        else:
-            self.model = None
-    
-    def encode(self, text: str) -> List[float]:
-        """Convert text to embedding vector"""
+                self._model = SentenceTransformer(self.model_name)
+                logger.info(f"✅ Embedding model loaded: {self.model_name}")
+        except Exception as e:
+            logger.error(f"❌ Embedding model load error: {e}")
+            self._model = None
+        finally:
+            self.load_seconds = time.perf_counter() - started
+            self._ready.set()
+
+    @property
+    def model(self):
+        """The loaded model, waiting for the background load if it is still running"""
+        if not self._ready.is_set():
+            self.start_background_load()
+            if not self._ready.wait(self.ready_timeout):
+                logger.warning(f"⚠️ Embedding model not ready after {self.ready_timeout}s")
+        return self._model
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    async def wait_until_ready(self) -> bool:
+        """Await model readiness without blocking the event loop"""
+        self.start_background_load()
+        return await asyncio.to_thread(self._ready.wait, self.ready_timeout)
+
+    def status(self) -> str:
+        if not self._ready.is_set():
+            return "loading" if self._load_thread else "not_loaded"
+        return "ready" if self._model else "unavailable"
+
+    def encode(self, text: str) -> np.ndarray:
+        """Convert text to a read-only float32 embedding vector (1-D)"""
+        key = self.cache.key(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
         if not self.model:
             # Return dummy embedding for testing
             logger.warning("⚠️ Embeddings not available, returning dummy vector")
-            return [0.0] * 384  # MiniLM output dimension
-        
+            return ZERO_VECTOR
+
         try:
-            embedding = self.model.encode(text)
-            return embedding.tolist()
+            if self.batching:
+                embedding = self.batcher.submit(text).result()
+            else:
+                embedding = self.model.encode(text)
+            return self.cache.put(key, embedding)
         except Exception as e:
             logger.error(f"❌ Encoding error: {e}")
-            return [0.0] * 384
-    
-    def encode_batch(self, texts: List[str]) -> List[List[float]]:
-        """Convert multiple texts to embeddings"""
-        if not self.model:
-            return [[0.0] * 384 for _ in texts]
-        
+            return ZERO_VECTOR
+
+    async def encode_async(self, text: str) -> np.ndarray:
+        """encode() for async callers; waits on the batcher without tying up a thread"""
+        key = self.cache.key(text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        if not self.batching or not self._ready.is_set():
+            return await asyncio.to_thread(self.encode, text)
+        if not self._model:
+            return ZERO_VECTOR
+
         try:
-            embeddings = self.model.encode(texts)
-            return [emb.tolist() for emb in embeddings]
+            embedding = await asyncio.wrap_future(self.batcher.submit(text))
+            return self.cache.put(key, embedding)
+        except Exception as e:
+            logger.error(f"❌ Encoding error: {e}")
+            return ZERO_VECTOR
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Convert multiple texts to a contiguous (len(texts), 384) float32 array"""
+        keys = [self.cache.key(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # Only run the model on texts we haven't embedded before (once per distinct text)
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], texts[i])
+
+        if missing and not self.model:
+            return zero_vectors(len(texts))
+
+        try:
+            fresh = {}
+            if missing:
+                computed = self.model.encode(list(missing.values()))
+                fresh = {key: self.cache.put(key, emb) for key, emb in zip(missing, computed)}
+
+            output = np.empty((len(texts), self.dim), dtype=np.float32)
+            for i, (key, vector) in enumerate(zip(keys, vectors)):
+                output[i] = vector if vector is not None else fresh[key]
+            return output
         except Exception as e:
             logger.error(f"❌ Batch encoding error: {e}")
-            return [[0.0] * 384 for _ in texts]
+            return zero_vectors(len(texts))
 
 # Global instance
 embedding_service = EmbeddingService()
-
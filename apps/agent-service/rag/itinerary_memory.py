@@ -0,0 +1,325 @@
+# rag/itinerary_memory.py
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from utils.location import location_key
+from .vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+def split_location(location: str) -> Tuple[str, str]:
+    """"Austin, TX" -> ("Austin", "TX")"""
+    city, _, state = (location or "").rpartition(",")
+    if not city:
+        return state.strip(), ""
+    return city.strip(), state.strip()
+
+def city_filter(city_key: str, state_key: str) -> Dict[str, Any]:
+    """Vector store `where` for one city partition"""
+    return {"$and": [{"city_key": city_key}, {"state_key": state_key}]}
+
+def _names(items: List[Any], key: str, limit: int) -> List[str]:
+    names = []
+    for item in items or []:
+        name = item.get(key) if isinstance(item, dict) else item
+        if name and str(name) not in names:
+            names.append(str(name))
+    return names[:limit]
+
+def summarize_itinerary(location: str, itinerary_data: Dict[str, Any], party_type: str = "couple",
+                        interests: Optional[List[str]] = None) -> str:
+    """Compact text describing a generated plan, used as the document that gets embedded"""
+    days = itinerary_data.get('itinerary') or []
+    day_activities = [
+        (day.get(slot) or {}).get('activity')
+        for day in days if isinstance(day, dict)
+        for slot in ('morning', 'afternoon', 'evening')
+        if isinstance(day.get(slot), dict)
+    ]
+    restaurants = [
+        f"{r.get('name')} ({r.get('cuisine')})" if r.get('cuisine') else r.get('name')
+        for r in itinerary_data.get('restaurants') or [] if isinstance(r, dict) and r.get('name')
+    ]
+    tags = sorted({tag for a in itinerary_data.get('activities') or [] if isinstance(a, dict) for tag in a.get('tags') or []})
+
+    lines = [f"Trip to {location} for {party_type or 'couple'}, {len(days)} day{'s' if len(days) != 1 else ''}"]
+    if interests:
+        lines.append(f"Interests: {', '.join(interests)}")
+    activities = _names(itinerary_data.get('activities'), 'title', 6) or _names(day_activities, 'activity', 6)
+    if activities:
+        lines.append(f"Activities: {'; '.join(activities)}")
+    if tags:
+        lines.append(f"Themes: {', '.join(tags[:8])}")
+    if restaurants:
+        lines.append(f"Dining: {'; '.join(restaurants[:4])}")
+    return "\n".join(lines)
+
+class ItineraryMemory:
+    """
+    Generated itineraries for similar-trip retrieval
+
+    The vector store holds one compact summary per booking (upserted, so regenerating a
+    plan replaces it) with city/state/party metadata; the full plan lives in SQLite.
+    A plan whose summary is nearly identical to one already stored for the city is not
+    indexed again, and each city keeps at most ITINERARY_MAX_PER_CITY entries younger
+    than ITINERARY_RETENTION_DAYS, so the index stays bounded as traffic grows.
+    """
+
+    def __init__(self):
+        self.path = Path(os.getenv("ITINERARY_STORE_PATH", "./agent_data/itineraries.db"))
+        self.max_per_city = int(os.getenv("ITINERARY_MAX_PER_CITY", "50"))
+        self.retention_seconds = float(os.getenv("ITINERARY_RETENTION_DAYS", "180")) * 86400
+        # Squared L2 between unit vectors; 0.05 is cosine similarity 0.975
+        self.duplicate_distance = float(os.getenv("ITINERARY_DUPLICATE_DISTANCE", "0.05"))
+        self._lock = threading.Lock()
+        self._conn = None
+        self.stats = {'stored': 0, 'duplicates': 0, 'evicted': 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the SQLite database on first use"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS itineraries (
+                    itinerary_id TEXT PRIMARY KEY,
+                    booking_id INTEGER,
+                    city_key TEXT NOT NULL,
+                    state_key TEXT NOT NULL,
+                    party_type TEXT,
+                    summary TEXT NOT NULL,
+                    plan TEXT NOT NULL,
+                    duplicate_of TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS itineraries_city ON itineraries (city_key, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS itineraries_state ON itineraries (state_key)")
+            self._conn.commit()
+            logger.info(f"✅ Itinerary store opened: {self.path}")
+        return self._conn
+
+    def remember(
+        self,
+        booking_id: int,
+        location: str,
+        itinerary_data: Dict[str, Any],
+        embedding: np.ndarray,
+        summary: str,
+        party_type: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Store a plan and index its summary; returns {'itinerary_id', 'indexed', 'duplicate_of', 'evicted'}
+
+        `embedding` is the embedding of `summary`.
+        """
+        entry = {
+            'booking_id': booking_id,
+            'location': location,
+            'itinerary_data': itinerary_data,
+            'summary': summary,
+            'party_type': party_type
+        }
+        return self.remember_many([entry], np.atleast_2d(embedding))[0]
+
+    def remember_many(self, entries: List[Dict[str, Any]], embeddings: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Store several plans with one vector store upsert and one SQLite transaction
+
+        Each entry has 'booking_id', 'location', 'itinerary_data', 'summary' and optionally
+        'party_type'; row i of `embeddings` embeds entry i's summary. If a booking appears
+        more than once, its last entry wins.
+        """
+        now = time.time()
+        collection = vector_store.collection
+        latest = {f"booking_{entry['booking_id']}": i for i, entry in enumerate(entries)}
+
+        results, rows = [], []
+        upsert_ids, upsert_rows, upsert_docs, upsert_metadatas = [], [], [], []
+        duplicate_ids = []
+        cities = set()
+
+        with self._lock:
+            for i, entry in enumerate(entries):
+                itinerary_id = f"booking_{entry['booking_id']}"
+                result = {'itinerary_id': itinerary_id, 'indexed': False, 'duplicate_of': None, 'evicted': 0}
+                results.append(result)
+                if latest[itinerary_id] != i:
+                    continue
+
+                city, state = split_location(entry['location'])
+                city_key, state_key = location_key(city), location_key(state)
+                party_type = entry.get('party_type') or "couple"
+                cities.add((city_key, state_key))
+
+                if collection is not None:
+                    # Near-duplicates of stored itineraries, or of ones earlier in this batch
+                    duplicate_of = self._find_duplicate(collection, itinerary_id, city_key, state_key, party_type, embeddings[i])
+                    for other_id, row, metadata in zip(upsert_ids, upsert_rows, upsert_metadatas):
+                        if duplicate_of:
+                            break
+                        if (metadata['city_key'], metadata['state_key'], metadata['party_type']) == (city_key, state_key, party_type) \
+                                and self._is_duplicate(embeddings[i], embeddings[row]):
+                            duplicate_of = other_id
+
+                    if duplicate_of:
+                        result['duplicate_of'] = duplicate_of
+                        self.stats['duplicates'] += 1
+                        duplicate_ids.append(itinerary_id)
+                    else:
+                        upsert_ids.append(itinerary_id)
+                        upsert_rows.append(i)
+                        upsert_docs.append(entry['summary'])
+                        upsert_metadatas.append({
+                            'location': entry['location'],
+                            'city_key': city_key,
+                            'state_key': state_key,
+                            'party_type': party_type,
+                            'booking_id': entry['booking_id'],
+                            'created_at': now
+                        })
+                        result['indexed'] = True
+
+                rows.append((itinerary_id, entry['booking_id'], city_key, state_key, party_type, entry['summary'],
+                             json.dumps(entry['itinerary_data'], default=str), result['duplicate_of'], now))
+
+            if upsert_ids:
+                collection.upsert(
+                    ids=upsert_ids,
+                    embeddings=embeddings[upsert_rows],
+                    documents=upsert_docs,
+                    metadatas=upsert_metadatas
+                )
+            if duplicate_ids:
+                # An earlier version of these bookings' plans would otherwise linger in the index
+                collection.delete(ids=duplicate_ids)
+
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO itineraries (itinerary_id, booking_id, city_key, state_key, party_type, "
+                "summary, plan, duplicate_of, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+            self.stats['stored'] += len(rows)
+
+            evicted = 0
+            if collection is not None:
+                for city_key, state_key in cities:
+                    evicted += self._apply_retention(collection, city_key, state_key, now)
+            if results:
+                results[-1]['evicted'] = evicted
+
+        duplicates = sum(1 for result in results if result['duplicate_of'])
+        logger.info(f"✅ Stored {len(rows)} itineraries ({len(upsert_ids)} indexed, {duplicates} near-duplicates)")
+        return results
+
+    def _is_duplicate(self, a: np.ndarray, b: np.ndarray) -> bool:
+        # Zero vectors (embedding model unavailable) would all look identical
+        if self.duplicate_distance <= 0 or not np.any(a) or not np.any(b):
+            return False
+        difference = a - b
+        return float(difference @ difference) <= self.duplicate_distance
+
+    def _find_duplicate(self, collection, itinerary_id: str, city_key: str, state_key: str, party_type: str,
+                        embedding: np.ndarray) -> Optional[str]:
+        """Id of another indexed itinerary for the same city and party that is nearly identical"""
+        # Zero vectors (embedding model unavailable) would all look identical
+        if self.duplicate_distance <= 0 or not np.any(embedding):
+            return None
+        results = collection.query(
+            query_embeddings=np.atleast_2d(embedding),
+            n_results=2,
+            where={"$and": [{"city_key": city_key}, {"state_key": state_key}, {"party_type": party_type}]}
+        )
+        for other_id, distance in zip(results['ids'][0], results['distances'][0]):
+            if other_id != itinerary_id and distance <= self.duplicate_distance:
+                return other_id
+        return None
+
+    def _apply_retention(self, collection, city_key: str, state_key: str, now: float) -> int:
+        """Evict a city's entries past the age limit, then the oldest beyond the count limit"""
+        entries = collection.get(where=city_filter(city_key, state_key), include=['metadatas'])
+        by_age = sorted(
+            zip(entries['ids'], entries['metadatas']),
+            key=lambda entry: float((entry[1] or {}).get('created_at') or 0),
+            reverse=True
+        )
+        cutoff = now - self.retention_seconds
+        evict = [
+            itinerary_id for rank, (itinerary_id, metadata) in enumerate(by_age)
+            if rank >= self.max_per_city or float((metadata or {}).get('created_at') or 0) < cutoff
+        ]
+        if not evict:
+            return 0
+
+        collection.delete(ids=evict)
+        conn = self._connection()
+        conn.executemany("DELETE FROM itineraries WHERE itinerary_id = ?", [(i,) for i in evict])
+        # Plans that were only kept as duplicates of an evicted entry go with it
+        conn.executemany("DELETE FROM itineraries WHERE duplicate_of = ?", [(i,) for i in evict])
+        conn.commit()
+        self.stats['evicted'] += len(evict)
+        logger.info(f"🧹 Evicted {len(evict)} itineraries for {city_key} {state_key}")
+        return len(evict)
+
+    def partition_counts(self, city_key: str, state_key: str) -> Dict[str, int]:
+        """Indexed itineraries for a city and for its state (index lookups, not a collection scan)"""
+        with self._lock:
+            conn = self._connection()
+            city = conn.execute(
+                "SELECT COUNT(*) FROM itineraries WHERE city_key = ? AND state_key = ? AND duplicate_of IS NULL",
+                (city_key, state_key)
+            ).fetchone()[0]
+            state = conn.execute(
+                "SELECT COUNT(*) FROM itineraries WHERE state_key = ? AND duplicate_of IS NULL", (state_key,)
+            ).fetchone()[0] if state_key else 0
+        return {'city': city, 'state': state}
+
+    def stored_bookings(self, booking_ids: List[int]) -> set:
+        """Which of `booking_ids` already have a stored plan"""
+        if not booking_ids:
+            return set()
+        placeholders = ", ".join("?" * len(booking_ids))
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT booking_id FROM itineraries WHERE booking_id IN ({placeholders})", list(booking_ids)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def get_plan(self, itinerary_id: str) -> Optional[Dict[str, Any]]:
+        """Full stored plan for an itinerary id ("booking_<id>")"""
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT plan FROM itineraries WHERE itinerary_id = ?", (itinerary_id,)
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"❌ Itinerary store read error: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows, cities = self._connection().execute(
+                "SELECT COUNT(*), COUNT(DISTINCT city_key) FROM itineraries"
+            ).fetchone()
+        return {
+            **self.stats,
+            'plans': rows,
+            'cities': cities,
+            'indexed': vector_store.count(),
+            'max_per_city': self.max_per_city,
+            'retention_days': self.retention_seconds / 86400
+        }
+
+# Global instance
+itinerary_memory = ItineraryMemory()
@@ -0,0 +1,718 @@
+# rag/numpy_index.py
+import io
+import os
+import json
+import struct
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from .vector_codec import VectorCodec
+
+logger = logging.getLogger(__name__)
+
+# 1: every record in the JSON sidecar, matrix in {name}.{generation}.npy (rewritten as 2 on load)
+# 2: column snapshot {name}.{generation}.npz, append journal {name}.{generation}.log,
+#    raw float32 rows {name}.{matrix generation}.f32; the JSON sidecar only points at them
+FORMAT_VERSION = 2
+
+# The append journal is folded into a new column snapshot once it holds this many batches,
+# or this many rows and more than the snapshot, so reopening replays a short journal and
+# appends stay amortized O(rows appended)
+JOURNAL_MAX_BATCHES = 256
+
+# Default `include` lists, same as Chroma
+QUERY_INCLUDE = ("documents", "metadatas", "distances")
+GET_INCLUDE = ("documents", "metadatas")
+
+_COMPARISONS = {
+    "$eq": lambda value, target: value is not None and value == target,
+    "$ne": lambda value, target: value != target,
+    "$gt": lambda value, target: value is not None and value > target,
+    "$gte": lambda value, target: value is not None and value >= target,
+    "$lt": lambda value, target: value is not None and value < target,
+    "$lte": lambda value, target: value is not None and value <= target,
+    "$in": lambda value, target: value is not None and value in target,
+    "$nin": lambda value, target: value not in target,
+}
+
+def _top_k(distances: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k smallest distances, nearest first"""
+    k = min(k, len(distances))
+    if not k:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(distances, k - 1)[:k]
+    return top[np.argsort(distances[top], kind="stable")]
+
+def _pack_strings(prefix: str, values: List[Optional[str]]) -> Dict[str, np.ndarray]:
+    """Optional strings as one UTF-8 buffer, offsets into it and a not-None mask"""
+    encoded = [value.encode() if value is not None else b"" for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded])
+    return {
+        f"{prefix}_data": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        f"{prefix}_offsets": offsets,
+        f"{prefix}_present": np.array([value is not None for value in values], dtype=bool)
+    }
+
+def _unpack_strings(data, prefix: str) -> List[Optional[str]]:
+    buffer = data[f"{prefix}_data"].tobytes()
+    offsets = data[f"{prefix}_offsets"].tolist()
+    present = data[f"{prefix}_present"]
+    if buffer.isascii():
+        # Byte offsets are character offsets: slice one decoded string
+        text = buffer.decode()
+        values = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+    else:
+        values = [buffer[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+    if not present.all():
+        for row in np.flatnonzero(~present).tolist():
+            values[row] = None
+    return values
+
+def _column_kind(column: List[Any]) -> str:
+    """Storage type of a metadata column: bool/int/float arrays, UTF-8 strings, or JSON for mixed types"""
+    kinds = {type(value) for value in column if value is not None}
+    if kinds == {bool}:
+        return "bool"
+    if kinds == {int} and all(-2 ** 63 <= value < 2 ** 63 for value in column if value is not None):
+        return "int"
+    if kinds == {float}:
+        return "float"
+    return "str" if kinds <= {str} else "json"
+
+_COLUMN_DTYPES = {"bool": bool, "int": np.int64, "float": np.float64}
+
+def _pack_records(ids: List[str], documents: List[Optional[str]], columns: Dict[str, List[Any]], dim: int) -> Dict[str, np.ndarray]:
+    """Records as named arrays for np.savez (no pickles)"""
+    arrays = {
+        "version": np.array(FORMAT_VERSION),
+        "dim": np.array(dim),
+        **_pack_strings("ids", ids),
+        **_pack_strings("documents", documents),
+        **_pack_strings("column_names", list(columns)),
+        "column_kinds": np.array([_column_kind(column) for column in columns.values()], dtype="U5")
+    }
+    for index, (column, kind) in enumerate(zip(columns.values(), arrays["column_kinds"].tolist())):
+        if kind == "str":
+            arrays.update(_pack_strings(f"column{index}", column))
+        elif kind == "json":
+            arrays.update(_pack_strings(f"column{index}", [json.dumps(value) if value is not None else None for value in column]))
+        else:
+            arrays[f"column{index}_values"] = np.array([0 if value is None else value for value in column], dtype=_COLUMN_DTYPES[kind])
+            arrays[f"column{index}_present"] = np.array([value is not None for value in column], dtype=bool)
+    return arrays
+
+def _unpack_records(data):
+    """(ids, documents, columns, dim) from arrays written by _pack_records"""
+    columns = {}
+    for index, (name, kind) in enumerate(zip(_unpack_strings(data, "column_names"), data["column_kinds"].tolist())):
+        if kind == "str":
+            columns[name] = _unpack_strings(data, f"column{index}")
+        elif kind == "json":
+            columns[name] = [json.loads(value) if value is not None else None for value in _unpack_strings(data, f"column{index}")]
+        else:
+            columns[name] = [
+                value if present else None
+                for value, present in zip(data[f"column{index}_values"].tolist(), data[f"column{index}_present"].tolist())
+            ]
+    return _unpack_strings(data, "ids"), _unpack_strings(data, "documents"), columns, int(data["dim"])
+
+class NumpyCollection:
+    """
+    Small in-process vector collection with the subset of Chroma's Collection API we use
+
+    Embeddings live in one float32 matrix (memory-mapped from disk when persisted),
+    metadata in per-key columns. Queries are one matrix-vector product plus argpartition.
+    Distances are squared L2, matching Chroma's default "l2" space.
+    Persisted, the rows are a raw float32 file and ids, documents and metadata columns a
+    binary .npz snapshot. Adds append their rows to the file and one batch to a journal,
+    committed once the batch is fully written, so an add costs O(rows added) rather than
+    a rewrite of the collection. Updates, deletes and long journals write a new generation
+    and then atomically replace the small JSON sidecar that points at it, so readers never
+    see a half-written collection.
+
+    With `compact` options (see rag/vector_codec.py), queries score a float16/int8
+    (optionally PCA-reduced) copy of the matrix held in RAM and re-rank the best
+    `rerank` x n_results candidates with exact float32 distances read from the
+    memory-mapped matrix, so only those rows' pages need to be resident.
+    """
+
+    def __init__(self, name: str, directory: Optional[Path] = None, metadata: Optional[Dict[str, Any]] = None,
+                 compact: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.metadata = metadata or {}
+        self._directory = directory
+        self._lock = threading.RLock()
+        self._compact = compact
+        self._codec: Optional[VectorCodec] = None
+        self._codes: Optional[np.ndarray] = None
+        self._code_norms: Optional[np.ndarray] = None
+
+        self._generation = 0
+        self._matrix_generation = 0
+        self._dim = 0
+        self._snapshot_rows = 0
+        self._journal_size = 0
+        self._journal_batches = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._documents: List[Optional[str]] = []
+        self._columns: Dict[str, List[Any]] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._sq_norms: Optional[np.ndarray] = None
+
+        if directory is not None and self._meta_path.exists():
+            self._load()
+
+    # ---------- persistence ----------
+
+    @property
+    def _meta_path(self) -> Path:
+        return self._directory / f"{self.name}.meta.json"
+
+    def _matrix_path(self, generation: int) -> Path:
+        return self._directory / f"{self.name}.{generation}.f32"
+
+    def _snapshot_path(self, generation: int) -> Path:
+        return self._directory / f"{self.name}.{generation}.npz"
+
+    def _journal_path(self, generation: int) -> Path:
+        return self._directory / f"{self.name}.{generation}.log"
+
+    def _map_matrix(self) -> Optional[np.ndarray]:
+        """The committed rows of the matrix file, memory-mapped"""
+        if not self._ids:
+            return None
+        return np.memmap(self._matrix_path(self._matrix_generation), dtype=np.float32, mode="r", shape=(len(self._ids), self._dim))
+
+    def _load(self):
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        self.metadata = meta.get("metadata") or {}
+
+        if meta.get("version", 1) == 1:
+            legacy_path = self._directory / f"{self.name}.{meta['generation']}.npy"
+            self._generation = self._matrix_generation = meta["generation"]
+            self._extend(meta["ids"], meta["documents"], {})
+            self._columns = meta["columns"]
+            self._set_matrix(np.load(legacy_path) if self._ids else None)
+            self._persist()
+            legacy_path.unlink(missing_ok=True)
+            return
+
+        self._generation = meta["generation"]
+        self._matrix_generation = meta["matrix_generation"]
+        with np.load(self._snapshot_path(self._generation), allow_pickle=False) as data:
+            ids, documents, columns, self._dim = _unpack_records(data)
+        self._extend(ids, documents, columns)
+        self._snapshot_rows = len(ids)
+        self._replay_journal()
+        self._set_matrix(self._map_matrix())
+
+    def _replay_journal(self):
+        """Apply the journaled batches; a batch cut short by a crash was never committed"""
+        try:
+            journal = self._journal_path(self._generation).read_bytes()
+        except FileNotFoundError:
+            journal = b""
+
+        position = 0
+        while position + 8 <= len(journal):
+            size, = struct.unpack_from("<Q", journal, position)
+            end = position + 8 + size
+            if end > len(journal):
+                break
+            with np.load(io.BytesIO(journal[position + 8:end]), allow_pickle=False) as data:
+                ids, documents, columns, dim = _unpack_records(data)
+            self._extend(ids, documents, columns)
+            self._dim = dim
+            self._journal_batches += 1
+            position = end
+        self._journal_size = position
+
+    def _persist(self, matrix: bool = True):
+        """Write a new generation: a column snapshot, plus the matrix file unless `matrix` is False"""
+        if self._directory is None:
+            return
+
+        previous, previous_matrix = self._generation, self._matrix_generation
+        self._generation += 1
+        if self._matrix is not None:
+            self._dim = self._matrix.shape[1]
+        if matrix:
+            self._matrix_generation = self._generation
+            with open(self._matrix_path(self._matrix_generation), "wb") as f:
+                if self._matrix is not None:
+                    np.ascontiguousarray(self._matrix, dtype=np.float32).tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+            # Same contents, so norms and compact codes stay valid
+            self._matrix = self._map_matrix()
+
+        with open(self._snapshot_path(self._generation), "wb") as f:
+            np.savez(f, **_pack_records(self._ids, self._documents, self._columns, self._dim))
+            f.flush()
+            os.fsync(f.fileno())
+        self._snapshot_rows = len(self._ids)
+        self._journal_size = self._journal_batches = 0
+
+        meta = {
+            "version": FORMAT_VERSION,
+            "name": self.name,
+            "metadata": self.metadata,
+            "generation": self._generation,
+            "matrix_generation": self._matrix_generation
+        }
+        tmp_path = self._meta_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._meta_path)
+
+        # Readers that already opened the old generation keep their mapping
+        stale = [self._snapshot_path(previous), self._journal_path(previous)]
+        if matrix:
+            stale.append(self._matrix_path(previous_matrix))
+        for path in stale:
+            path.unlink(missing_ok=True)
+
+    def _append_matrix(self, start: int, rows: np.ndarray):
+        """Append rows to the matrix file after the `start` committed ones and map the result"""
+        with open(self._matrix_path(self._matrix_generation), "a+b") as f:
+            # Anything past the committed rows was written by an add that never committed
+            f.truncate(start * rows.shape[1] * rows.itemsize)
+            np.ascontiguousarray(rows, dtype=np.float32).tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        self._dim = rows.shape[1]
+        self._matrix = self._map_matrix()
+
+    def _journal(self, start: int):
+        """Commit the records from row `start` on as one journal batch (or a new snapshot)"""
+        if self._directory is None:
+            return
+        if self._journal_batches >= JOURNAL_MAX_BATCHES or len(self._ids) - self._snapshot_rows > max(self._snapshot_rows, JOURNAL_MAX_BATCHES):
+            self._persist(matrix=False)
+            return
+
+        columns = {
+            key: column[start:]
+            for key, column in self._columns.items()
+            if any(value is not None for value in column[start:])
+        }
+        buffer = io.BytesIO()
+        np.savez(buffer, **_pack_records(self._ids[start:], self._documents[start:], columns, self._dim))
+        batch = buffer.getvalue()
+        with open(self._journal_path(self._generation), "a+b") as f:
+            f.truncate(self._journal_size)
+            f.write(struct.pack("<Q", len(batch)) + batch)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_size += 8 + len(batch)
+        self._journal_batches += 1
+
+    def _extend(self, ids: List[str], documents: List[Optional[str]], columns: Dict[str, List[Any]]):
+        """Append records (metadata as columns over the new rows only)"""
+        start = len(self._ids)
+        for offset, id_ in enumerate(ids):
+            self._rows[id_] = start + offset
+        self._ids.extend(ids)
+        self._documents.extend(documents)
+        for column in self._columns.values():
+            column.extend([None] * len(ids))
+        for key, values in columns.items():
+            self._columns.setdefault(key, [None] * len(self._ids))[start:] = values
+
+    def _set_matrix(self, matrix: Optional[np.ndarray]):
+        self._matrix = matrix
+        if matrix is None or not len(matrix):
+            self._matrix = None
+            self._sq_norms = None
+        else:
+            self._sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+        self._encode()
+
+    def _refresh_rows(self, updated: List[int], appended: int):
+        """Norms and compact codes for rows updated in place and the `appended` last rows only"""
+        if self._sq_norms is None:
+            self._set_matrix(self._matrix)
+            return
+        if appended:
+            tail = self._matrix[-appended:]
+            self._sq_norms = np.concatenate([self._sq_norms, np.einsum("ij,ij->i", tail, tail)])
+        if updated:
+            rows = self._matrix[updated]
+            self._sq_norms[updated] = np.einsum("ij,ij->i", rows, rows)
+        self._encode(updated, appended)
+
+    def _encode(self, updated: Optional[List[int]] = None, appended: Optional[int] = None):
+        """
+        Refresh the compact copy used for scoring (fitted once big enough, refitted as it doubles)
+
+        The codec is fixed until it is refitted, so existing codes stay valid: given the
+        rows a write touched, only those are encoded; otherwise every row is.
+        """
+        if not self._compact or self._matrix is None or len(self._matrix) < self._compact['min_rows']:
+            self._codec = self._codes = self._code_norms = None
+            return
+        if self._codec is None or len(self._matrix) >= 2 * self._codec.fitted_rows:
+            self._codec = VectorCodec(self._compact['mode'], self._compact['dims']).fit(self._matrix)
+        elif appended is not None and self._codes is not None:
+            if appended:
+                codes, code_norms = self._codec.encode(self._matrix[-appended:])
+                self._codes = np.concatenate([self._codes, codes])
+                self._code_norms = np.concatenate([self._code_norms, code_norms])
+            if updated:
+                self._codes[updated], self._code_norms[updated] = self._codec.encode(self._matrix[updated])
+            return
+        self._codes, self._code_norms = self._codec.encode(self._matrix)
+
+    # ---------- filters ----------
+
+    def _match(self, where: Dict[str, Any]) -> np.ndarray:
+        """Boolean row mask for a Chroma-style where filter"""
+        count = len(self._ids)
+        mask = np.ones(count, dtype=bool)
+
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._match(clause)
+            elif key == "$or":
+                any_mask = np.zeros(count, dtype=bool)
+                for clause in condition:
+                    any_mask |= self._match(clause)
+                mask &= any_mask
+            else:
+                if isinstance(condition, dict):
+                    (operator, target), = condition.items()
+                else:
+                    operator, target = "$eq", condition
+                if operator not in _COMPARISONS:
+                    raise ValueError(f"Unsupported where operator: {operator}")
+
+                compare = _COMPARISONS[operator]
+                column = self._columns.get(key) or [None] * count
+                mask &= np.fromiter((compare(value, target) for value in column), dtype=bool, count=count)
+
+        return mask
+
+    def _select_rows(self, ids: Optional[List[str]], where: Optional[Dict[str, Any]]) -> np.ndarray:
+        mask = np.ones(len(self._ids), dtype=bool)
+        if ids is not None:
+            wanted = np.zeros(len(self._ids), dtype=bool)
+            wanted[[self._rows[id_] for id_ in ids if id_ in self._rows]] = True
+            mask &= wanted
+        if where:
+            mask &= self._match(where)
+        return np.flatnonzero(mask)
+
+    # ---------- writes ----------
+
+    def _write(self, ids, embeddings, documents, metadatas, insert: bool, replace: bool):
+        with self._lock:
+            if embeddings is not None:
+                embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+            for field, values in (("embeddings", embeddings), ("documents", documents), ("metadatas", metadatas)):
+                if values is not None and len(values) != len(ids):
+                    raise ValueError(f"Unequal lengths for fields: ids: {len(ids)}, {field}: {len(values)}")
+            if embeddings is not None and self._matrix is not None and embeddings.shape[1] != self._matrix.shape[1]:
+                raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match collection dimensionality {self._matrix.shape[1]}")
+
+            new_rows, new_positions, updated_rows = [], [], []
+            changed = replaced = False
+            for position, id_ in enumerate(ids):
+                row = self._rows.get(id_)
+                if row is None:
+                    if insert:
+                        new_positions.append(position)
+                    continue
+                if not replace:
+                    continue
+
+                changed = replaced = True
+                if embeddings is not None:
+                    if not self._matrix.flags.writeable:
+                        self._matrix = np.array(self._matrix)
+                    self._matrix[row] = embeddings[position]
+                    updated_rows.append(row)
+                if documents is not None:
+                    self._documents[row] = documents[position]
+                if metadatas is not None and metadatas[position]:
+                    for key, value in metadatas[position].items():
+                        self._set_value(key, row, value)
+
+            if new_positions:
+                if embeddings is None:
+                    raise ValueError("Embeddings are required to add records")
+                changed = True
+                start = len(self._ids)
+                for offset, position in enumerate(new_positions):
+                    self._rows[ids[position]] = start + offset
+                    self._ids.append(ids[position])
+                    self._documents.append(documents[position] if documents is not None else None)
+                    new_rows.append(start + offset)
+
+                for column in self._columns.values():
+                    column.extend([None] * len(new_positions))
+                if metadatas is not None:
+                    for row, position in zip(new_rows, new_positions):
+                        for key, value in (metadatas[position] or {}).items():
+                            self._set_value(key, row, value)
+
+                added = embeddings[new_positions]
+                if self._directory is not None and not updated_rows:
+                    self._append_matrix(start, added)
+                else:
+                    self._matrix = added if self._matrix is None else np.concatenate([self._matrix, added])
+
+            if changed:
+                self._refresh_rows(updated_rows, len(new_rows))
+                if replaced:
+                    self._persist(matrix=bool(updated_rows))
+                else:
+                    self._journal(start)
+
+    def _set_value(self, key: str, row: int, value: Any):
+        column = self._columns.get(key)
+        if column is None:
+            column = self._columns[key] = [None] * len(self._ids)
+        column[row] = value
+
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        """Insert new records; ids that already exist are ignored (as in Chroma)"""
+        self._write(ids, embeddings, documents, metadatas, insert=True, replace=False)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        """Insert new records and update existing ones (metadata keys are merged)"""
+        self._write(ids, embeddings, documents, metadatas, insert=True, replace=True)
+
+    def update(self, ids, embeddings=None, documents=None, metadatas=None):
+        """Update existing records; unknown ids are ignored"""
+        self._write(ids, embeddings, documents, metadatas, insert=False, replace=True)
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None):
+        with self._lock:
+            if ids is None and not where:
+                return
+            doomed = self._select_rows(ids, where)
+            if not len(doomed):
+                return
+
+            keep = np.ones(len(self._ids), dtype=bool)
+            keep[doomed] = False
+            kept_rows = np.flatnonzero(keep)
+
+            self._ids = [self._ids[row] for row in kept_rows]
+            self._rows = {id_: row for row, id_ in enumerate(self._ids)}
+            self._documents = [self._documents[row] for row in kept_rows]
+            self._columns = {
+                key: [column[row] for row in kept_rows]
+                for key, column in self._columns.items()
+            }
+            if not len(kept_rows):
+                self._set_matrix(None)
+            else:
+                # Kept rows keep their norms and codes
+                self._matrix = np.array(self._matrix[kept_rows])
+                self._sq_norms = self._sq_norms[kept_rows]
+                if self._codes is not None:
+                    self._codes, self._code_norms = self._codes[kept_rows], self._code_norms[kept_rows]
+                self._encode([], 0)
+            self._persist()
+
+    # ---------- reads ----------
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def _metadata(self, row: int) -> Optional[Dict[str, Any]]:
+        metadata = {
+            key: column[row]
+            for key, column in self._columns.items()
+            if column[row] is not None
+        }
+        return metadata or None
+
+    def _records(self, rows, include) -> Dict[str, Any]:
+        return {
+            "ids": [self._ids[row] for row in rows],
+            "embeddings": self._matrix[rows] if "embeddings" in include and self._matrix is not None else None,
+            "documents": [self._documents[row] for row in rows] if "documents" in include else None,
+            "metadatas": [self._metadata(row) for row in rows] if "metadatas" in include else None,
+        }
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include=GET_INCLUDE
+    ) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._select_rows(ids, where)
+            rows = rows[offset or 0:]
+            if limit is not None:
+                rows = rows[:limit]
+            return {**self._records(rows, include), "included": list(include)}
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include=QUERY_INCLUDE
+    ) -> Dict[str, Any]:
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+        result = {key: [] for key in ("ids", "embeddings", "documents", "metadatas", "distances")}
+
+        with self._lock:
+            candidates = self._select_rows(None, where) if where else None
+            if self._matrix is None:
+                hits = [(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))] * len(queries)
+            elif self._codes is not None:
+                hits = self._search_compact(queries, n_results, candidates)
+            else:
+                hits = self._search_exact(queries, n_results, candidates)
+
+            for rows, distances in hits:
+                records = self._records(rows, include)
+                for key in ("ids", "embeddings", "documents", "metadatas"):
+                    result[key].append(records[key])
+                result["distances"].append(distances.tolist())
+
+        for key in ("embeddings", "documents", "metadatas", "distances"):
+            if key not in include:
+                result[key] = None
+        result["included"] = list(include)
+        return result
+
+    def _search_exact(self, queries: np.ndarray, n_results: int, candidates: Optional[np.ndarray]):
+        """[(rows, distances)] per query from the float32 matrix"""
+        # All queries in one matrix product: (rows, dim) @ (dim, queries)
+        if candidates is None:
+            all_scores = self._matrix @ queries.T
+            norms = self._sq_norms
+        else:
+            all_scores = self._matrix[candidates] @ queries.T
+            norms = self._sq_norms[candidates]
+
+        hits = []
+        for column, query in enumerate(queries):
+            # Squared L2: |q|^2 + |x|^2 - 2 q.x
+            all_distances = np.maximum(norms + float(query @ query) - 2.0 * all_scores[:, column], 0.0)
+            top = _top_k(all_distances, n_results)
+            hits.append((top if candidates is None else candidates[top], all_distances[top]))
+        return hits
+
+    def _search_compact(self, queries: np.ndarray, n_results: int, candidates: Optional[np.ndarray]):
+        """[(rows, distances)] per query from the compact codes, re-ranked in float32 if enabled"""
+        codes, code_norms = self._codes, self._code_norms
+        if candidates is not None:
+            codes, code_norms = codes[candidates], code_norms[candidates]
+        approx = self._codec.distances(codes, code_norms, queries)
+
+        rerank = self._compact['rerank']
+        hits = []
+        for column, query in enumerate(queries):
+            top = _top_k(approx[:, column], n_results * rerank if rerank > 0 else n_results)
+            rows = top if candidates is None else candidates[top]
+            if rerank <= 0 or not len(rows):
+                hits.append((rows, approx[top, column]))
+                continue
+            # Sorted rows read the memory-mapped matrix front to back
+            rows = np.sort(rows)
+            exact = np.maximum(self._sq_norms[rows] + float(query @ query) - 2.0 * (self._matrix[rows] @ query), 0.0)
+            best = _top_k(exact, n_results)
+            hits.append((rows[best], exact[best]))
+        return hits
+
+    def compact_stats(self) -> Optional[Dict[str, Any]]:
+        """Compact storage mode and memory (None when the collection stores float32 only)"""
+        if not self._compact:
+            return None
+        with self._lock:
+            return {
+                'mode': self._compact['mode'],
+                'active': self._codes is not None,
+                'dims': int(self._codes.shape[1]) if self._codes is not None else None,
+                'rerank': self._compact['rerank'],
+                'fitted_rows': self._codec.fitted_rows if self._codec else 0,
+                'compact_bytes': self._codec.nbytes(self._codes) if self._codec else 0,
+                'float32_bytes': int(self._matrix.nbytes) if self._matrix is not None else 0,
+                'float32_memory_mapped': isinstance(self._matrix, np.memmap)
+            }
+
+class NumpyVectorClient:
+    """Chroma-like client managing NumpyCollections under one directory"""
+
+    def __init__(self, persist_directory: Optional[str] = None, compact: Optional[Dict[str, Any]] = None):
+        self.directory = Path(persist_directory) / "numpy_index" if persist_directory else None
+        # Compact storage options (rag/vector_codec.py), applied to compact['collections'].
+        # Only with a directory: the codes save RAM because the float32 matrix is memory-mapped,
+        # in memory they would be held on top of it
+        if compact and self.directory is None:
+            logger.warning("⚠️ Compact vector storage needs a persist directory, storing float32 only")
+            compact = None
+        self.compact = compact
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._collections: Dict[str, NumpyCollection] = {}
+        self._lock = threading.Lock()
+
+    def _compact_for(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.compact if self.compact and name in self.compact['collections'] else None
+
+    def _exists_on_disk(self, name: str) -> bool:
+        return self.directory is not None and (self.directory / f"{name}.meta.json").exists()
+
+    def get_collection(self, name: str) -> NumpyCollection:
+        with self._lock:
+            if name not in self._collections:
+                if not self._exists_on_disk(name):
+                    raise ValueError(f"Collection {name} does not exist")
+                self._collections[name] = NumpyCollection(name, self.directory, compact=self._compact_for(name))
+            return self._collections[name]
+
+    def create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyCollection:
+        with self._lock:
+            if name in self._collections or self._exists_on_disk(name):
+                raise ValueError(f"Collection {name} already exists")
+            collection = NumpyCollection(name, self.directory, metadata, compact=self._compact_for(name))
+            collection._persist()
+            self._collections[name] = collection
+            return collection
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None) -> NumpyCollection:
+        try:
+            return self.get_collection(name)
+        except ValueError:
+            return self.create_collection(name, metadata)
+
+    def delete_collection(self, name: str):
+        with self._lock:
+            collection = self._collections.pop(name, None) or (
+                NumpyCollection(name, self.directory) if self._exists_on_disk(name) else None
+            )
+            if collection is None:
+                raise ValueError(f"Collection {name} does not exist")
+            if self.directory is not None:
+                collection._meta_path.unlink(missing_ok=True)
+                for path in (
+                    collection._snapshot_path(collection._generation),
+                    collection._journal_path(collection._generation),
+                    collection._matrix_path(collection._matrix_generation)
+                ):
+                    path.unlink(missing_ok=True)
+
+    def list_collections(self) -> List[NumpyCollection]:
+        names = set(self._collections)
+        if self.directory is not None:
+            names.update(path.name[:-len(".meta.json")] for path in self.directory.glob("*.meta.json"))
+        return [self.get_collection(name) for name in sorted(names)]
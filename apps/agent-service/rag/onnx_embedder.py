@@ -0,0 +1,90 @@
+# rag/onnx_embedder.py
+import os
+import logging
+from pathlib import Path
+from typing import List, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+    logger.warning("⚠️ onnxruntime/tokenizers not installed (EMBEDDING_BACKEND=onnx unavailable)")
+
+# Preferred model files inside EMBEDDING_ONNX_DIR (see export_onnx_model.py)
+MODEL_FILES = ("model_quantized.onnx", "model.onnx")
+
+class OnnxEmbedder:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime (CPU, no torch)
+
+    Tokenization uses the HuggingFace `tokenizers` library; mean pooling and
+    L2 normalization are done in NumPy, matching the sentence-transformers
+    pipeline (Transformer -> Pooling(mean) -> Normalize).
+    """
+
+    def __init__(self, model_dir: str, max_length: int = 256, batch_size: int = 32):
+        model_dir = Path(model_dir)
+        model_path = next((model_dir / name for name in MODEL_FILES if (model_dir / name).exists()), None)
+        if model_path is None:
+            raise FileNotFoundError(f"No ONNX model ({' or '.join(MODEL_FILES)}) in {model_dir}")
+
+        self.model_path = model_path
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        threads = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        logger.info(f"✅ ONNX embedding model loaded: {model_path}")
+
+    def _encode_chunk(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feed = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self.input_names:
+            feed['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feed)[0]
+
+        # Mean pooling over real (non-padding) tokens
+        mask = attention_mask[:, :, None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+    def encode(self, texts: Union[str, List[str]]) -> np.ndarray:
+        """Same contract as SentenceTransformer.encode: 1-D for a string, 2-D for a list"""
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if not batch:
+            return np.zeros((0, 384), dtype=np.float32)
+
+        # Sort by length so each chunk pads to similar-sized inputs
+        order = sorted(range(len(batch)), key=lambda i: len(batch[i]))
+        output = None
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            vectors = self._encode_chunk([batch[i] for i in indices])
+            if output is None:
+                output = np.empty((len(batch), vectors.shape[1]), dtype=np.float32)
+            output[indices] = vectors
+
+        return output[0] if single else output
@@ -0,0 +1,68 @@
+# rag/pdf_extract.py
+"""
+PDF text extraction helpers that run in worker processes
+
+Kept free of service imports (vector store, embeddings) so spawned workers start fast.
+"""
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+def clean_page_text(text: str) -> str:
+    """Remove null bytes and normalize whitespace"""
+    return ' '.join(text.replace('\x00', '').split())
+
+def count_pdf_pages(filepath: str) -> int:
+    import PyPDF2
+    with open(filepath, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def extract_pdf_pages(filepath: str, start: int, end: int) -> List[str]:
+    """Cleaned text of pages [start, end); empty pages are dropped"""
+    import PyPDF2
+    pages = []
+    with open(filepath, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page_num in range(start, end):
+            text = clean_page_text(reader.pages[page_num].extract_text() or "")
+            if text:
+                pages.append(text)
+    return pages
+
+def create_extraction_pool() -> Optional[Executor]:
+    """Process pool for extraction, or None to extract in-process (POLICY_EXTRACT_WORKERS=0)"""
+    workers = int(os.getenv("POLICY_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+    if workers <= 1:
+        return None
+    # spawn: the service process has threads (uvicorn, model loader), which fork doesn't copy safely
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def iter_pdf_pages(filepath: str, pool: Optional[Executor] = None, pages_per_task: int = 8, prefetch: int = 4) -> Iterator[str]:
+    """
+    Yield cleaned page text in order
+
+    With a pool, page ranges are extracted in worker processes with at most `prefetch`
+    ranges in flight, so only a few pages are held in memory at a time.
+    """
+    num_pages = count_pdf_pages(filepath)
+    ranges = iter([(start, min(start + pages_per_task, num_pages)) for start in range(0, num_pages, pages_per_task)])
+
+    if pool is None:
+        for start, end in ranges:
+            yield from extract_pdf_pages(filepath, start, end)
+        return
+
+    pending = deque()
+    for start, end in ranges:
+        pending.append(pool.submit(extract_pdf_pages, filepath, start, end))
+        if len(pending) >= prefetch:
+            break
+
+    while pending:
+        pages = pending.popleft().result()
+        next_range = next(ranges, None)
+        if next_range:
+            pending.append(pool.submit(extract_pdf_pages, filepath, *next_range))
+        yield from pages
@@ -0,0 +1,173 @@
+import os
+import time
+import hashlib
+import logging
+from typing import Dict, Any, List, Optional
+
+from rag.embeddings import embedding_service
+from rag.vector_store import vector_store
+from utils.location import location_key
+
+logger = logging.getLogger(__name__)
+
+# Tavily result categories kept in the index
+CATEGORIES = ('pois', 'restaurants', 'events')
+
+class POIIndex:
+    """Per-city index of POIs, restaurants and events accumulated from Tavily results"""
+
+    def __init__(self):
+        self.collection_name = "city_pois"
+        self.max_age_seconds = float(os.getenv("POI_INDEX_MAX_AGE_DAYS", "14")) * 86400
+        self.min_pois = int(os.getenv("POI_INDEX_MIN_POIS", "8"))
+        self.min_restaurants = int(os.getenv("POI_INDEX_MIN_RESTAURANTS", "5"))
+        self.batch_size = int(os.getenv("POI_INDEX_BATCH_SIZE", "64"))
+
+        # city key -> {'updated_at': float, 'counts': {category: int}}
+        self._cities: Dict[str, Dict[str, Any]] = {}
+
+    def _item_id(self, city: str, category: str, item: Dict[str, Any]) -> str:
+        """Stable id from the result URL (or name when there is no URL)"""
+        identity = item.get('source') or item.get('name', '').strip().lower()
+        return hashlib.sha1(f"{city}|{category}|{identity}".encode()).hexdigest()[:24]
+
+    def upsert(self, location: str, tavily_data: Dict[str, Any], check_in: Optional[str] = None) -> int:
+        """
+        Add or refresh Tavily results for a city
+
+        Items without a source URL (static fallback data) are ignored.
+        Events are tagged with the check-in month so they are only reused for that month.
+        """
+        collection = vector_store.get_or_create_collection(self.collection_name)
+        if not collection:
+            return 0
+
+        city = location_key(location)
+        month = str(check_in)[:7] if check_in else ""
+        now = time.time()
+
+        ids, documents, metadatas = [], [], []
+        seen = set()
+        for category in CATEGORIES:
+            for item in tavily_data.get(category) or []:
+                if not item.get('source') or not item.get('name'):
+                    continue
+                item_id = self._item_id(city, category, item)
+                if item_id in seen:
+                    continue
+                seen.add(item_id)
+
+                ids.append(item_id)
+                documents.append(f"{item['name']}. {item.get('description', '')}")
+                metadatas.append({
+                    'city': city,
+                    'location': location,
+                    'category': category,
+                    'name': item['name'],
+                    'source': item['source'],
+                    'month': month if category == 'events' else "",
+                    'updated_at': now
+                })
+
+        if not ids:
+            return 0
+
+        try:
+            for start in range(0, len(ids), self.batch_size):
+                end = start + self.batch_size
+                embeddings = embedding_service.encode_batch(documents[start:end])
+                collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=embeddings,
+                    documents=documents[start:end],
+                    metadatas=metadatas[start:end]
+                )
+        except Exception as e:
+            logger.error(f"❌ POI index upsert error for {location}: {e}")
+            return 0
+
+        # Counts are refreshed from the collection on the next freshness check
+        self._cities.pop(city, None)
+        logger.info(f"✅ POI index: upserted {len(ids)} items for {location}")
+        return len(ids)
+
+    def _city_state(self, city: str) -> Dict[str, Any]:
+        """Newest update time and per-category counts for a city (cached)"""
+        if city in self._cities:
+            return self._cities[city]
+
+        state = {'updated_at': 0.0, 'counts': {category: 0 for category in CATEGORIES}}
+        collection = vector_store.get_or_create_collection(self.collection_name)
+        if collection:
+            try:
+                results = collection.get(where={"city": city}, include=["metadatas"])
+                for metadata in results.get('metadatas') or []:
+                    state['counts'][metadata.get('category', 'pois')] += 1
+                    state['updated_at'] = max(state['updated_at'], float(metadata.get('updated_at', 0)))
+            except Exception as e:
+                logger.error(f"❌ POI index stats error for {city}: {e}")
+
+        self._cities[city] = state
+        return state
+
+    def is_fresh(self, location: str) -> bool:
+        """True when the city has enough recent POIs and restaurants to skip the web search"""
+        state = self._city_state(location_key(location))
+        return (
+            time.time() - state['updated_at'] <= self.max_age_seconds
+            and state['counts']['pois'] >= self.min_pois
+            and state['counts']['restaurants'] >= self.min_restaurants
+        )
+
+    def search(
+        self,
+        location: str,
+        interests: Optional[List[str]] = None,
+        dietary: Optional[List[str]] = None,
+        check_in: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Serve POIs, restaurants and events for a city, ranked by similarity to the traveler"""
+        collection = vector_store.get_or_create_collection(self.collection_name)
+        city = location_key(location)
+        month = str(check_in)[:7] if check_in else ""
+
+        interests_str = ", ".join(interests) if interests else "popular attractions"
+        dietary_str = " ".join(dietary) if dietary else "popular"
+        queries = {
+            'pois': (f"Things to do in {location} for {interests_str}", 10, {"category": "pois"}),
+            'restaurants': (f"{dietary_str} restaurants in {location}", 8, {"category": "restaurants"}),
+            'events': (f"Events in {location} for {interests_str}", 5, {"$and": [{"category": "events"}, {"month": month}]})
+        }
+
+        data = {'pois': [], 'restaurants': [], 'events': [], 'weather': None}
+        if not collection:
+            return data
+
+        embeddings = embedding_service.encode_batch([query for query, _, _ in queries.values()])
+
+        for (category, (_, limit, where)), embedding in zip(queries.items(), embeddings):
+            try:
+                results = collection.query(
+                    query_embeddings=embedding[None, :],
+                    n_results=limit,
+                    where={"$and": [{"city": city}, where]}
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ POI index query failed ({category}, {location}): {e}")
+                continue
+
+            if not results.get('metadatas') or not results['metadatas'][0]:
+                continue
+            for metadata, document, distance in zip(results['metadatas'][0], results['documents'][0], results['distances'][0]):
+                data[category].append({
+                    'name': metadata.get('name', ''),
+                    'description': document[len(metadata.get('name', '')) + 2:],
+                    'source': metadata.get('source', ''),
+                    'distance': distance
+                })
+
+        logger.info(f"📚 POI index: {len(data['pois'])} POIs, {len(data['restaurants'])} restaurants for {location}")
+        return data
+
+# Global instance
+poi_index = POIIndex()
@@ -0,0 +1,80 @@
+# rag/policy_cache.py
+import os
+import copy
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class PolicySearchCache:
+    """
+    In-process LRU of policy search results, keyed by normalized query, n_results and
+    policy types, and tagged with the policy corpus revision
+
+    Ingestion changes the revision, so results from an older corpus are never served;
+    the first lookup under a new revision drops them all.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("POLICY_CACHE", "true").lower() == "true"
+        self.max_entries = int(os.getenv("POLICY_CACHE_SIZE", "512"))
+
+        self._memory: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.revision: Optional[str] = None
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'evictions': 0}
+
+    def key(self, query: str, n_results: int, policy_types: Optional[List[str]] = None) -> str:
+        """Case and whitespace don't change search results, so they don't change the key"""
+        normalized = " ".join(query.lower().split())
+        return f"{n_results}|{','.join(sorted(policy_types or []))}|{normalized}"
+
+    def _use_revision(self, revision: str):
+        if revision != self.revision:
+            if self._memory:
+                logger.info(f"🔄 Policy corpus revision {revision}, dropping {len(self._memory)} cached searches")
+                self.stats['invalidations'] += 1
+            self._memory.clear()
+            self.revision = revision
+
+    def get(self, revision: str, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached results (a copy callers may modify) or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._use_revision(revision)
+            results = self._memory.get(key)
+            if results is None:
+                self.stats['misses'] += 1
+                return None
+            self._memory.move_to_end(key)
+            self.stats['hits'] += 1
+        return copy.deepcopy(results)
+
+    def put(self, revision: str, key: str, results: List[Dict[str, Any]]):
+        if not self.enabled:
+            return
+        results = copy.deepcopy(results)
+        with self._lock:
+            self._use_revision(revision)
+            self._memory[key] = results
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'enabled': self.enabled,
+            'revision': self.revision,
+            'entries': len(self._memory),
+            'max_entries': self.max_entries,
+            'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0
+        }
+
+# Global instance
+policy_search_cache = PolicySearchCache()
@@ -1,18 +1,77 @@
 import os
+import re
+import json
+import time
+import hashlib
 import logging
-from typing import List, Dict
+import threading
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
+from concurrent.futures import Executor, ThreadPoolExecutor, BrokenExecutor
+import numpy as np
+from rag.pdf_extract import iter_pdf_pages, create_extraction_pool
+from rag.chunking import TokenChunker, model_tokenizer
+from rag.bm25_index import BM25Index
 from rag.vector_store import vector_store
 from rag.embeddings import embedding_service
+from rag.policy_cache import policy_search_cache
 
 logger = logging.getLogger(__name__)
 
+MANIFEST_VERSION = 1
+
+# Question keywords -> policy document (word-prefix matches, so "cancel" also covers "cancellation").
+# Chat's policy intent fires on any of these or on GENERAL_POLICY_KEYWORDS.
+POLICY_TYPE_KEYWORDS = {
+    "Cancellation Policy": ['cancel', 'refund', 'reschedul', 'no-show', 'no show', 'modify', 'change booking'],
+    "Payment Policy": ['payment', 'pay', 'charge', 'fee', 'refund', 'card', 'deposit', 'tax', 'currency',
+                       'invoice', 'receipt', 'payout', 'price', 'cost'],
+    "Privacy Policy": ['privacy', 'personal data', 'my data', 'data', 'personal information', 'cookie',
+                       'gdpr', 'delete my account', 'password', 'hacked', 'third part', 'tracking'],
+}
+
+# Policy questions that don't point at one document
+GENERAL_POLICY_KEYWORDS = ['policy', 'policies', 'rules', 'house rules', 'guest rules', 'terms', 'conditions']
+
+def _mentions(message_lower: str, keywords: Iterable[str]) -> bool:
+    return any(re.search(r"\b" + re.escape(keyword), message_lower) for keyword in keywords)
+
 class PolicyLoader:
     """Load and index policy documents (Markdown, Text, and PDF)"""
     
     def __init__(self):
         self.policies_dir = Path(__file__).parent.parent / "policies"
         self.collection_name = "airbnb_policies"
+        
+        # "tokens": sentence packing by model tokens (rag/chunking.py); "chars": legacy chunk_text
+        self.chunker_kind = os.getenv("POLICY_CHUNKER", "tokens").lower()
+        self.chunk_tokens = int(os.getenv("POLICY_CHUNK_TOKENS", "128"))
+        self.chunk_overlap_tokens = int(os.getenv("POLICY_CHUNK_OVERLAP_TOKENS", "16"))
+        self._token_chunker = None
+        
+        # File and chunk hashes from the last ingestion, kept next to the vector store
+        self.manifest_path = Path(os.getenv(
+            "POLICY_MANIFEST_PATH",
+            os.path.join(os.getenv("CHROMA_PERSIST_DIR", "./chroma_db"), "policy_manifest.json")
+        ))
+        
+        # Hybrid search: BM25 keyword index fused with vector similarity by reciprocal rank
+        self.hybrid_search = os.getenv("POLICY_HYBRID_SEARCH", "true").lower() == "true"
+        self.rrf_k = int(os.getenv("POLICY_RRF_K", "60"))
+        # Answer from BM25 alone (no query embedding) when the top hit matches every
+        # query term and clearly beats the runner-up
+        self.keyword_fast_path = os.getenv("POLICY_KEYWORD_FAST_PATH", "true").lower() == "true"
+        self.fast_path_coverage = float(os.getenv("POLICY_FAST_PATH_COVERAGE", "1.0"))
+        self.fast_path_margin = float(os.getenv("POLICY_FAST_PATH_MARGIN", "1.5"))
+        # Filtered searches whose best hit is farther than this (squared L2) retry unfiltered
+        self.filter_max_distance = float(os.getenv("POLICY_FILTER_MAX_DISTANCE", "1.2"))
+        self.keyword_index_path = self.manifest_path.with_name("policy_bm25.npz")
+        self._keyword_index: Optional[BM25Index] = None
+        self._keyword_lock = threading.Lock()
+        
+        # Corpus revision from the manifest, re-read when the file changes (e.g. another worker ingested)
+        self._revision = ""
+        self._revision_mtime: Optional[int] = None
     
     def chunk_text(self, text: str, chunk_size: int = 500, overlap: int = 50) -> List[str]:
         """Split text into overlapping chunks"""
@@ -35,29 +94,42 @@ class PolicyLoader:
         
         return chunks
     
-    def extract_text_from_pdf(self, filepath: Path) -> str:
-        """Extract text from PDF file"""
-        try:
-            import PyPDF2
+    def chunk_stream(self, pieces: Iterable[str], chunk_size: int = 500, overlap: int = 50, separator: str = " ") -> Iterator[str]:
+        """
+        chunk_text over text that arrives in pieces (e.g. PDF pages)
+        
+        Yields the same chunks as chunk_text(separator.join(pieces)) while buffering
+        only about one chunk plus one piece of text.
+        """
+        buffer = None
+        start = 0
+        for piece in pieces:
+            buffer = piece if buffer is None else buffer + separator + piece
             
-            text = ""
-            with open(filepath, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                num_pages = len(pdf_reader.pages)
+            # Every window that ends before the buffered text does is final
+            while start + chunk_size < len(buffer):
+                end = start + chunk_size
+                chunk = buffer[start:end]
                 
-                logger.info(f"  📄 Extracting text from PDF: {num_pages} pages")
+                # Try to break at sentence boundary
+                last_period = chunk.rfind('.')
+                if last_period > chunk_size * 0.7:  # At least 70% through
+                    end = start + last_period + 1
+                    chunk = buffer[start:end]
                 
-                for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    text += page_text + "\n\n"
-            
-            # Clean up the text
-            text = text.replace('\x00', '')  # Remove null bytes
-            text = ' '.join(text.split())  # Normalize whitespace
-            
-            return text
+                yield chunk.strip()
+                start = end - overlap
             
+            buffer = buffer[start:]
+            start = 0
+        
+        if buffer:
+            yield from self.chunk_text(buffer, chunk_size, overlap)
+    
+    def extract_text_from_pdf(self, filepath: Path) -> str:
+        """Extract text from PDF file"""
+        try:
+            return ' '.join(iter_pdf_pages(str(filepath)))
         except ImportError:
             logger.error("❌ PyPDF2 not installed. Install with: pip install PyPDF2")
             return ""
@@ -65,6 +137,15 @@ class PolicyLoader:
             logger.error(f"❌ Error extracting PDF {filepath}: {e}")
             return ""
     
+    def iter_policy_text(self, filepath: Path, pool: Optional[Executor] = None) -> Iterator[str]:
+        """Stream a policy file's text: page by page for PDFs, whole file for .md/.txt"""
+        if filepath.suffix.lower() == '.pdf':
+            yield from iter_pdf_pages(str(filepath), pool)
+        else:
+            # Regular text files (.md, .txt)
+            with open(filepath, 'r', encoding='utf-8') as f:
+                yield f.read()
+    
     def load_policy_file(self, filepath: Path) -> Dict:
         """Load a single policy file (supports .md, .txt, .pdf)"""
         try:
@@ -95,99 +176,503 @@ class PolicyLoader:
             logger.error(f"❌ Error loading {filepath}: {e}")
             return None
     
-    def ingest_policies(self):
-        """Load all policy documents into vector store"""
+    def _policy_files(self) -> List[Path]:
+        # Support multiple file types
+        return list(self.policies_dir.glob("*.md")) + \
+               list(self.policies_dir.glob("*.txt")) + \
+               list(self.policies_dir.glob("*.pdf"))
+    
+    def _load_manifest(self) -> Dict:
+        """Previous ingestion state; empty if missing or built with other settings"""
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        
+        if manifest.get('version') != MANIFEST_VERSION or manifest.get('settings') != self._settings():
+            logger.info("🔄 Policy manifest built with different settings, re-ingesting everything")
+            return {}
+        return manifest
+    
+    def _save_manifest(self, files: Dict) -> str:
+        revision = self._corpus_hash(files)
+        manifest = {'version': MANIFEST_VERSION, 'settings': self._settings(), 'revision': revision, 'files': files}
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        self._revision, self._revision_mtime = revision, self.manifest_path.stat().st_mtime_ns
+        return revision
+    
+    def _corpus_hash(self, files: Dict) -> str:
+        """Changes whenever a chunk, its position or the chunking/embedding settings change"""
+        state = json.dumps({'settings': self._settings(), 'files': files}, sort_keys=True)
+        return hashlib.sha1(state.encode()).hexdigest()[:16]
+    
+    def corpus_revision(self) -> str:
+        """Revision of the ingested policy corpus ("" before the first ingestion)"""
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return ""
+        if mtime != self._revision_mtime:
+            # Only the recorded revision: this runs before every policy search and must not wait for the model
+            try:
+                with open(self.manifest_path) as f:
+                    manifest = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                manifest = {}
+            # Manifests written before revisions were recorded
+            self._revision = manifest.get('revision') or (self._corpus_hash(manifest['files']) if manifest.get('files') else "")
+            self._revision_mtime = mtime
+        return self._revision
+    
+    @property
+    def chunker(self) -> str:
+        """Configured chunking settings as recorded in the manifest (known without loading the model)"""
+        if self.chunker_kind == "chars":
+            return "chars-500-50"
+        # The tokenizer is the embedding model's
+        return f"tokens-{self.chunk_tokens}-{self.chunk_overlap_tokens}-{embedding_service.model_name}"
+    
+    def _approximated(self, entry: Dict) -> bool:
+        """Chunked with approximate tokens while the model tokenizer is now available (checked without waiting)"""
+        if self.chunker_kind == "chars" or '-approx-' not in entry.get('chunker', ''):
+            return False
+        return embedding_service.is_ready() and self.get_token_chunker().tokenizer is not None
+    
+    def get_token_chunker(self) -> TokenChunker:
+        """Token chunker using the embedding model's tokenizer (waits for the model to load)"""
+        # Without the model, tokens are approximated; retry the real tokenizer unless the model failed to load
+        cached = self._token_chunker
+        if cached is not None and (cached.tokenizer is not None or embedding_service.status() == "unavailable"):
+            return cached
+        
+        tokenizer = model_tokenizer(embedding_service.model)
+        chunker = TokenChunker(tokenizer, max_tokens=self.chunk_tokens, overlap_tokens=self.chunk_overlap_tokens)
+        if cached is None or cached.name != chunker.name:
+            logger.info(f"✂️ Policy chunker: {chunker.name}")
+        self._token_chunker = chunker
+        return chunker
+    
+    def _iter_chunks(self, filepath: Path, pool: Optional[Executor]) -> Iterator[Tuple[str, Dict]]:
+        """(chunk text, offset metadata) for a file"""
+        pieces = self.iter_policy_text(filepath, pool)
+        if self.chunker_kind == "chars":
+            for chunk in self.chunk_stream(pieces):
+                yield chunk, {}
+            return
+        
+        for chunk in self.get_token_chunker().chunk_stream(pieces):
+            yield chunk['text'], {'char_start': chunk['start'], 'char_end': chunk['end'], 'token_count': chunk['tokens']}
+    
+    def _settings(self) -> Dict:
+        """Anything that changes chunk text or vectors invalidates the manifest"""
+        return {'chunker': self.chunker, 'embedding_model': embedding_service.cache.model_name}
+    
+    def _chunk_file(self, filepath: Path, pool: Optional[Executor] = None) -> Dict[str, Dict]:
+        """Chunk id -> {'text', 'hash', 'metadata'}; ids are content-addressed so edits only touch changed chunks"""
+        base_metadata = {
+            # Extract metadata from filename
+            'policy_type': filepath.stem.replace('_', ' ').title(),
+            'filename': filepath.name,
+            'file_type': filepath.suffix.lower(),
+            'source': 'policy_document'
+        }
+        
+        chunks = {}
+        for i, (chunk, offsets) in enumerate(self._iter_chunks(filepath, pool)):
+            # Skip empty chunks
+            if not chunk or len(chunk.strip()) < 10:
+                continue
+            
+            chunk_hash = hashlib.sha256(chunk.encode('utf-8')).hexdigest()
+            chunk_id = f"{filepath.name}_{chunk_hash[:16]}"
+            if chunk_id in chunks:  # identical repeated text in one file
+                continue
+            
+            chunks[chunk_id] = {
+                'text': chunk,
+                'hash': chunk_hash,
+                'metadata': {**base_metadata, **offsets, 'chunk_index': i}
+            }
+        return chunks
+    
+    @staticmethod
+    def _unembedded(entry: Dict) -> bool:
+        return any(chunk.get('unembedded') for chunk in entry['chunks'].values())
+    
+    @staticmethod
+    def _position(record: Dict) -> Dict:
+        """Where a chunk sits in its file (changes here need a metadata update, not re-embedding)"""
+        return {key: record.get(key) for key in ('chunk_index', 'char_start', 'char_end')}
+    
+    def _process_file(self, filepath: Path, pool: Optional[Executor]) -> Tuple[Optional[Dict[str, Dict]], float]:
+        """Extract and chunk one file; (None, seconds) if it could not be read"""
+        logger.info(f"📄 Processing: {filepath.name}")
+        started = time.perf_counter()
+        try:
+            try:
+                chunks = self._chunk_file(filepath, pool)
+            except BrokenExecutor as e:
+                logger.warning(f"⚠️ Extraction pool failed ({e}), extracting {filepath.name} in-process")
+                chunks = self._chunk_file(filepath, None)
+        except Exception as e:
+            logger.error(f"❌ Error loading {filepath}: {e}")
+            chunks = None
+        return chunks, time.perf_counter() - started
+    
+    def ingest_policies(self, force: bool = False) -> Dict:
+        """
+        Sync policy documents into the vector store
+        
+        Files whose content hash matches the manifest are skipped without being read
+        as documents; for changed files only new chunks are embedded, and chunks that
+        disappeared are deleted. Returns a summary of what changed.
+        """
         logger.info("📚 Starting policy ingestion...")
+        summary = {
+            'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'unembedded': 0,
+            'files_added': [], 'files_changed': [], 'files_removed': [], 'files_unchanged': [],
+            'timings': {}
+        }
         
         if not self.policies_dir.exists():
             logger.warning(f"⚠️ Policies directory not found: {self.policies_dir}")
             logger.info(f"💡 Creating directory: {self.policies_dir}")
             self.policies_dir.mkdir(parents=True, exist_ok=True)
-            return
+            return summary
+        
+        collection = vector_store.get_or_create_collection(self.collection_name)
+        if collection is None:
+            raise RuntimeError("Vector store not available")
         
-        all_chunks = []
-        all_metadatas = []
-        all_ids = []
+        manifest = {} if force else self._load_manifest()
+        previous = manifest.get('files', {})
         
-        # Support multiple file types
-        policy_files = list(self.policies_dir.glob("*.md")) + \
-                      list(self.policies_dir.glob("*.txt")) + \
-                      list(self.policies_dir.glob("*.pdf"))
+        # A manifest that doesn't describe the collection (wiped store, legacy ids) means a full rebuild
+        expected = sum(len(entry['chunks']) for entry in previous.values())
+        if not previous or collection.count() != expected:
+            previous = {}
+            try:
+                if collection.count() > 0:
+                    logger.info(f"🗑️  Clearing {collection.count()} existing policy chunks...")
+                    collection.delete(where={"source": "policy_document"})
+            except Exception as e:
+                logger.warning(f"⚠️ Could not clear existing policies: {e}")
         
-        if not policy_files:
+        policy_files = self._policy_files()
+        if not policy_files and not previous:
             logger.warning("⚠️ No policy files found in policies directory")
             logger.info("💡 Supported formats: .md, .txt, .pdf")
-            return
+            return summary
         
         logger.info(f"📂 Found {len(policy_files)} policy file(s)")
         
+        files = {}
+        new_ids, new_texts, new_metadatas = [], [], []
+        moved_ids, moved_metadatas = [], []
+        stale_ids = []
+        
+        to_process = []
         for policy_file in policy_files:
-            logger.info(f"📄 Processing: {policy_file.name}")
+            file_hash = hashlib.sha256(policy_file.read_bytes()).hexdigest()
+            old_entry = previous.get(policy_file.name)
             
-            policy_data = self.load_policy_file(policy_file)
-            if not policy_data:
+            # Files with chunks stored while the embedding model was unavailable are embedded again,
+            # and re-chunked once the model tokenizer replaces approximate tokens
+            if old_entry and old_entry['hash'] == file_hash and not self._unembedded(old_entry) \
+                    and not self._approximated(old_entry):
+                files[policy_file.name] = old_entry
+                summary['unchanged'] += len(old_entry['chunks'])
+                summary['files_unchanged'].append(policy_file.name)
+            else:
+                to_process.append((policy_file, file_hash, old_entry))
+        
+        # Files are extracted concurrently; PDF page ranges go to a shared process pool
+        results = []
+        if to_process:
+            if self.chunker_kind != "chars":
+                self.get_token_chunker()
+            pool = create_extraction_pool() if any(f.suffix.lower() == '.pdf' for f, _, _ in to_process) else None
+            try:
+                with ThreadPoolExecutor(max_workers=len(to_process)) as threads:
+                    results = list(threads.map(lambda item: self._process_file(item[0], pool), to_process))
+            finally:
+                if pool:
+                    pool.shutdown()
+        
+        for (policy_file, file_hash, old_entry), (chunks, seconds) in zip(to_process, results):
+            summary['timings'][policy_file.name] = round(seconds, 3)
+            if chunks is None:
+                # Keep what was indexed before rather than dropping the file
+                if old_entry:
+                    files[policy_file.name] = old_entry
                 continue
-            
-            # Chunk the policy text
-            chunks = self.chunk_text(policy_data['content'])
-            
             if not chunks:
                 logger.warning(f"  ⚠️ No chunks created from {policy_file.name}")
-                continue
             
-            for i, chunk in enumerate(chunks):
-                # Skip empty chunks
-                if not chunk or len(chunk.strip()) < 10:
-                    continue
-                    
-                chunk_id = f"{policy_data['filename']}_{i}"
-                
-                all_chunks.append(chunk)
-                all_metadatas.append({
-                    'policy_type': policy_data['policy_type'],
-                    'filename': policy_data['filename'],
-                    'file_type': policy_data['file_type'],
-                    'chunk_index': i,
-                    'source': 'policy_document'
-                })
-                all_ids.append(chunk_id)
+            old_chunks = old_entry['chunks'] if old_entry else {}
+            kept = 0
+            for chunk_id, chunk in chunks.items():
+                if chunk_id not in old_chunks or old_chunks[chunk_id].get('unembedded'):
+                    new_ids.append(chunk_id)
+                    new_texts.append(chunk['text'])
+                    new_metadatas.append(chunk['metadata'])
+                elif self._position(old_chunks[chunk_id]) != self._position(chunk['metadata']):
+                    # Same text at a different position: metadata only, no re-embedding
+                    moved_ids.append(chunk_id)
+                    moved_metadatas.append(chunk['metadata'])
+                else:
+                    kept += 1
+            stale_ids.extend(chunk_id for chunk_id in old_chunks if chunk_id not in chunks)
             
-            logger.info(f"  ✅ Created {len(chunks)} chunks from {policy_file.name}")
+            files[policy_file.name] = {
+                'hash': file_hash,
+                # Actual chunker, e.g. whether tokens were approximated (not part of the settings)
+                'chunker': self.chunker if self.chunker_kind == "chars" else self.get_token_chunker().name,
+                'chunks': {
+                    chunk_id: {'hash': chunk['hash'], **self._position(chunk['metadata'])}
+                    for chunk_id, chunk in chunks.items()
+                }
+            }
+            summary['files_changed' if old_entry else 'files_added'].append(policy_file.name)
+            summary['unchanged'] += kept
+            logger.info(f"  ✅ Created {len(chunks)} chunks from {policy_file.name} in {seconds:.2f}s")
         
-        if not all_chunks:
-            logger.warning("⚠️ No policy chunks to ingest")
-            return
+        for filename, old_entry in previous.items():
+            if filename not in files:
+                stale_ids.extend(old_entry['chunks'])
+                summary['files_removed'].append(filename)
         
-        # Generate embeddings
-        logger.info(f"🔢 Generating embeddings for {len(all_chunks)} chunks...")
-        embeddings = embedding_service.encode_batch(all_chunks)
+        # Apply the diff
+        if new_ids:
+            logger.info(f"🔢 Generating embeddings for {len(new_ids)} new chunks...")
+            embeddings = embedding_service.encode_batch(new_texts)
+            logger.info("💾 Storing in vector database...")
+            collection.upsert(ids=new_ids, embeddings=embeddings, documents=new_texts, metadatas=new_metadatas)
+            
+            # Zero vectors mean no model (or an encoding error): flag them so the next run re-embeds
+            unembedded = {chunk_id for chunk_id, embedded in zip(new_ids, np.any(embeddings, axis=1)) if not embedded}
+            if unembedded:
+                logger.warning(f"⚠️ {len(unembedded)} policy chunks stored without embeddings, they will be re-embedded next ingestion")
+                for entry in files.values():
+                    for chunk_id in unembedded & entry['chunks'].keys():
+                        entry['chunks'][chunk_id]['unembedded'] = True
+            summary['unembedded'] = len(unembedded)
+        if moved_ids:
+            collection.update(ids=moved_ids, metadatas=moved_metadatas)
+        if stale_ids:
+            collection.delete(ids=stale_ids)
         
-        # Store in ChromaDB
-        logger.info("💾 Storing in vector database...")
-        collection = vector_store.get_or_create_collection(self.collection_name)
+        chunk_ids = [chunk_id for entry in files.values() for chunk_id in entry['chunks']]
+        self._sync_keyword_index(collection, chunk_ids, changed=bool(new_ids or stale_ids))
         
-        # Clear existing policies first (to avoid duplicates)
-        try:
-            existing_count = collection.count()
-            if existing_count > 0:
-                logger.info(f"🗑️  Clearing {existing_count} existing policy chunks...")
-                collection.delete(where={"source": "policy_document"})
-        except Exception as e:
-            logger.warning(f"⚠️ Could not clear existing policies: {e}")
-        
-        # Add new chunks
-        collection.add(
-            ids=all_ids,
-            embeddings=embeddings,
-            documents=all_chunks,
-            metadatas=all_metadatas
+        # Written last: the new revision must not be cached against the old keyword index
+        summary['revision'] = self._save_manifest(files)
+        
+        summary.update({'added': len(new_ids), 'updated': len(moved_ids), 'removed': len(stale_ids)})
+        logger.info(
+            f"✅ Policy ingestion: {summary['added']} added, {summary['updated']} updated, "
+            f"{summary['removed']} removed, {summary['unchanged']} unchanged chunks"
         )
+        if new_metadatas:
+            logger.info(f"📊 Policy types loaded: {list(set([m['policy_type'] for m in new_metadatas]))}")
+        return summary
+    
+    def _build_keyword_index(self, collection) -> BM25Index:
+        records = collection.get(where={"source": "policy_document"}, include=['documents', 'metadatas'])
+        started = time.perf_counter()
+        index = BM25Index.build(
+            records['ids'],
+            [doc or "" for doc in records['documents']],
+            groups=[(metadata or {}).get('policy_type') for metadata in records['metadatas']]
+        )
+        index.save(self.keyword_index_path)
+        logger.info(
+            f"🔤 Keyword index: {len(index)} chunks, {len(index.terms)} terms, "
+            f"{index.nbytes / 1024:.1f} KB in {time.perf_counter() - started:.3f}s"
+        )
+        return index
+    
+    def _sync_keyword_index(self, collection, chunk_ids: List[str], changed: bool):
+        """Rebuild the BM25 index when chunk texts changed or the saved one doesn't match the manifest"""
+        with self._keyword_lock:
+            index = None if changed else BM25Index.load(self.keyword_index_path)
+            if index is None or sorted(index.ids) != sorted(chunk_ids):
+                index = self._build_keyword_index(collection)
+            self._keyword_index = index
+    
+    def get_keyword_index(self) -> BM25Index:
+        """BM25 index over the policy chunks, loaded from disk or rebuilt from the collection"""
+        with self._keyword_lock:
+            if self._keyword_index is None:
+                self._keyword_index = BM25Index.load(self.keyword_index_path)
+                if self._keyword_index is None:
+                    collection = vector_store.get_or_create_collection(self.collection_name)
+                    self._keyword_index = self._build_keyword_index(collection)
+            return self._keyword_index
+    
+    def _keyword_confident(self, hits: List[Dict]) -> bool:
+        if not self.keyword_fast_path or not hits:
+            return False
+        if hits[0]['coverage'] < self.fast_path_coverage:
+            return False
+        return len(hits) == 1 or hits[0]['score'] >= self.fast_path_margin * hits[1]['score']
+    
+    def detect_policy_types(self, message: str) -> Optional[List[str]]:
+        """Policy documents a question is about, from keywords; None if it doesn't point at any"""
+        message_lower = message.lower()
+        types = [policy_type for policy_type, keywords in POLICY_TYPE_KEYWORDS.items() if _mentions(message_lower, keywords)]
+        return types or None
+    
+    def is_policy_question(self, message: str) -> bool:
+        """Whether chat should answer from the policy documents"""
+        return _mentions(message.lower(), GENERAL_POLICY_KEYWORDS) or self.detect_policy_types(message) is not None
+    
+    def _is_weak(self, results: List[Dict], n_results: int) -> bool:
+        """Too few results, or none of them close to the query"""
+        if len(results) < n_results:
+            return True
+        distances = [result['distance'] for result in results if result['distance'] is not None]
+        return bool(distances) and min(distances) > self.filter_max_distance
+    
+    def search_policies(self, query: str, n_results: int = 3, policy_types: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Search for relevant policy sections
+        
+        Vector and BM25 rankings are fused with reciprocal rank fusion; each result
+        carries its 'scores' breakdown and which 'retrieval' path produced it.
+        With `policy_types`, only those documents are searched, falling back to the
+        whole collection when the filtered results are weak.
+        Results are cached until the next ingestion changes the corpus revision.
+        """
+        revision = self.corpus_revision()
+        key = policy_search_cache.key(query, n_results, policy_types)
+        results = policy_search_cache.get(revision, key)
+        if results is not None:
+            return results
+        
+        results = self._search(query, n_results, policy_types)
+        # Empty results may be a failed search; don't pin them
+        if results:
+            policy_search_cache.put(revision, key, results)
+        return results
+    
+    def _search(self, query: str, n_results: int, policy_types: Optional[List[str]]) -> List[Dict]:
+        search = self._hybrid_search if self.hybrid_search else self._vector_search
+        if policy_types:
+            results = search(query, n_results, policy_types)
+            if not self._is_weak(results, n_results):
+                return results
+            logger.info(f"↩️ Weak results within {policy_types}, searching all policies")
+        return search(query, n_results, None)
+    
+    @staticmethod
+    def _where(policy_types: Optional[List[str]]) -> Optional[Dict]:
+        if not policy_types:
+            return None
+        if len(policy_types) == 1:
+            return {"policy_type": policy_types[0]}
+        return {"policy_type": {"$in": list(policy_types)}}
+    
+    def _hybrid_search(self, query: str, n_results: int, policy_types: Optional[List[str]] = None) -> List[Dict]:
+        """BM25 + vector search fused by reciprocal rank, with the keyword fast path"""
+        try:
+            collection = vector_store.get_or_create_collection(self.collection_name)
+            candidates = max(n_results * 4, 20)
+            keyword_hits = self.get_keyword_index().search(query, candidates, groups=policy_types)
+            
+            # Keyword fast path: exact-term questions don't need the embedding model
+            if self._keyword_confident(keyword_hits):
+                top = keyword_hits[:n_results]
+                records = self._fetch(collection, [hit['id'] for hit in top])
+                results = [{
+                    **records[hit['id']],
+                    'distance': None,
+                    'retrieval': 'keyword',
+                    'policy_filter': policy_types,
+                    'scores': {'bm25': round(hit['score'], 4), 'bm25_rank': rank, 'coverage': round(hit['coverage'], 3),
+                               'matched_terms': hit['matched']}
+                } for rank, hit in enumerate(top, 1) if hit['id'] in records]
+                logger.info(f"⚡ Keyword fast path: {len(results)} policy chunks for query: '{query[:50]}...'")
+                return results
+            
+            query_embedding = embedding_service.encode(query)
+            vector = collection.query(
+                query_embeddings=query_embedding[None, :],
+                n_results=min(candidates, collection.count()) or 1,
+                where=self._where(policy_types)
+            )
+            
+            # Reciprocal rank fusion: score = sum over rankings of 1 / (k + rank)
+            fused: Dict[str, Dict] = {}
+            for rank, chunk_id in enumerate(vector['ids'][0], 1):
+                fused[chunk_id] = {
+                    'rrf': 1 / (self.rrf_k + rank), 'vector_rank': rank,
+                    'distance': vector['distances'][0][rank - 1],
+                    'content': vector['documents'][0][rank - 1],
+                    'metadata': vector['metadatas'][0][rank - 1] or {}
+                }
+            for rank, hit in enumerate(keyword_hits, 1):
+                entry = fused.setdefault(hit['id'], {'rrf': 0.0})
+                entry['rrf'] += 1 / (self.rrf_k + rank)
+                entry.update({'bm25': hit['score'], 'bm25_rank': rank, 'coverage': hit['coverage'], 'matched_terms': hit['matched']})
+            
+            ranked = sorted(fused.items(), key=lambda item: item[1]['rrf'], reverse=True)[:n_results]
+            
+            # Keyword-only hits outside the vector candidates still get content and a real distance
+            missing = [chunk_id for chunk_id, entry in ranked if 'content' not in entry]
+            if missing:
+                records = self._fetch(collection, missing, query_embedding)
+                for chunk_id, entry in ranked:
+                    if chunk_id in records:
+                        entry.update(records[chunk_id])
+            
+            formatted_results = []
+            for chunk_id, entry in ranked:
+                if 'content' not in entry:
+                    continue
+                scores = {'rrf': round(entry['rrf'], 5)}
+                for key in ('vector_rank', 'bm25_rank', 'matched_terms'):
+                    if key in entry:
+                        scores[key] = entry[key]
+                if 'bm25' in entry:
+                    scores.update(bm25=round(entry['bm25'], 4), coverage=round(entry['coverage'], 3))
+                formatted_results.append({
+                    'content': entry['content'],
+                    'metadata': entry['metadata'],
+                    'distance': entry.get('distance'),
+                    'retrieval': 'hybrid',
+                    'policy_filter': policy_types,
+                    'scores': scores
+                })
+            
+            logger.info(f"🔍 Found {len(formatted_results)} policy chunks (hybrid) for query: '{query[:50]}...'")
+            return formatted_results
         
-        logger.info(f"✅ Ingested {len(all_chunks)} policy chunks from {len(policy_files)} files")
-        logger.info(f"📊 Policy types loaded: {list(set([m['policy_type'] for m in all_metadatas]))}")
+        except Exception as e:
+            logger.error(f"❌ Policy search error: {e}")
+            return []
+    
+    @staticmethod
+    def _fetch(collection, ids: List[str], query_embedding: Optional[np.ndarray] = None) -> Dict[str, Dict]:
+        """Chunk id -> {'content', 'metadata'[, 'distance']} (get() returns storage order, not request order)"""
+        include = ['documents', 'metadatas'] + (['embeddings'] if query_embedding is not None else [])
+        records = collection.get(ids=ids, include=include)
+        fetched = {}
+        for i, chunk_id in enumerate(records['ids']):
+            fetched[chunk_id] = {'content': records['documents'][i], 'metadata': records['metadatas'][i] or {}}
+            if query_embedding is not None:
+                # Squared L2, like the vector store's own distances
+                difference = np.asarray(records['embeddings'][i], dtype=np.float32) - query_embedding
+                fetched[chunk_id]['distance'] = float(difference @ difference)
+        return fetched
     
-    def search_policies(self, query: str, n_results: int = 3) -> List[Dict]:
-        """Search for relevant policy sections"""
+    def _vector_search(self, query: str, n_results: int = 3, policy_types: Optional[List[str]] = None) -> List[Dict]:
+        """Dense-only search (POLICY_HYBRID_SEARCH=false)"""
         try:
             # Generate query embedding
             query_embedding = embedding_service.encode(query)
@@ -195,8 +680,9 @@ class PolicyLoader:
             # Search vector store
             collection = vector_store.get_or_create_collection(self.collection_name)
             results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results
+                query_embeddings=query_embedding[None, :],
+                n_results=n_results,
+                where=self._where(policy_types)
             )
             
             # Format results
@@ -206,7 +692,9 @@ class PolicyLoader:
                     formatted_results.append({
                         'content': doc,
                         'metadata': results['metadatas'][0][i] if results['metadatas'] else {},
-                        'distance': results['distances'][0][i] if results['distances'] else None
+                        'distance': results['distances'][0][i] if results['distances'] else None,
+                        'retrieval': 'vector',
+                        'policy_filter': policy_types
                     })
             
             logger.info(f"🔍 Found {len(formatted_results)} policy chunks for query: '{query[:50]}...'")
@@ -1,11 +1,19 @@
 # rag/retriever.py
+import os
+import json
+import asyncio
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+from utils.location import location_key
 from .embeddings import embedding_service
 from .vector_store import vector_store
+from .itinerary_memory import itinerary_memory, summarize_itinerary, split_location, city_filter
 
 logger = logging.getLogger(__name__)
 
+# Similar-trip search widens in this order
+PARTITIONS = ("city", "state", "global")
+
 class RAGRetriever:
     """RAG retrieval orchestrator"""
     
@@ -13,6 +21,15 @@ class RAGRetriever:
         self.embedding_service = embedding_service
         self.vector_store = vector_store
         self.min_count_threshold = 10  # Minimum itineraries needed for RAG
+        self.n_results = 3
+        
+        # Partitions with fewer itineraries are skipped; wider partitions need closer matches
+        self.min_partition_count = int(os.getenv("RAG_MIN_PARTITION_COUNT", "3"))
+        self.partition_thresholds = {
+            'city': float(os.getenv("RAG_CITY_CONFIDENCE", "0.5")),
+            'state': float(os.getenv("RAG_STATE_CONFIDENCE", "0.6")),
+            'global': float(os.getenv("RAG_GLOBAL_CONFIDENCE", "0.7"))
+        }
     
     async def retrieve_similar_trips(
         self,
@@ -23,81 +40,149 @@ class RAGRetriever:
         """
         Retrieve similar trips from vector store
         """
+        results = await self.retrieve_similar_trips_many([{
+            'location': location,
+            'party_type': party_type,
+            'interests': interests
+        }])
+        return results[0]
+    
+    async def retrieve_similar_trips_many(self, trips: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Retrieve similar trips for several {'location', 'party_type', 'interests'} at once
+        
+        Each trip searches its own city first, then its state, then everything, stopping
+        at the first partition whose confidence reaches that partition's threshold.
+        When none does, the narrowest partition that returned anything is kept: a
+        weak local match beats a weak one from anywhere. Queries are embedded in one batch,
+        and trips searching the same partition share one vector store call.
+        """
+        empty = [{'similar_trips': [], 'confidence': 0.0, 'count': 0} for _ in trips]
+        if not trips:
+            return empty
+        
         try:
-            # Check if we have enough data
+            # Check if we have enough data (cached by the collection handle)
             count = self.vector_store.count()
             
             if count < self.min_count_threshold:
                 logger.info(f"⚠️ Only {count} itineraries in DB (need {self.min_count_threshold}), skipping RAG")
-                return {
-                    'similar_trips': [],
-                    'confidence': 0.0,
-                    'count': count
-                }
+                return [{'similar_trips': [], 'confidence': 0.0, 'count': count} for _ in trips]
             
             # Build query text
-            query_text = f"Trip to {location} for {party_type}"
-            if interests:
-                query_text += f" interested in {', '.join(interests)}"
+            query_texts = []
+            for trip in trips:
+                query_text = f"Trip to {trip['location']} for {trip['party_type']}"
+                if trip.get('interests'):
+                    query_text += f" interested in {', '.join(trip['interests'])}"
+                query_texts.append(query_text)
             
-            logger.info(f"🔍 RAG search: {query_text}")
+            logger.info(f"🔍 RAG search ({len(query_texts)} queries): {query_texts[0]}")
             
-            # Generate embedding
-            query_embedding = self.embedding_service.encode(query_text)
+            # Generate embeddings
+            if len(query_texts) == 1:
+                query_embeddings = (await self.embedding_service.encode_async(query_texts[0]))[None, :]
+            else:
+                query_embeddings = await asyncio.to_thread(self.embedding_service.encode_batch, query_texts)
             
-            # Search vector store
-            similar = self.vector_store.search_similar(query_embedding, n_results=3)
+            partitions = await asyncio.to_thread(self._partitions, trips, count)
+            best: List[Optional[Dict[str, Any]]] = [None] * len(trips)
+            tried: List[List[Dict[str, Any]]] = [[] for _ in trips]
+            pending = list(range(len(trips)))
             
-            # Calculate confidence based on similarity
-            confidence = 0.0
-            if similar:
-                # Higher confidence if results are very similar
-                avg_distance = sum(r.get('distance', 1.0) for r in similar) / len(similar)
-                confidence = max(0.0, 1.0 - avg_distance)
+            for name in PARTITIONS:
+                # Trips searching the same partition go in one query
+                groups: Dict[str, Tuple[Optional[Dict[str, Any]], int, List[int]]] = {}
+                for i in pending:
+                    where, size = partitions[i][name]
+                    if size >= self.min_partition_count:
+                        groups.setdefault(json.dumps(where, sort_keys=True), (where, size, []))[2].append(i)
+                
+                resolved = set()
+                for where, size, members in groups.values():
+                    results = await asyncio.to_thread(
+                        self.vector_store.query_many, self.vector_store.collection_name,
+                        query_embeddings[members], self.n_results, where
+                    )
+                    for i, similar in zip(members, results):
+                        confidence = self._confidence(similar)
+                        tried[i].append({'partition': name, 'count': size, 'confidence': round(confidence, 3)})
+                        result = {'similar_trips': similar, 'confidence': confidence, 'partition': name, 'partition_count': size}
+                        if confidence >= self.partition_thresholds[name]:
+                            best[i] = result
+                            resolved.add(i)
+                        elif best[i] is None and similar:
+                            best[i] = result
+                
+                pending = [i for i in pending if i not in resolved]
+                if not pending:
+                    break
             
-            logger.info(f"✅ RAG retrieval: {len(similar)} results, confidence: {confidence:.2f}")
+            retrieved = [
+                {**(best[i] or {'similar_trips': [], 'confidence': 0.0, 'partition': None, 'partition_count': 0}),
+                 'count': count, 'partitions': tried[i]}
+                for i in range(len(trips))
+            ]
             
-            return {
-                'similar_trips': similar,
-                'confidence': confidence,
-                'count': count
-            }
+            summary = ', '.join(f"{r['partition']}:{r['confidence']:.2f}" for r in retrieved)
+            logger.info(f"✅ RAG retrieval: {sum(len(r['similar_trips']) for r in retrieved)} results, confidence: {summary}")
+            return retrieved
             
         except Exception as e:
             logger.error(f"❌ RAG retrieval error: {e}")
-            return {
-                'similar_trips': [],
-                'confidence': 0.0,
-                'count': 0
-            }
+            return empty
+    
+    def _partitions(self, trips: List[Dict[str, Any]], total: int) -> List[Dict[str, Tuple[Optional[Dict[str, Any]], int]]]:
+        """Per trip: partition name -> (where filter, indexed itineraries in it)"""
+        partitions = []
+        for trip in trips:
+            city, state = split_location(trip['location'])
+            city_key, state_key = location_key(city), location_key(state)
+            counts = itinerary_memory.partition_counts(city_key, state_key)
+            partitions.append({
+                'city': (city_filter(city_key, state_key), counts['city']),
+                'state': ({"state_key": state_key}, counts['state']),
+                'global': (None, total)
+            })
+        return partitions
+    
+    @staticmethod
+    def _confidence(similar: List[Dict[str, Any]]) -> float:
+        """Mean cosine similarity of the hits (distances are squared L2 between unit vectors)"""
+        if not similar:
+            return 0.0
+        avg_distance = sum(r.get('distance', 2.0) for r in similar) / len(similar)
+        return max(0.0, 1.0 - avg_distance / 2)
     
     async def add_generated_itinerary(
         self,
         booking_id: int,
         location: str,
-        itinerary_data: Dict[str, Any]
+        itinerary_data: Dict[str, Any],
+        party_type: Optional[str] = None,
+        interests: Optional[List[str]] = None
     ):
         """
         Add newly generated itinerary to vector store for future RAG
+        
+        A compact summary is embedded; the full plan is kept in the itinerary store.
         """
         try:
-            # Create document text
-            doc_text = f"Trip to {location}\n"
-            doc_text += f"Itinerary: {str(itinerary_data)[:500]}"
+            summary = summarize_itinerary(location, itinerary_data, party_type or 'couple', interests)
             
             # Generate embedding
-            embedding = self.embedding_service.encode(doc_text)
+            embedding = await self.embedding_service.encode_async(summary)
             
-            # Add to vector store
-            self.vector_store.add_itinerary(
-                itinerary_id=f"booking_{booking_id}",
+            await asyncio.to_thread(
+                itinerary_memory.remember,
+                booking_id=booking_id,
                 location=location,
                 itinerary_data=itinerary_data,
-                embedding=embedding
+                embedding=embedding,
+                summary=summary,
+                party_type=party_type
             )
             
-            logger.info(f"✅ Stored itinerary for booking {booking_id} in RAG")
-            
         except Exception as e:
             logger.error(f"❌ Error storing in RAG: {e}")
 
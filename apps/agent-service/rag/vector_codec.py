@@ -0,0 +1,125 @@
+# rag/vector_codec.py
+import os
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MODES = ("float16", "int8")
+
+# Rows converted to float32 at a time while encoding or scoring, bounding temporary memory
+CHUNK_ROWS = 4096
+# Rows sampled to fit PCA and int8 scales
+FIT_SAMPLE_ROWS = 20000
+
+def compact_options_from_env() -> Optional[Dict[str, Any]]:
+    """Compact storage settings for the NumPy index, or None when disabled"""
+    mode = os.getenv("VECTOR_COMPACT_MODE", "none").lower()
+    if mode not in MODES:
+        if mode != "none":
+            logger.warning(f"⚠️ Unknown VECTOR_COMPACT_MODE '{mode}', storing float32 only")
+        return None
+    return {
+        'mode': mode,
+        'collections': {
+            name.strip() for name in os.getenv("VECTOR_COMPACT_COLLECTIONS", "travel_itineraries,city_pois").split(",")
+            if name.strip()
+        },
+        'dims': int(os.getenv("VECTOR_COMPACT_DIMS", "0")),
+        'rerank': int(os.getenv("VECTOR_COMPACT_RERANK", "4")),
+        'min_rows': int(os.getenv("VECTOR_COMPACT_MIN_ROWS", "1000"))
+    }
+
+class VectorCodec:
+    """
+    Compact copy of a collection's vectors, used to score queries
+
+    Vectors are centered on the corpus mean and, with `dims`, projected onto the corpus's
+    top principal components. "float16" then stores half-precision values; "int8" stores
+    one byte per dimension with a per-dimension scale. Distances are squared L2 in that
+    space, an approximation of the float32 distances which callers may re-rank.
+    """
+
+    def __init__(self, mode: str, dims: int = 0):
+        if mode not in MODES:
+            raise ValueError(f"Unsupported compact mode: {mode}")
+        self.mode = mode
+        self.dims = dims
+        self.fitted_rows = 0
+        self._mean: Optional[np.ndarray] = None
+        self._components: Optional[np.ndarray] = None  # (dims, dim)
+        self._scale: Optional[np.ndarray] = None  # int8 only
+
+    def fit(self, matrix: np.ndarray) -> "VectorCodec":
+        """Fit the mean, PCA components and int8 scales on (a sample of) the corpus"""
+        sample = matrix
+        if len(matrix) > FIT_SAMPLE_ROWS:
+            rows = np.sort(np.random.default_rng(0).choice(len(matrix), FIT_SAMPLE_ROWS, replace=False))
+            sample = matrix[rows]
+        sample = np.asarray(sample, dtype=np.float32)
+
+        self._mean = sample.mean(axis=0)
+        centered = sample - self._mean
+        self._components = None
+        if 0 < self.dims < matrix.shape[1]:
+            covariance = centered.T @ centered / max(len(centered) - 1, 1)
+            values, vectors = np.linalg.eigh(covariance)
+            self._components = np.ascontiguousarray(vectors[:, ::-1][:, :self.dims].T, dtype=np.float32)
+            explained = float(values[::-1][:self.dims].sum() / max(values.sum(), 1e-12))
+            logger.info(f"📐 PCA {matrix.shape[1]} -> {self.dims} dims keeps {explained:.1%} of the variance")
+
+        if self.mode == "int8":
+            projected = centered @ self._components.T if self._components is not None else centered
+            self._scale = np.maximum(np.abs(projected).max(axis=0), 1e-6).astype(np.float32) / 127
+        self.fitted_rows = len(matrix)
+        return self
+
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """Vectors in the codec's (centered, optionally reduced) float32 space"""
+        centered = np.asarray(vectors, dtype=np.float32) - self._mean
+        if self._components is not None:
+            return centered @ self._components.T
+        return centered
+
+    def encode(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(codes, squared norms of the decoded vectors), encoded chunk by chunk"""
+        dim = self._components.shape[0] if self._components is not None else matrix.shape[1]
+        codes = np.empty((len(matrix), dim), dtype=np.int8 if self.mode == "int8" else np.float16)
+        sq_norms = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), CHUNK_ROWS):
+            projected = self.project(matrix[start:start + CHUNK_ROWS])
+            if self.mode == "int8":
+                chunk = np.clip(np.rint(projected / self._scale), -127, 127).astype(np.int8)
+                decoded = chunk * self._scale
+            else:
+                chunk = projected.astype(np.float16)
+                decoded = chunk.astype(np.float32)
+            codes[start:start + len(chunk)] = chunk
+            sq_norms[start:start + len(chunk)] = np.einsum("ij,ij->i", decoded, decoded)
+        return codes, sq_norms
+
+    def distances(self, codes: np.ndarray, sq_norms: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Approximate squared L2 distances, shape (rows, queries)"""
+        projected = self.project(queries)
+        # int8: q . (codes * scale) == (q * scale) . codes
+        weights = projected * self._scale if self.mode == "int8" else projected
+        q_norms = np.einsum("ij,ij->i", projected, projected)
+
+        result = np.empty((len(codes), len(queries)), dtype=np.float32)
+        for start in range(0, len(codes), CHUNK_ROWS):
+            chunk = codes[start:start + CHUNK_ROWS].astype(np.float32)
+            result[start:start + len(chunk)] = chunk @ weights.T
+        result *= -2.0
+        result += sq_norms[:, None]
+        result += q_norms[None, :]
+        return np.maximum(result, 0.0, out=result)
+
+    def nbytes(self, codes: Optional[np.ndarray]) -> int:
+        """Memory held for scoring: codes, norms and the fitted parameters"""
+        total = 0 if codes is None else codes.nbytes + 4 * len(codes)
+        for array in (self._mean, self._components, self._scale):
+            if array is not None:
+                total += array.nbytes
+        return total
@@ -1,7 +1,16 @@
 # rag/vector_store.py
 import os
+import json
+import shutil
 import logging
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from .numpy_index import NumpyVectorClient
+from .vector_codec import compact_options_from_env
+from .collection_registry import CollectionRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -13,76 +22,117 @@ except ImportError:
     logger.warning("⚠️ chromadb not installed")
     CHROMADB_AVAILABLE = False
 
+# On-disk layout version, recorded in <persist dir>/store_version.json
+#   0: chromadb<0.4 duckdb+parquet files (chroma-collections.parquet, chroma-embeddings.parquet)
+#   1: chromadb.PersistentClient (chroma.sqlite3) or the NumPy index (numpy_index/)
+SCHEMA_VERSION = 1
+VERSION_FILE = "store_version.json"
+LEGACY_PARQUET_FILES = ("chroma-collections.parquet", "chroma-embeddings.parquet")
+
 class VectorStore:
-    """ChromaDB vector store for RAG"""
+    """Vector store for RAG (ChromaDB or the in-process NumPy index)"""
     
     def __init__(self):
         self.collection_name = "travel_itineraries"
+        self.client = None
+        self.collection = None
+        self.registry = None
         
-        if CHROMADB_AVAILABLE:
-            try:
-                # Use persistent storage
-                persist_dir = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
-                
-                self.client = chromadb.Client(Settings(
-                    persist_directory=persist_dir,
-                    anonymized_telemetry=False
-                ))
-                
-                # Get or create collection
-                try:
-                    self.collection = self.client.get_collection(self.collection_name)
-                    logger.info(f"✅ ChromaDB collection loaded: {self.collection_name}")
-                except:
-                    self.collection = self.client.create_collection(
-                        name=self.collection_name,
-                        metadata={"description": "Travel itineraries and recommendations"}
-                    )
-                    logger.info(f"✅ ChromaDB collection created: {self.collection_name}")
-                
-            except Exception as e:
-                logger.error(f"❌ ChromaDB init error: {e}")
-                self.client = None
-                self.collection = None
-        else:
+        # "chroma" (default) or "numpy" (in-process index for small collections, see rag/numpy_index.py)
+        self.backend = os.getenv("VECTOR_BACKEND", "chroma").lower()
+        persist_dir = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+        
+        try:
+            if self.backend == "numpy":
+                self.client = NumpyVectorClient(persist_dir, compact=compact_options_from_env())
+            elif CHROMADB_AVAILABLE:
+                # On-disk storage: collections survive restarts and reopen without re-embedding
+                self.client = chromadb.PersistentClient(
+                    path=persist_dir,
+                    settings=Settings(anonymized_telemetry=False)
+                )
+            else:
+                return
+            
+            self._check_schema(Path(persist_dir))
+            
+            # Collection handles are opened once and shared; their counts are cached until the next write
+            self.registry = CollectionRegistry(self.client)
+            self.collection = self.registry.get_or_create(
+                self.collection_name,
+                metadata={"description": "Travel itineraries and recommendations"}
+            )
+            
+        except Exception as e:
+            logger.error(f"❌ Vector store init error ({self.backend}): {e}")
             self.client = None
             self.collection = None
+            self.registry = None
     
-    def add_itinerary(
-        self,
-        itinerary_id: str,
-        location: str,
-        itinerary_data: Dict[str, Any],
-        embedding: List[float]
-    ):
-        """Add itinerary to vector store"""
-        if not self.collection:
-            logger.warning("⚠️ ChromaDB not available, skipping add")
+    def _check_schema(self, persist_dir: Path):
+        """Migrate older on-disk layouts and record the current schema version"""
+        version_path = persist_dir / VERSION_FILE
+        marker = {}
+        if version_path.exists():
+            with open(version_path) as f:
+                marker = json.load(f)
+        
+        version = marker.get("schema_version", 0)
+        if version > SCHEMA_VERSION:
+            raise RuntimeError(f"Vector store at {persist_dir} has schema v{version}, this service supports v{SCHEMA_VERSION}")
+        
+        if version < 1 and all((persist_dir / name).exists() for name in LEGACY_PARQUET_FILES):
+            self._migrate_legacy_parquet(persist_dir)
+        
+        if marker.get("schema_version") == SCHEMA_VERSION and marker.get("backend") == self.backend:
             return
         
+        marker.update({"schema_version": SCHEMA_VERSION, "backend": self.backend})
+        tmp_path = version_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(marker, f, indent=2)
+        os.replace(tmp_path, version_path)
+        logger.info(f"✅ Vector store schema v{SCHEMA_VERSION} ({self.backend}) at {persist_dir}")
+    
+    def _migrate_legacy_parquet(self, persist_dir: Path, batch_size: int = 500):
+        """Copy collections written by chromadb<0.4 (duckdb+parquet) into the current client"""
         try:
-            # Create document text for retrieval
-            doc_text = f"Location: {location}\n"
-            doc_text += f"Itinerary: {str(itinerary_data)[:500]}"
-            
-            self.collection.add(
-                ids=[itinerary_id],
-                embeddings=[embedding],
-                documents=[doc_text],
-                metadatas=[{
-                    "location": location,
-                    "created_at": str(itinerary_data.get('created_at', ''))
-                }]
-            )
-            
-            logger.info(f"✅ Added itinerary {itinerary_id} to vector store")
+            import pyarrow.parquet as pq
+        except ImportError:
+            logger.warning("⚠️ Legacy Chroma parquet files found; install pyarrow to migrate them (left in place)")
+            return
+        
+        collections = pq.read_table(persist_dir / "chroma-collections.parquet").to_pylist()
+        rows = pq.read_table(persist_dir / "chroma-embeddings.parquet").to_pylist()
+        
+        for legacy in collections:
+            records = [row for row in rows if row.get("collection_uuid") == legacy["uuid"]]
+            metadata = json.loads(legacy["metadata"]) if isinstance(legacy.get("metadata"), str) else legacy.get("metadata")
+            collection = self.client.get_or_create_collection(legacy["name"], metadata=metadata or None)
             
-        except Exception as e:
-            logger.error(f"❌ Error adding to vector store: {e}")
+            for start in range(0, len(records), batch_size):
+                batch = records[start:start + batch_size]
+                collection.upsert(
+                    ids=[row["id"] for row in batch],
+                    embeddings=np.array([row["embedding"] for row in batch], dtype=np.float32),
+                    documents=[row.get("document") or "" for row in batch],
+                    metadatas=[
+                        (json.loads(row["metadata"]) if isinstance(row.get("metadata"), str) else row.get("metadata")) or None
+                        for row in batch
+                    ]
+                )
+            logger.info(f"✅ Migrated legacy collection '{legacy['name']}' ({len(records)} records)")
+        
+        # Keep the old files out of the way rather than deleting them
+        legacy_dir = persist_dir / "legacy_v0"
+        legacy_dir.mkdir(exist_ok=True)
+        for name in os.listdir(persist_dir):
+            if (name.startswith("chroma-") and name.endswith(".parquet")) or name == "index":
+                shutil.move(str(persist_dir / name), str(legacy_dir / name))
     
     def search_similar(
         self,
-        query_embedding: List[float],
+        query_embedding: np.ndarray,
         n_results: int = 5
     ) -> List[Dict[str, Any]]:
         """Search for similar itineraries"""
@@ -90,29 +140,51 @@ class VectorStore:
             logger.warning("⚠️ ChromaDB not available, returning empty results")
             return []
         
+        similar = self.query_many(self.collection_name, np.atleast_2d(query_embedding), n_results)[0]
+        logger.info(f"✅ Found {len(similar)} similar itineraries")
+        return similar
+    
+    def query_many(
+        self,
+        collection_name: str,
+        query_embeddings: np.ndarray,
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Run several query embeddings against a collection in one call
+        
+        Returns one list of {'id', 'document', 'metadata', 'distance'} per query row
+        (empty lists if the store is unavailable or the query fails).
+        """
+        query_embeddings = np.atleast_2d(query_embeddings)
+        empty = [[] for _ in range(len(query_embeddings))]
+        collection = self.get_or_create_collection(collection_name)
+        if collection is None or not len(query_embeddings):
+            return empty
+        
         try:
-            # Query collection
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where
             )
             
             # Format results
-            similar = []
-            if results.get('documents') and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    similar.append({
-                        'document': doc,
-                        'metadata': results.get('metadatas', [[]])[0][i] if results.get('metadatas') else {},
-                        'distance': results.get('distances', [[]])[0][i] if results.get('distances') else 0
-                    })
-            
-            logger.info(f"✅ Found {len(similar)} similar itineraries")
-            return similar
+            formatted = []
+            for row, ids in enumerate(results.get('ids') or []):
+                documents = results['documents'][row] if results.get('documents') else [None] * len(ids)
+                metadatas = results['metadatas'][row] if results.get('metadatas') else [{}] * len(ids)
+                distances = results['distances'][row] if results.get('distances') else [0] * len(ids)
+                formatted.append([
+                    {'id': id_, 'document': document, 'metadata': metadata or {}, 'distance': distance}
+                    for id_, document, metadata, distance in zip(ids, documents, metadatas, distances)
+                ])
+            return formatted or empty
             
         except Exception as e:
             logger.error(f"❌ Vector search error: {e}")
-            return []
+            return empty
     
     def count(self) -> int:
         """Get count of stored itineraries"""
@@ -125,28 +197,16 @@ class VectorStore:
             return 0
     
     def get_or_create_collection(self, collection_name: str):
-        """Get or create a ChromaDB collection"""
-        if not self.client:
+        """Get or create a collection (a cached handle after the first call)"""
+        if not self.registry:
             logger.warning("⚠️ ChromaDB client not available")
             return None
         
         try:
-            # Try to get existing collection
-            collection = self.client.get_collection(collection_name)
-            logger.info(f"✅ Collection '{collection_name}' loaded")
-            return collection
-        except:
-            # Create new collection if it doesn't exist
-            try:
-                collection = self.client.create_collection(
-                    name=collection_name,
-                    metadata={"description": f"Collection: {collection_name}"}
-                )
-                logger.info(f"✅ Collection '{collection_name}' created")
-                return collection
-            except Exception as e:
-                logger.error(f"❌ Error creating collection '{collection_name}': {e}")
-                return None
+            return self.registry.get_or_create(collection_name)
+        except Exception as e:
+            logger.error(f"❌ Error creating collection '{collection_name}': {e}")
+            return None
 
 # Global instance
 vector_store = VectorStore()
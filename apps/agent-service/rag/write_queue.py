@@ -0,0 +1,269 @@
+# rag/write_queue.py
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .embeddings import embedding_service
+from .itinerary_memory import itinerary_memory, summarize_itinerary
+
+logger = logging.getLogger(__name__)
+
+class RAGWriteQueue:
+    """
+    Write-behind queue for indexing generated itineraries
+
+    Itineraries are journaled to SQLite when enqueued and indexed later by a background
+    worker: each batch is embedded with one encode_batch call and stored with one
+    ItineraryMemory.remember_many call. Failed batches are retried with exponential
+    backoff; entries survive restarts and are flushed on shutdown. When the queue is
+    full, enqueue waits for the worker to drain it and gives up after
+    RAG_QUEUE_FULL_WAIT_SECONDS.
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("RAG_WRITE_BEHIND", "true").lower() == "true"
+        self.path = Path(os.getenv("RAG_QUEUE_PATH", "./agent_data/rag_queue.db"))
+        self.batch_size = int(os.getenv("RAG_QUEUE_BATCH", "32"))
+        self.max_depth = int(os.getenv("RAG_QUEUE_MAX_DEPTH", "1000"))
+        self.flush_interval = float(os.getenv("RAG_QUEUE_FLUSH_SECONDS", "2"))
+        self.full_wait_seconds = float(os.getenv("RAG_QUEUE_FULL_WAIT_SECONDS", "5"))
+        self.max_attempts = int(os.getenv("RAG_QUEUE_MAX_ATTEMPTS", "5"))
+        self.retry_base_seconds = float(os.getenv("RAG_QUEUE_RETRY_SECONDS", "5"))
+
+        self._lock = threading.Lock()
+        # One batch at a time: a batch still running in its thread after stop() cancelled the
+        # worker must finish (and leave the journal) before the shutdown flush claims entries
+        self._batch_lock = threading.Lock()
+        self._conn = None
+        self._wake: Optional[asyncio.Event] = None
+        self._drained: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats = {
+            'enqueued': 0, 'indexed': 0, 'batches': 0, 'retries': 0, 'dead': 0, 'rejected': 0,
+            'last_batch_size': 0, 'last_batch_seconds': 0.0, 'last_error': None
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the SQLite journal on first use"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    booking_id INTEGER NOT NULL,
+                    location TEXT NOT NULL,
+                    party_type TEXT,
+                    interests TEXT,
+                    itinerary TEXT NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    dead INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pending_due ON pending (dead, next_attempt_at)")
+            self._conn.commit()
+            logger.info(f"✅ RAG write queue opened: {self.path}")
+        return self._conn
+
+    # ---------- journal (called in worker threads) ----------
+
+    def _depth(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM pending WHERE dead = 0").fetchone()[0]
+
+    def _append(self, booking_id: int, location: str, itinerary_data: Dict[str, Any],
+                party_type: Optional[str], interests: Optional[List[str]]):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO pending (booking_id, location, party_type, interests, itinerary, enqueued_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (booking_id, location, party_type, json.dumps(interests or []),
+                 json.dumps(itinerary_data, default=str), now, now)
+            )
+            conn.commit()
+
+    def _claim(self, ignore_backoff: bool = False) -> List[Dict[str, Any]]:
+        """Oldest due entries, up to one batch"""
+        now = float("inf") if ignore_backoff else time.time()
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, booking_id, location, party_type, interests, itinerary, attempts FROM pending "
+                "WHERE dead = 0 AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+                (now, self.batch_size)
+            ).fetchall()
+        return [{
+            'id': row[0], 'booking_id': row[1], 'location': row[2], 'party_type': row[3],
+            'interests': json.loads(row[4] or "[]"), 'itinerary_data': json.loads(row[5]), 'attempts': row[6]
+        } for row in rows]
+
+    def _index(self, batch: List[Dict[str, Any]]):
+        """Embed and store a batch, then drop it from the journal"""
+        for entry in batch:
+            entry['summary'] = summarize_itinerary(entry['location'], entry['itinerary_data'],
+                                                   entry['party_type'] or 'couple', entry['interests'])
+        embeddings = embedding_service.encode_batch([entry['summary'] for entry in batch])
+        itinerary_memory.remember_many(batch, embeddings)
+
+        with self._lock:
+            conn = self._connection()
+            conn.executemany("DELETE FROM pending WHERE id = ?", [(entry['id'],) for entry in batch])
+            conn.commit()
+
+    def _reschedule(self, batch: List[Dict[str, Any]], error: str):
+        """Back off each entry; entries out of attempts are kept but marked dead"""
+        now = time.time()
+        rows = []
+        for entry in batch:
+            attempts = entry['attempts'] + 1
+            dead = attempts >= self.max_attempts
+            delay = min(self.retry_base_seconds * 2 ** (attempts - 1), 600)
+            rows.append((attempts, now + delay, int(dead), error, entry['id']))
+            self.stats['dead' if dead else 'retries'] += 1
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "UPDATE pending SET attempts = ?, next_attempt_at = ?, dead = ?, last_error = ? WHERE id = ?", rows
+            )
+            conn.commit()
+
+    def _process_batch(self, ignore_backoff: bool = False) -> int:
+        """Index one batch; returns how many entries were indexed (0 if the batch failed)"""
+        with self._batch_lock:
+            batch = self._claim(ignore_backoff)
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            try:
+                self._index(batch)
+                self.stats['indexed'] += len(batch)
+                self.stats['batches'] += 1
+                self.stats['last_batch_size'] = len(batch)
+                self.stats['last_batch_seconds'] = round(time.perf_counter() - started, 3)
+                return len(batch)
+            except Exception as e:
+                logger.error(f"❌ RAG write batch of {len(batch)} failed: {e}")
+                self.stats['last_error'] = str(e)
+                self._reschedule(batch, str(e))
+                return 0
+
+    # ---------- async API ----------
+
+    async def enqueue(
+        self,
+        booking_id: int,
+        location: str,
+        itinerary_data: Dict[str, Any],
+        party_type: Optional[str] = None,
+        interests: Optional[List[str]] = None
+    ) -> bool:
+        """Journal an itinerary for indexing; False if the queue stayed full (the entry is dropped)"""
+        try:
+            deadline = time.monotonic() + self.full_wait_seconds
+            while await asyncio.to_thread(self._depth) >= self.max_depth:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._task:
+                    self.stats['rejected'] += 1
+                    logger.warning(f"⚠️ RAG write queue full ({self.max_depth}), dropping booking {booking_id}")
+                    return False
+                self._wake.set()
+                self._drained.clear()
+                try:
+                    await asyncio.wait_for(self._drained.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+            await asyncio.to_thread(self._append, booking_id, location, itinerary_data, party_type, interests)
+            self.stats['enqueued'] += 1
+            if self._wake and await asyncio.to_thread(self._depth) >= self.batch_size:
+                self._wake.set()
+            return True
+        except Exception as e:
+            logger.error(f"❌ RAG enqueue failed for booking {booking_id}: {e}")
+            return False
+
+    def start(self):
+        """Start the background indexing worker"""
+        if not self.enabled:
+            logger.info("⏸️ RAG write-behind disabled, itineraries are indexed inline")
+            return
+        if self._task:
+            return
+        self._wake = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._worker())
+        logger.info(f"✅ RAG write queue started (batch {self.batch_size}, max depth {self.max_depth})")
+
+    async def _worker(self):
+        # Checked as well as cancellation: wait_for can swallow a cancel that races the wake event
+        while not self._stopping:
+            # A full batch wakes the worker early; otherwise it drains every flush interval
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                while await asyncio.to_thread(self._process_batch) == self.batch_size:
+                    self._drained.set()
+            except Exception as e:
+                logger.error(f"❌ RAG write worker error: {e}")
+            self._drained.set()
+
+    async def stop(self, flush_timeout: float = 30.0):
+        """Stop the worker, then index everything still queued (retry backoff is ignored)"""
+        if self._task:
+            self._stopping = True
+            self._wake.set()
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if not self.enabled:
+            return
+
+        deadline = time.monotonic() + flush_timeout
+        flushed = 0
+        while time.monotonic() < deadline:
+            # Stops when the journal is empty or a batch fails (its entries stay for the next start)
+            processed = await asyncio.to_thread(self._process_batch, True)
+            if not processed:
+                break
+            flushed += processed
+        remaining = await asyncio.to_thread(self._depth)
+        logger.info(f"💾 RAG write queue flushed {flushed} itineraries ({remaining} left for next start)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, lag of the oldest pending entry, and counters"""
+        with self._lock:
+            depth, oldest = self._connection().execute(
+                "SELECT COUNT(*), MIN(enqueued_at) FROM pending WHERE dead = 0"
+            ).fetchone()
+            dead = self._connection().execute("SELECT COUNT(*) FROM pending WHERE dead = 1").fetchone()[0]
+        return {
+            'enabled': self.enabled,
+            'running': self._task is not None,
+            'depth': depth,
+            'lag_seconds': round(time.time() - oldest, 3) if oldest else 0.0,
+            'dead_entries': dead,
+            'max_depth': self.max_depth,
+            'batch_size': self.batch_size,
+            **self.stats
+        }
+
+# Global instance
+rag_write_queue = RAGWriteQueue()
@@ -1,5 +1,7 @@
 # routes/admin_routes.py
-from fastapi import APIRouter, HTTPException
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
 from rag.policy_loader import policy_loader
 import logging
 
@@ -7,18 +9,21 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 @router.post("/ingest-policies")
-async def ingest_policies():
+async def ingest_policies(force: bool = False):
     """
     Manually trigger policy document ingestion
     Use this whenever policy documents are updated
+    
+    Only changed files are re-processed; pass ?force=true to rebuild everything.
     """
     try:
         logger.info("🔄 Manual policy ingestion triggered via API")
-        policy_loader.ingest_policies()
+        summary = await asyncio.to_thread(policy_loader.ingest_policies, force)
         
         return {
             "success": True,
-            "message": "Policy documents ingested successfully"
+            "message": "Policy documents ingested successfully",
+            **summary
         }
     except Exception as e:
         logger.error(f"❌ Policy ingestion failed: {e}")
@@ -28,20 +33,26 @@ async def ingest_policies():
         )
 
 @router.get("/search-policies")
-async def search_policies(query: str, n_results: int = 3):
+async def search_policies(query: str, n_results: int = 3, auto_filter: bool = True):
     """
     Test policy search functionality
     
+    Each result includes its score breakdown (RRF, vector/BM25 ranks, matched terms).
+    With auto_filter, the search is limited to the policy types detected in the query.
+    
     Example: GET /admin/search-policies?query=cancellation&n_results=3
     """
     try:
         logger.info(f"🔍 Testing policy search: '{query}'")
-        results = policy_loader.search_policies(query, n_results)
+        policy_types = policy_loader.detect_policy_types(query) if auto_filter else None
+        results = await asyncio.to_thread(policy_loader.search_policies, query, n_results, policy_types)
         
         return {
             "success": True,
             "query": query,
+            "detected_policy_types": policy_types,
             "results_count": len(results),
+            "retrieval": results[0].get("retrieval") if results else None,
             "results": results
         }
     except Exception as e:
@@ -95,3 +106,119 @@ async def get_policy_stats():
             detail=f"Failed to get stats: {str(e)}"
         )
 
+@router.get("/pregeneration-stats")
+async def get_pregeneration_stats():
+    """Plan pre-generation queue and counters"""
+    from services.pregeneration_service import plan_pregenerator
+    
+    return {
+        "success": True,
+        **plan_pregenerator.get_stats()
+    }
+
+@router.get("/tavily-cache-stats")
+async def get_tavily_cache_stats():
+    """Hit/miss counters for the Tavily search cache"""
+    from services.tavily_cache import tavily_cache
+    
+    return {
+        "success": True,
+        **tavily_cache.get_stats()
+    }
+
+@router.get("/embedding-cache-stats")
+async def get_embedding_cache_stats():
+    """Hit/miss counters for the embedding cache"""
+    from rag.embeddings import embedding_service
+    
+    return {
+        "success": True,
+        **embedding_service.cache.get_stats(),
+        "batching": embedding_service.batcher.get_stats() if embedding_service.batching else None
+    }
+
+@router.get("/policy-cache-stats")
+async def get_policy_cache_stats():
+    """Hit/miss counters for the policy search cache and the corpus revision it serves"""
+    from rag.policy_cache import policy_search_cache
+    
+    return {
+        "success": True,
+        **policy_search_cache.get_stats(),
+        "corpus_revision": await asyncio.to_thread(policy_loader.corpus_revision)
+    }
+
+@router.get("/vector-store-stats")
+async def get_vector_store_stats():
+    """Open collection handles and their cached counts, plus itinerary memory stats"""
+    from rag.vector_store import vector_store
+    from rag.itinerary_memory import itinerary_memory
+    
+    return {
+        "success": True,
+        "backend": vector_store.backend,
+        "collections": vector_store.registry.get_stats() if vector_store.registry else {},
+        "itineraries": await asyncio.to_thread(itinerary_memory.get_stats)
+    }
+
+@router.get("/rag-queue-stats")
+async def get_rag_queue_stats():
+    """Depth, lag and counters of the RAG write-behind queue"""
+    from rag.write_queue import rag_write_queue
+    
+    return {
+        "success": True,
+        **await asyncio.to_thread(rag_write_queue.get_stats)
+    }
+
+@router.post("/bootstrap-itineraries")
+async def bootstrap_itineraries(
+    batch: int = Query(64, gt=0),
+    rate: float = Query(20.0, gt=0),
+    limit: Optional[int] = Query(None, gt=0),
+    generate: bool = False,
+    include_upcoming: bool = False,
+    refresh: bool = False,
+    restart: bool = False
+):
+    """
+    Start indexing past ACCEPTED bookings into the similar-trip index in the background
+    
+    Resumes from the last checkpoint unless ?restart=true. With ?generate=true missing
+    plans come from the LLM, using only idle capacity. Progress: GET /admin/bootstrap-itineraries
+    """
+    from services.itinerary_bootstrap import itinerary_bootstrapper
+    
+    started = itinerary_bootstrapper.start(
+        batch=batch, rate=rate, limit=limit, generate=generate,
+        include_upcoming=include_upcoming, refresh=refresh, restart=restart
+    )
+    if not started:
+        raise HTTPException(status_code=409, detail="Itinerary bootstrap is already running")
+    logger.info("🚀 Itinerary bootstrap triggered via API")
+    return {
+        "success": True,
+        "message": "Itinerary bootstrap started"
+    }
+
+@router.get("/bootstrap-itineraries")
+async def get_bootstrap_status():
+    """Whether the itinerary bootstrap is running, and its checkpointed progress"""
+    from services.itinerary_bootstrap import itinerary_bootstrapper
+    
+    return {
+        "success": True,
+        **await asyncio.to_thread(itinerary_bootstrapper.get_stats)
+    }
+
+@router.delete("/bootstrap-itineraries")
+async def stop_bootstrap():
+    """Stop the itinerary bootstrap; starting it again resumes from the checkpoint"""
+    from services.itinerary_bootstrap import itinerary_bootstrapper
+    
+    running = itinerary_bootstrapper.running
+    await itinerary_bootstrapper.stop()
+    return {
+        "success": True,
+        "stopped": running
+    }
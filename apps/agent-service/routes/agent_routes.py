@@ -1,9 +1,11 @@
 # routes/agent_routes.py
 import os
 import logging
-from fastapi import APIRouter, HTTPException, status
-from models.schemas import AgentRequest, AgentResponse
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status
+from models.schemas import AgentRequest, AgentResponse, BatchPlanRequest, BookingEvent
 from services.agent_service import agent_service
+from services.batch_plan_service import batch_plan_service
+from services.pregeneration_service import plan_pregenerator
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/agent", tags=["agent"])
@@ -12,7 +14,7 @@ router = APIRouter(prefix="/agent", tags=["agent"])
 AGENT_SECRET = os.getenv("AGENT_SERVICE_SECRET", "change-this-secret-in-production")
 
 @router.post("/plan", status_code=status.HTTP_200_OK)
-async def create_travel_plan(request: AgentRequest):
+async def create_travel_plan(request: AgentRequest, background_tasks: BackgroundTasks):
     """
     Generate personalized travel plan for a booking
     
@@ -31,7 +33,7 @@ async def create_travel_plan(request: AgentRequest):
         logger.info(f"🎯 Plan request: booking={request.booking_id}, user={request.user_id}")
         
         # Generate plan
-        response = await agent_service.generate_plan(request)
+        response = await agent_service.generate_plan(request, background_tasks)
         
         return response
         
@@ -48,6 +50,68 @@ async def create_travel_plan(request: AgentRequest):
             detail=f"Failed to generate travel plan: {str(e)}"
         )
 
+@router.post("/plan/batch", status_code=status.HTTP_202_ACCEPTED)
+async def create_batch_travel_plans(request: BatchPlanRequest):
+    """
+    Start plan generation for many bookings
+    
+    Bookings are loaded in one query and grouped by city and check-in window,
+    so web search and RAG context are fetched once per group.
+    Poll GET /agent/plan/batch/{job_id} for progress and partial results.
+    """
+    if request.secret != AGENT_SECRET:
+        logger.warning("⚠️ Invalid secret token in batch request")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid authentication token"
+        )
+    
+    logger.info(f"🎯 Batch plan request: {len(request.booking_ids)} bookings")
+    
+    job = batch_plan_service.start_job(request.booking_ids, request.preferences)
+    
+    return {
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "total": job['total']
+    }
+
+@router.get("/plan/batch/{job_id}")
+async def get_batch_travel_plans(job_id: str, secret: str):
+    """
+    Progress and plans generated so far for a batch job
+    """
+    if secret != AGENT_SECRET:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid authentication token"
+        )
+    
+    job = batch_plan_service.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Batch job {job_id} not found"
+        )
+    
+    return job
+
+@router.post("/events/booking-accepted", status_code=status.HTTP_202_ACCEPTED)
+async def booking_accepted(event: BookingEvent):
+    """
+    Backend hook: a booking was accepted, pre-generate its plan in the background
+    """
+    if event.secret != AGENT_SECRET:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid authentication token"
+        )
+    
+    queued = plan_pregenerator.enqueue(event.booking_id, event.user_id)
+    logger.info(f"📬 Booking {event.booking_id} accepted, pre-generation queued={queued}")
+    
+    return {"booking_id": event.booking_id, "queued": queued}
+
 @router.post("/query")
 async def process_natural_language_query(
     query: str,
@@ -1,10 +1,14 @@
 # routes/health_routes.py
+import asyncio
 import logging
 from datetime import datetime
 from fastapi import APIRouter, status
 from models.schemas import HealthResponse
 from utils.mysql_client import mysql_client
 from utils.llm_client import llm_client
+from services.tavily_service import tavily_service
+from rag.embeddings import embedding_service
+from utils.startup_report import startup_report
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["health"])
@@ -28,12 +32,20 @@ async def health_check():
         "api": "healthy",
         "mysql": "unknown",
         "ollama": "unknown",
-        "tavily": "configured" if llm_client.llm else "not_configured"
+        "tavily": "configured" if tavily_service.client else "not_configured",
+        "embeddings": embedding_service.status()
     }
     
+    # Tavily circuit breaker (open = requests go straight to cached/fallback data)
+    circuits = {}
+    if tavily_service.client:
+        circuits["tavily"] = tavily_service.client.breaker.snapshot()
+        if circuits["tavily"]["state"] != "closed":
+            services["tavily"] = f"circuit_{circuits['tavily']['state']}"
+    
     # Test MySQL
     try:
-        if mysql_client.test_connection():
+        if await asyncio.to_thread(mysql_client.test_connection):
             services["mysql"] = "connected"
         else:
             services["mysql"] = "disconnected"
@@ -43,7 +55,7 @@ async def health_check():
     
     # Test Ollama
     try:
-        if llm_client.test_connection():
+        if await asyncio.to_thread(llm_client.test_connection):
             services["ollama"] = "connected"
         else:
             services["ollama"] = "disconnected"
@@ -61,9 +73,21 @@ async def health_check():
     return HealthResponse(
         status=overall_status,
         services=services,
+        circuits=circuits,
         timestamp=datetime.now().isoformat()
     )
 
+@router.get("/health/startup")
+async def startup_status():
+    """
+    Per-component startup timings and embedding model readiness
+    """
+    return {
+        "embeddings": embedding_service.status(),
+        "ready": embedding_service.is_ready(),
+        **startup_report.as_dict()
+    }
+
 @router.get("/test-ollama")
 async def test_ollama():
     """
@@ -1,13 +1,20 @@
 # services/agent_service.py
+import asyncio
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
+from fastapi import BackgroundTasks
+
 from models.schemas import AgentRequest, AgentResponse, DayPlan, ActivityCard, Restaurant, TimeBlock
 from utils.mysql_client import mysql_client
 from utils.llm_client import llm_client
 from services.tavily_service import tavily_service
+from services.plan_store import plan_store
 from rag.retriever import rag_retriever
+from rag.write_queue import rag_write_queue
+from rag.poi_index import poi_index
+from rag.policy_loader import policy_loader
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +26,9 @@ class AgentService:
         self.llm = llm_client
         self.tavily = tavily_service
         self.rag = rag_retriever
+        self.poi_index = poi_index
     
-    async def generate_plan(self, request: AgentRequest) -> Dict[str, Any]:
+    async def generate_plan(self, request: AgentRequest, background_tasks: Optional[BackgroundTasks] = None) -> Dict[str, Any]:
         """
         Main workflow to generate personalized travel plan
         
@@ -31,6 +39,7 @@ class AgentService:
         4. Combine all context
         5. Generate itinerary with LLM
         6. Parse and return structured response
+        7. Queue the itinerary for RAG indexing (after the response with `background_tasks`)
         """
         
         logger.info(f"🚀 Starting plan generation for booking {request.booking_id}")
@@ -46,6 +55,13 @@ class AgentService:
             if not booking_data:
                 raise ValueError(f"Booking {request.booking_id} not found")
             
+            # Pre-generated plans turn a plain plan request into a lookup, while the booking stands
+            if not request.query and booking_data.get('status') == 'ACCEPTED':
+                stored_plan = await asyncio.to_thread(plan_store.get, request.booking_id, request.preferences)
+                if stored_plan:
+                    logger.info(f"⚡ Serving stored plan for booking {request.booking_id}")
+                    return stored_plan
+            
             # Verify booking belongs to user (security check)
             # This is already done by backend, but double-check
             
@@ -71,11 +87,11 @@ class AgentService:
                 logger.info(f"✅ RAG: {len(rag_results['similar_trips'])} similar trips found")
             
             # ============================================
-            # STEP 3: Tavily Web Search
+            # STEP 3: Tavily Web Search (or city POI index)
             # ============================================
             logger.info("🌐 STEP 3: Tavily web search...")
             
-            tavily_data = await self.tavily.search_combined(
+            tavily_data = await self.search_destination(
                 location=f"{booking_data['city']}, {booking_data['state']}",
                 dates={
                     'check_in': booking_data['check_in'],
@@ -87,6 +103,68 @@ class AgentService:
             
             logger.info(f"✅ Tavily: {len(tavily_data['pois'])} POIs, {len(tavily_data['restaurants'])} restaurants")
             
+            return await self.generate_plan_with_context(
+                request=request,
+                booking_data=booking_data,
+                rag_results=rag_results,
+                tavily_data=tavily_data,
+                booking_history=booking_history,
+                background_tasks=background_tasks
+            )
+            
+        except Exception as e:
+            logger.error(f"❌ Plan generation failed: {e}", exc_info=True)
+            raise
+    
+    async def search_destination(
+        self,
+        location: str,
+        dates: Dict[str, str],
+        dietary: Optional[List[str]] = None,
+        interests: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        POIs, restaurants, events and weather for a destination
+        
+        Places are served from the per-city POI index when it is fresh enough, with only
+        the weather searched; otherwise everything is searched with Tavily and the
+        results are added to the index.
+        """
+        if await asyncio.to_thread(self.poi_index.is_fresh, location):
+            logger.info(f"📚 Using POI index for {location}, skipping POI web search")
+            # Weather changes faster than places: still fetched (cached per check-in week)
+            data, weather = await asyncio.gather(
+                asyncio.to_thread(self.poi_index.search, location, interests, dietary, dates.get('check_in')),
+                self.tavily.get_weather(location, dates)
+            )
+            data['weather'] = weather
+            return data
+        
+        data = await self.tavily.search_combined(
+            location=location,
+            dates=dates,
+            dietary=dietary,
+            interests=interests
+        )
+        
+        await asyncio.to_thread(self.poi_index.upsert, location, data, dates.get('check_in'))
+        return data
+    
+    async def generate_plan_with_context(
+        self,
+        request: AgentRequest,
+        booking_data: Dict[str, Any],
+        rag_results: Dict[str, Any],
+        tavily_data: Dict[str, Any],
+        booking_history: Optional[List[Dict[str, Any]]] = None,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Dict[str, Any]:
+        """
+        Steps 4-7 of plan generation, using already fetched context
+        
+        Lets batch generation share one RAG/Tavily lookup across bookings
+        """
+        try:
             # ============================================
             # STEP 4: Aggregate Context
             # ============================================
@@ -98,7 +176,7 @@ class AgentService:
                 'query': request.query,
                 'tavily_data': tavily_data,
                 'rag_results': rag_results,
-                'booking_history': booking_history
+                'booking_history': booking_history or []
             }
             
             # ============================================
@@ -126,11 +204,20 @@ class AgentService:
             # ============================================
             logger.info("💾 STEP 7: Saving to RAG...")
             
-            await self.rag.add_generated_itinerary(
-                booking_id=request.booking_id,
-                location=f"{booking_data['city']}, {booking_data['state']}",
-                itinerary_data=itinerary_data
-            )
+            rag_entry = {
+                'booking_id': request.booking_id,
+                'location': f"{booking_data['city']}, {booking_data['state']}",
+                'itinerary_data': itinerary_data,
+                'party_type': booking_data.get('party_type'),
+                'interests': request.preferences.interests if request.preferences else None
+            }
+            if not rag_write_queue.enabled:
+                await self.rag.add_generated_itinerary(**rag_entry)
+            elif background_tasks is not None:
+                # Journaled once the response has been sent; embedding happens in the queue worker
+                background_tasks.add_task(rag_write_queue.enqueue, **rag_entry)
+            else:
+                await rag_write_queue.enqueue(**rag_entry)
             
             logger.info(f"🎉 Plan generation completed for booking {request.booking_id}")
             
@@ -206,12 +293,8 @@ class AgentService:
                 'what to do', 'where to go', 'recommend'
             ])
             
-            is_policy_query = any(keyword in message_lower for keyword in [
-                'policy', 'policies', 'cancellation', 'cancel', 'refund',
-                'payment', 'pay', 'charge', 'fee', 'fees',
-                'rules', 'house rules', 'guest rules', 'privacy',
-                'terms', 'conditions', 'modify', 'change booking'
-            ])
+            # Same keywords that route the question to its policy document
+            is_policy_query = policy_loader.is_policy_question(message)
             
             # INTENT 1: Show user's bookings
             if is_booking_query and not is_plan_query:
@@ -273,8 +356,12 @@ class AgentService:
                         secret="internal"
                     )
                     
-                    logger.info(f"🚀 Calling generate_plan for booking {booking_id}...")
-                    plan = await self.generate_plan(request)
+                    plan = plan_store.get(booking_id, request.preferences)
+                    if plan:
+                        logger.info(f"⚡ Using stored plan for booking {booking_id}")
+                    else:
+                        logger.info(f"🚀 Calling generate_plan for booking {booking_id}...")
+                        plan = await self.generate_plan(request)
                     logger.info(f"✅ Plan generated successfully: {plan.get('destination')}")
                     
                     return {
@@ -316,10 +403,11 @@ class AgentService:
             elif is_policy_query and not (is_booking_query or is_plan_query):
                 logger.info("🎯 Intent: Policy query")
                 
-                from rag.policy_loader import policy_loader
-                
-                # Search policy documents
-                policy_results = policy_loader.search_policies(message, n_results=3)
+                # Search the policy documents the question is about (all of them if unclear)
+                policy_types = policy_loader.detect_policy_types(message)
+                if policy_types:
+                    logger.info(f"📑 Policy types: {policy_types}")
+                policy_results = await asyncio.to_thread(policy_loader.search_policies, message, 3, policy_types)
                 
                 if not policy_results:
                     return {
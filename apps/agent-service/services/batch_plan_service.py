@@ -0,0 +1,187 @@
+import os
+import uuid
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, date
+from typing import Dict, Any, List, Optional, Tuple
+
+from models.schemas import AgentRequest, UserPreferences
+from utils.mysql_client import mysql_client
+from utils.llm_client import llm_client
+from services.agent_service import agent_service
+from services.plan_store import plan_store
+
+logger = logging.getLogger(__name__)
+
+class BatchPlanService:
+    """Generate travel plans for many bookings with shared per-city context"""
+
+    def __init__(self):
+        self.mysql = mysql_client
+        self.agent = agent_service
+
+        # Bookings in the same city whose check-in falls in the same window share Tavily/RAG context
+        self.window_days = int(os.getenv("BATCH_PLAN_WINDOW_DAYS", "7"))
+        # Concurrent LLM generations (defaults to one per Ollama backend)
+        self.max_concurrency = int(os.getenv("BATCH_PLAN_CONCURRENCY", "0")) or max(1, len(llm_client.backends))
+        self.max_jobs = int(os.getenv("BATCH_PLAN_MAX_JOBS", "20"))
+
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        # Running job tasks (the event loop only keeps weak references)
+        self._tasks = set()
+
+    def start_job(self, booking_ids: List[int], preferences: Optional[UserPreferences] = None) -> Dict[str, Any]:
+        """Register a batch job and start it in the background"""
+        booking_ids = list(dict.fromkeys(booking_ids))  # dedupe, keep order
+        job_id = uuid.uuid4().hex[:12]
+
+        job = {
+            'job_id': job_id,
+            'status': 'running',
+            'total': len(booking_ids),
+            'completed': 0,
+            'failed': 0,
+            'groups': 0,
+            'results': {},
+            'errors': {},
+            'created_at': datetime.now().isoformat(),
+            'finished_at': None
+        }
+        self.jobs[job_id] = job
+        self._prune_jobs()
+
+        task = asyncio.create_task(self._run_job(job, booking_ids, preferences or UserPreferences()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        logger.info(f"📦 Batch plan job {job_id} started for {len(booking_ids)} bookings")
+
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current progress and partial results of a batch job"""
+        return self.jobs.get(job_id)
+
+    def _prune_jobs(self):
+        """Forget the oldest finished jobs beyond max_jobs"""
+        finished = [job_id for job_id, job in self.jobs.items() if job['status'] != 'running']
+        while len(self.jobs) > self.max_jobs and finished:
+            del self.jobs[finished.pop(0)]
+
+    def _group_key(self, booking: Dict[str, Any]) -> Tuple[str, str, int]:
+        """(city, state, check-in window) key used to share context"""
+        check_in = date.fromisoformat(booking['check_in'])
+        return (
+            booking['city'].strip().lower(),
+            booking['state'].strip().lower(),
+            check_in.toordinal() // self.window_days
+        )
+
+    async def _run_job(self, job: Dict[str, Any], booking_ids: List[int], preferences: UserPreferences):
+        """Load bookings once, group them and generate plans under a concurrency cap"""
+        try:
+            # A DB error fails the whole job with its cause rather than reporting every booking missing
+            bookings = await asyncio.to_thread(self.mysql.get_bookings_details, booking_ids)
+            found = {b['booking_id'] for b in bookings}
+
+            for booking_id in booking_ids:
+                if booking_id not in found:
+                    self._record_error(job, booking_id, "Booking not found")
+
+            groups: Dict[Tuple[str, str, int], List[Dict[str, Any]]] = {}
+            for booking in bookings:
+                if booking.get('status') != 'ACCEPTED':
+                    self._record_error(job, booking['booking_id'], f"Booking status is {booking.get('status')}, expected ACCEPTED")
+                    continue
+                groups.setdefault(self._group_key(booking), []).append(booking)
+
+            job['groups'] = len(groups)
+            logger.info(f"🗂️ Batch {job['job_id']}: {len(groups)} city/date groups")
+
+            # Similar-trip retrieval for every group in one embedding batch and one vector query
+            rag_results = await self.agent.rag.retrieve_similar_trips_many([
+                {
+                    'location': f"{group[0]['city']}, {group[0]['state']}",
+                    'party_type': self._party_type(group),
+                    'interests': preferences.interests or []
+                }
+                for group in groups.values()
+            ])
+
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            await asyncio.gather(*[
+                self._run_group(job, group, preferences, group_rag, semaphore)
+                for group, group_rag in zip(groups.values(), rag_results)
+            ])
+
+            job['status'] = 'completed'
+        except Exception as e:
+            logger.error(f"❌ Batch plan job {job['job_id']} failed: {e}", exc_info=True)
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            job['finished_at'] = datetime.now().isoformat()
+            logger.info(f"🏁 Batch {job['job_id']}: {job['completed']} completed, {job['failed']} failed")
+
+    async def _run_group(
+        self,
+        job: Dict[str, Any],
+        group: List[Dict[str, Any]],
+        preferences: UserPreferences,
+        rag_results: Dict[str, Any],
+        semaphore: asyncio.Semaphore
+    ):
+        """Fetch Tavily context once, then generate each booking's plan"""
+        first = group[0]
+        location = f"{first['city']}, {first['state']}"
+
+        try:
+            tavily_data = await self.agent.search_destination(
+                location=location,
+                dates={
+                    'check_in': min(b['check_in'] for b in group),
+                    'check_out': max(b['check_out'] for b in group)
+                },
+                dietary=preferences.dietary_restrictions,
+                interests=preferences.interests
+            )
+        except Exception as e:
+            logger.error(f"❌ Context fetch failed for {location}: {e}")
+            for booking in group:
+                self._record_error(job, booking['booking_id'], f"Context fetch failed: {e}")
+            return
+
+        async def generate(booking: Dict[str, Any]):
+            async with semaphore:
+                try:
+                    request = AgentRequest(
+                        booking_id=booking['booking_id'],
+                        user_id=booking.get('traveler_id') or 0,
+                        preferences=preferences,
+                        secret="internal"
+                    )
+                    plan = await self.agent.generate_plan_with_context(
+                        request=request,
+                        booking_data=booking,
+                        rag_results=rag_results,
+                        tavily_data=tavily_data
+                    )
+                    plan_store.put(booking['booking_id'], plan, preferences, source="batch")
+                    job['results'][booking['booking_id']] = plan
+                    job['completed'] += 1
+                except Exception as e:
+                    self._record_error(job, booking['booking_id'], str(e))
+
+        await asyncio.gather(*[generate(booking) for booking in group])
+
+    @staticmethod
+    def _party_type(group: List[Dict[str, Any]]) -> str:
+        """Most common party type in a group"""
+        return Counter(b.get('party_type') or 'couple' for b in group).most_common(1)[0][0]
+
+    def _record_error(self, job: Dict[str, Any], booking_id: int, error: str):
+        job['errors'][booking_id] = error
+        job['failed'] += 1
+
+# Global instance
+batch_plan_service = BatchPlanService()
@@ -0,0 +1,302 @@
+# services/itinerary_bootstrap.py
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from rag.embeddings import embedding_service
+from rag.itinerary_memory import itinerary_memory, summarize_itinerary
+from rag.poi_index import poi_index
+from services.plan_store import plan_store
+from utils.llm_client import llm_client
+from utils.mysql_client import mysql_client
+from utils.resilience import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+def num_days(booking: Dict[str, Any]) -> int:
+    try:
+        start = datetime.strptime(booking['check_in'], '%Y-%m-%d')
+        end = datetime.strptime(booking['check_out'], '%Y-%m-%d')
+        return min(max((end - start).days, 1), 7)
+    except (KeyError, TypeError, ValueError):
+        return 3
+
+def synthesize_itinerary(booking: Dict[str, Any], places: Dict[str, Any]) -> Dict[str, Any]:
+    """Plan-shaped dict from the booking and the city's indexed POIs and restaurants (no LLM)"""
+    pois = [poi['name'] for poi in places.get('pois') or [] if poi.get('name')]
+    itinerary = []
+    for day in range(num_days(booking)):
+        slots = pois[day * 2:day * 2 + 2]
+        itinerary.append({
+            'day_number': day + 1,
+            **{slot: {'activity': name} for slot, name in zip(('morning', 'afternoon'), slots)}
+        })
+    return {
+        'itinerary': itinerary,
+        'activities': [{'title': name} for name in pois[:6]],
+        'restaurants': [{'name': r['name']} for r in (places.get('restaurants') or [])[:4] if r.get('name')],
+        'synthesized': True
+    }
+
+class LLMUnavailableError(RuntimeError):
+    """--generate got only fallback plans for a whole batch"""
+
+class Checkpoint:
+    """Progress of the job, rewritten atomically after every batch"""
+
+    def __init__(self, path: Path, restart: bool):
+        self.path = path
+        self.state = {
+            'last_booking_id': 0, 'processed': 0, 'indexed': 0, 'duplicates': 0, 'skipped': 0,
+            'fallbacks': 0, 'failed_booking_ids': [], 'sources': {}, 'started_at': time.time(), 'updated_at': None, 'finished': False
+        }
+        if path.exists() and not restart:
+            self.state.update(json.loads(path.read_text()))
+            self.state['finished'] = False
+
+    def save(self):
+        self.state['updated_at'] = time.time()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.state, indent=2))
+        os.replace(tmp_path, self.path)
+
+class ItineraryBootstrapper:
+    """
+    Bootstrap the similar-trip RAG index from historical ACCEPTED bookings
+
+    Streams past ACCEPTED bookings from MySQL in id order and indexes one itinerary per
+    booking: the plan already in the plan store if there is one, an LLM-generated plan
+    with `generate`, otherwise a plan synthesized from the booking and the city's POI
+    index. Each batch is embedded with one encode_batch call and stored with one
+    ItineraryMemory.remember_many call, then the last booking id is checkpointed, so an
+    interrupted run picks up where it stopped. Bookings whose plan could not be generated
+    are kept in the checkpoint and retried at the start of the next run.
+
+    Runs inside the service (POST /admin/bootstrap-itineraries) so it shares the
+    service's vector store: generation waits for idle LLM capacity like plan
+    pre-generation, and fallback plans (LLM down or failing) are never indexed.
+    """
+
+    def __init__(self):
+        self.checkpoint_path = Path(os.getenv("RAG_BOOTSTRAP_CHECKPOINT", "./agent_data/rag_bootstrap.json"))
+        self.idle_poll_seconds = float(os.getenv("RAG_BOOTSTRAP_IDLE_POLL_SECONDS", "2"))
+        self.generate_attempts = int(os.getenv("RAG_BOOTSTRAP_GENERATE_ATTEMPTS", "2"))
+
+        self.options: Dict[str, Any] = {}
+        self.checkpoint: Optional[Checkpoint] = None
+        self.bucket: Optional[TokenBucket] = None
+        self._places: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, **options) -> bool:
+        """Run the job in the background; False if it is already running"""
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self._run_logged(**options))
+        return True
+
+    async def stop(self):
+        """Cancel a running job (it resumes from the last checkpointed batch)"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run_logged(self, **options):
+        try:
+            await self.run(**options)
+        except asyncio.CancelledError:
+            logger.info(f"⏸️ Itinerary bootstrap stopped after booking {self.checkpoint.state['last_booking_id']}")
+            raise
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"❌ Itinerary bootstrap failed: {e}")
+
+    async def places(self, location: str) -> Dict[str, Any]:
+        """The city's indexed POIs and restaurants, looked up once per city"""
+        if location not in self._places:
+            try:
+                self._places[location] = await asyncio.to_thread(poi_index.search, location)
+            except Exception as e:
+                logger.warning(f"⚠️ POI index lookup failed for {location}: {e}")
+                self._places[location] = {}
+        return self._places[location]
+
+    async def generate(self, booking: Dict[str, Any], places: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """LLM plan for a booking, or None if every attempt produced the fallback plan"""
+        context = {
+            'booking': booking,
+            'preferences': {},
+            'query': '',
+            'tavily_data': {'pois': [], 'restaurants': [], 'events': [], **places, 'weather': places.get('weather') or {}},
+            'rag_results': {'similar_trips': [], 'confidence': 0.0, 'count': 0},
+            'booking_history': [],
+            'num_days': num_days(booking)
+        }
+        for _ in range(self.generate_attempts):
+            # Only use idle LLM capacity so interactive requests go first
+            while not llm_client.is_idle():
+                await asyncio.sleep(self.idle_poll_seconds)
+
+            itinerary_data = await llm_client.generate_itinerary(context)
+            if not itinerary_data.get('fallback'):
+                return itinerary_data
+        return None
+
+    async def itinerary_for(self, booking: Dict[str, Any], location: str):
+        """(itinerary data, source) for one booking; data is None when generation failed"""
+        stored = await asyncio.to_thread(plan_store.latest, booking['booking_id'])
+        if stored:
+            return stored, 'plan_store'
+
+        places = await self.places(location)
+        if self.options['generate']:
+            return await self.generate(booking, places), 'generated'
+        return synthesize_itinerary(booking, places), 'synthesized'
+
+    async def process_batch(self, bookings: List[Dict[str, Any]], retry_ids: Optional[List[int]] = None):
+        """Index a streamed batch, or with `retry_ids`, the previously failed bookings among them"""
+        state = self.checkpoint.state
+        stored = set() if self.options['refresh'] else await asyncio.to_thread(
+            itinerary_memory.stored_bookings, [b['booking_id'] for b in bookings]
+        )
+
+        entries = []
+        failed = []
+        for booking in bookings:
+            if booking['booking_id'] in stored:
+                state['skipped'] += 1
+                continue
+            await self.bucket.acquire(max_wait=float('inf'))
+
+            location = f"{booking['city']}, {booking['state']}"
+            party_type = booking.get('party_type') or 'couple'
+            itinerary_data, source = await self.itinerary_for(booking, location)
+            if itinerary_data is None:
+                failed.append(booking['booking_id'])
+                continue
+            state['sources'][source] = state['sources'].get(source, 0) + 1
+            entries.append({
+                'booking_id': booking['booking_id'],
+                'location': location,
+                'itinerary_data': itinerary_data,
+                'party_type': party_type,
+                'summary': summarize_itinerary(location, itinerary_data, party_type)
+            })
+
+        # Nothing but fallbacks: the LLM is down, so stop before checkpointing past this batch
+        if failed and not entries:
+            raise LLMUnavailableError(
+                f"LLM returned only fallback plans for bookings {bookings[0]['booking_id']}-{bookings[-1]['booking_id']}"
+            )
+
+        if entries:
+            embeddings = await asyncio.to_thread(embedding_service.encode_batch, [e['summary'] for e in entries])
+            results = await asyncio.to_thread(itinerary_memory.remember_many, entries, embeddings)
+            state['indexed'] += sum(1 for result in results if result['indexed'])
+            state['duplicates'] += sum(1 for result in results if result['duplicate_of'])
+
+        state['fallbacks'] += len(failed)
+        retried = set(retry_ids or [])
+        state['failed_booking_ids'] = [
+            booking_id for booking_id in state['failed_booking_ids'] if booking_id not in retried
+        ] + failed
+        if retry_ids is None:
+            state['processed'] += len(bookings)
+            state['last_booking_id'] = bookings[-1]['booking_id']
+        self.checkpoint.save()
+
+    async def retry_failed(self):
+        """Process the bookings whose plans fell back in earlier runs (dropped once no longer ACCEPTED)"""
+        failed = list(self.checkpoint.state['failed_booking_ids'])
+        if failed:
+            logger.info(f"🔁 Retrying {len(failed)} bookings whose plans could not be generated")
+        for start in range(0, len(failed), self.options['batch']):
+            retry_ids = failed[start:start + self.options['batch']]
+            bookings = await asyncio.to_thread(mysql_client.get_bookings_details, retry_ids)
+            bookings = sorted((b for b in bookings if b.get('status') == 'ACCEPTED'), key=lambda b: b['booking_id'])
+            await self.process_batch(bookings, retry_ids)
+
+    async def run(
+        self,
+        batch: int = 64,
+        rate: float = 20.0,
+        limit: Optional[int] = None,
+        generate: bool = False,
+        include_upcoming: bool = False,
+        refresh: bool = False,
+        restart: bool = False
+    ):
+        """Index bookings until the stream (or `limit`) runs out"""
+        self.options = {
+            'batch': batch, 'rate': rate, 'limit': limit, 'generate': generate,
+            'include_upcoming': include_upcoming, 'refresh': refresh, 'restart': restart
+        }
+        self.bucket = TokenBucket(rate_per_second=rate, capacity=max(1.0, rate))
+        self.checkpoint = Checkpoint(self.checkpoint_path, restart)
+        self.last_error = None
+
+        state = self.checkpoint.state
+        past_only = not include_upcoming
+        if state['last_booking_id']:
+            logger.info(f"↩️ Resuming after booking {state['last_booking_id']} ({state['processed']} processed so far)")
+
+        remaining = await asyncio.to_thread(mysql_client.count_accepted_bookings, state['last_booking_id'], past_only)
+        if limit:
+            remaining = min(remaining, limit)
+        logger.info(f"🚀 Bootstrapping up to {remaining} bookings (batch {batch}, {rate}/s)")
+
+        await self.retry_failed()
+
+        started = time.monotonic()
+        done = 0
+        stream = mysql_client.stream_accepted_bookings(state['last_booking_id'], batch, past_only, limit)
+        while True:
+            bookings = await asyncio.to_thread(next, stream, None)
+            if bookings is None:
+                break
+            await self.process_batch(bookings)
+            done += len(bookings)
+
+            elapsed = time.monotonic() - started
+            rate_done = done / elapsed if elapsed else 0.0
+            eta = (remaining - done) / rate_done if rate_done else 0.0
+            logger.info(
+                f"📈 {done}/{remaining} ({100 * done / max(remaining, 1):.0f}%) - "
+                f"{state['indexed']} indexed, {state['duplicates']} near-duplicates, {state['skipped']} already stored, "
+                f"{len(state['failed_booking_ids'])} to retry - {rate_done:.1f} bookings/s, ETA {eta:.0f}s"
+            )
+
+        state['finished'] = True
+        self.checkpoint.save()
+        logger.info(f"🎉 Bootstrap done: {state['processed']} bookings, {state['indexed']} indexed, sources {state['sources']}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Whether the job is running, its options and its checkpointed progress"""
+        if self.checkpoint:
+            progress = self.checkpoint.state
+        elif self.checkpoint_path.exists():
+            progress = json.loads(self.checkpoint_path.read_text())
+        else:
+            progress = None
+        return {
+            'running': self.running,
+            'options': self.options,
+            'last_error': self.last_error,
+            'checkpoint': str(self.checkpoint_path),
+            'progress': progress
+        }
+
+# Global instance
+itinerary_bootstrapper = ItineraryBootstrapper()
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from models.schemas import UserPreferences
+
+logger = logging.getLogger(__name__)
+
+class PlanStore:
+    """Persistent store of generated plans, keyed by booking and preferences"""
+
+    def __init__(self):
+        self.path = Path(os.getenv("PLAN_STORE_PATH", "./agent_data/plans.db"))
+        self.ttl_seconds = float(os.getenv("PLAN_STORE_TTL_HOURS", "48")) * 3600
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the SQLite database on first use"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS plans (
+                    booking_id INTEGER NOT NULL,
+                    preferences_key TEXT NOT NULL,
+                    plan TEXT NOT NULL,
+                    source TEXT,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (booking_id, preferences_key)
+                )
+            """)
+            self._conn.commit()
+            logger.info(f"✅ Plan store opened: {self.path}")
+        return self._conn
+
+    def preferences_key(self, preferences: Optional[UserPreferences]) -> str:
+        """Stable hash of the preferences a plan was generated for"""
+        prefs = (preferences or UserPreferences()).dict()
+        normalized = {
+            'budget': (prefs.get('budget') or 'medium').lower(),
+            'interests': sorted(i.lower() for i in prefs.get('interests') or []),
+            'dietary_restrictions': sorted(d.lower() for d in prefs.get('dietary_restrictions') or []),
+            'mobility_needs': {k: v for k, v in sorted((prefs.get('mobility_needs') or {}).items()) if v}
+        }
+        return hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+    def get(self, booking_id: int, preferences: Optional[UserPreferences] = None) -> Optional[Dict[str, Any]]:
+        """Return a stored plan if one exists and is still fresh"""
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT plan, created_at FROM plans WHERE booking_id = ? AND preferences_key = ?",
+                    (booking_id, self.preferences_key(preferences))
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"❌ Plan store read error: {e}")
+            return None
+
+        if not row or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0])
+
+    def put(
+        self,
+        booking_id: int,
+        plan: Dict[str, Any],
+        preferences: Optional[UserPreferences] = None,
+        source: str = "interactive"
+    ):
+        """Insert or replace the plan for a booking"""
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO plans (booking_id, preferences_key, plan, source, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (booking_id, self.preferences_key(preferences), json.dumps(plan, default=str), source, time.time())
+                )
+                conn.commit()
+        except Exception as e:
+            logger.error(f"❌ Plan store write error: {e}")
+
+    def latest(self, booking_id: int) -> Optional[Dict[str, Any]]:
+        """Most recent plan stored for a booking, whatever its preferences or age"""
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT plan FROM plans WHERE booking_id = ? ORDER BY created_at DESC LIMIT 1", (booking_id,)
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"❌ Plan store read error: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def has_fresh(self, booking_id: int, preferences: Optional[UserPreferences] = None) -> bool:
+        return self.get(booking_id, preferences) is not None
+
+# Global instance
+plan_store = PlanStore()
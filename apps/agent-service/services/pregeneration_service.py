@@ -0,0 +1,135 @@
+import os
+import asyncio
+import logging
+import itertools
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+from models.schemas import AgentRequest
+from utils.mysql_client import mysql_client
+from utils.llm_client import llm_client
+from services.agent_service import agent_service
+from services.plan_store import plan_store
+
+logger = logging.getLogger(__name__)
+
+# Queue priorities (lower runs first)
+PRIORITY_EVENT = 0
+PRIORITY_NIGHTLY = 1
+
+class PlanPregenerator:
+    """Generate plans ahead of time for upcoming check-ins"""
+
+    def __init__(self):
+        self.enabled = os.getenv("PREGEN_ENABLED", "true").lower() == "true"
+        self.lookahead_days = int(os.getenv("PREGEN_LOOKAHEAD_DAYS", "7"))
+        self.nightly_hour = int(os.getenv("PREGEN_NIGHTLY_HOUR", "3"))
+        self.idle_poll_seconds = float(os.getenv("PREGEN_IDLE_POLL_SECONDS", "2"))
+
+        self.queue: Optional[asyncio.PriorityQueue] = None
+        self.pending = set()
+        self._counter = itertools.count()
+        self._tasks = []
+        self.stats = {'queued': 0, 'generated': 0, 'skipped': 0, 'failed': 0, 'last_scan': None}
+
+    def start(self):
+        """Start the worker and nightly scan loops"""
+        if not self.enabled:
+            logger.info("⏸️ Plan pre-generation disabled")
+            return
+        if self._tasks:
+            return
+
+        self.queue = asyncio.PriorityQueue()
+        self._tasks = [
+            asyncio.create_task(self._worker()),
+            asyncio.create_task(self._nightly_loop())
+        ]
+        logger.info(f"✅ Plan pre-generation started (lookahead {self.lookahead_days} days, nightly at {self.nightly_hour}:00)")
+
+    async def stop(self):
+        """Cancel background loops"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def enqueue(self, booking_id: int, user_id: Optional[int] = None, priority: int = PRIORITY_EVENT) -> bool:
+        """Queue a booking for pre-generation; False if already queued or disabled"""
+        if not self.queue or booking_id in self.pending:
+            return False
+
+        self.pending.add(booking_id)
+        self.queue.put_nowait((priority, next(self._counter), booking_id, user_id))
+        self.stats['queued'] += 1
+        return True
+
+    async def scan_upcoming(self) -> int:
+        """Queue every ACCEPTED booking checking in within the lookahead window"""
+        bookings = await asyncio.to_thread(mysql_client.get_upcoming_accepted_bookings, self.lookahead_days)
+        queued = sum(
+            self.enqueue(b['booking_id'], b.get('traveler_id'), PRIORITY_NIGHTLY)
+            for b in bookings
+        )
+        self.stats['last_scan'] = datetime.now().isoformat()
+        logger.info(f"🌙 Pre-generation scan: {queued} of {len(bookings)} upcoming bookings queued")
+        return queued
+
+    async def _nightly_loop(self):
+        while True:
+            now = datetime.now()
+            next_run = now.replace(hour=self.nightly_hour, minute=0, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+
+            await asyncio.sleep((next_run - now).total_seconds())
+            try:
+                await self.scan_upcoming()
+            except Exception as e:
+                logger.error(f"❌ Pre-generation scan failed: {e}")
+
+    async def _worker(self):
+        while True:
+            _, _, booking_id, user_id = await self.queue.get()
+            try:
+                # Only use idle LLM capacity so interactive requests go first
+                while not llm_client.is_idle():
+                    await asyncio.sleep(self.idle_poll_seconds)
+
+                await self._pregenerate(booking_id, user_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"❌ Pre-generation failed for booking {booking_id}: {e}")
+            finally:
+                self.pending.discard(booking_id)
+                self.queue.task_done()
+
+    async def _pregenerate(self, booking_id: int, user_id: Optional[int]):
+        if plan_store.has_fresh(booking_id):
+            self.stats['skipped'] += 1
+            return
+
+        if user_id is None:
+            booking = await asyncio.to_thread(mysql_client.get_booking_details, booking_id)
+            if not booking:
+                raise ValueError(f"Booking {booking_id} not found")
+            user_id = booking.get('traveler_id') or 0
+
+        logger.info(f"🕐 Pre-generating plan for booking {booking_id}")
+        request = AgentRequest(booking_id=booking_id, user_id=user_id, secret="internal")
+        plan = await agent_service.generate_plan(request)
+
+        plan_store.put(booking_id, plan, request.preferences, source="pregenerated")
+        self.stats['generated'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'enabled': self.enabled,
+            'queue_depth': self.queue.qsize() if self.queue else 0
+        }
+
+# Global instance
+plan_pregenerator = PlanPregenerator()
@@ -0,0 +1,220 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cached result kinds: POIs/restaurants/events change slowly, weather changes daily
+KIND_PLACES = "places"
+KIND_WEATHER = "weather"
+
+class TavilyCache:
+    """Two-tier (in-memory LRU + SQLite) TTL cache for Tavily search results"""
+
+    def __init__(self):
+        self.path = Path(os.getenv("TAVILY_CACHE_PATH", "./agent_data/tavily_cache.db"))
+        self.max_memory_entries = int(os.getenv("TAVILY_CACHE_MAX_ENTRIES", "512"))
+
+        # Fresh for `ttl`, then served stale (and refreshed in the background) for `stale`
+        self.ttl = {
+            KIND_PLACES: float(os.getenv("TAVILY_CACHE_PLACES_TTL_DAYS", "7")) * 86400,
+            KIND_WEATHER: float(os.getenv("TAVILY_CACHE_WEATHER_TTL_HOURS", "6")) * 3600
+        }
+        self.stale = {
+            KIND_PLACES: float(os.getenv("TAVILY_CACHE_PLACES_STALE_DAYS", "7")) * 86400,
+            KIND_WEATHER: float(os.getenv("TAVILY_CACHE_WEATHER_STALE_HOURS", "6")) * 3600
+        }
+
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._refreshing = set()
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0
+        }
+
+    # ============================================
+    # KEYS
+    # ============================================
+
+    def _normalize(self, text: str) -> str:
+        return re.sub(r'[^a-z0-9]+', ' ', (text or '').lower()).strip()
+
+    def _normalize_set(self, values: Optional[List[str]]) -> str:
+        return ",".join(sorted({self._normalize(v) for v in values or [] if v}))
+
+    def places_key(
+        self,
+        location: str,
+        check_in: str,
+        interests: Optional[List[str]] = None,
+        dietary: Optional[List[str]] = None
+    ) -> str:
+        """Key for POIs/restaurants/events: location, check-in month, interests, dietary"""
+        month = str(check_in)[:7]
+        return f"{KIND_PLACES}|{self._normalize(location)}|{month}|{self._normalize_set(interests)}|{self._normalize_set(dietary)}"
+
+    def weather_key(self, location: str, check_in: str) -> str:
+        """Key for weather: location and check-in ISO week"""
+        try:
+            year, week, _ = date.fromisoformat(str(check_in)[:10]).isocalendar()
+            window = f"{year}-W{week:02d}"
+        except ValueError:
+            window = str(check_in)
+        return f"{KIND_WEATHER}|{self._normalize(location)}|{window}"
+
+    # ============================================
+    # STORAGE
+    # ============================================
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tavily_cache (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+            """)
+            # Drop entries that are past their stale window
+            now = time.time()
+            for kind in self.ttl:
+                self._conn.execute(
+                    "DELETE FROM tavily_cache WHERE kind = ? AND stored_at < ?",
+                    (kind, now - self.ttl[kind] - self.stale[kind])
+                )
+            self._conn.commit()
+        return self._conn
+
+    def _read(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Memory first, then disk (promoting disk hits to memory)"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                self._memory.move_to_end(key)
+                return entry
+
+            try:
+                row = self._connection().execute(
+                    "SELECT value, stored_at FROM tavily_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except Exception as e:
+                logger.error(f"❌ Tavily cache read error: {e}")
+                return None
+
+            if not row:
+                return None
+
+            entry = (json.loads(row[0]), row[1])
+            self._remember(key, entry)
+            self.stats['disk_hits'] += 1
+            return entry
+
+    def _remember(self, key: str, entry: Tuple[Any, float]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key: str, value: Any):
+        """Store a value in both tiers"""
+        entry = (value, time.time())
+        with self._lock:
+            self._remember(key, entry)
+            try:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO tavily_cache (key, kind, value, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, key.split("|", 1)[0], json.dumps(value, default=str), entry[1])
+                )
+                conn.commit()
+            except Exception as e:
+                logger.error(f"❌ Tavily cache write error: {e}")
+
+    # ============================================
+    # LOOKUP
+    # ============================================
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: value is not None
+    ) -> Any:
+        """
+        Return a cached value, fetching on a miss
+
+        Stale entries are returned immediately and refreshed in the background.
+        Fetched values are only stored when `cacheable(value)` is true.
+        """
+        kind = key.split("|", 1)[0]
+        entry = self._read(key)
+
+        if entry:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age <= self.ttl[kind]:
+                self.stats['hits'] += 1
+                return value
+            if age <= self.ttl[kind] + self.stale[kind]:
+                self.stats['stale_hits'] += 1
+                self._refresh_in_background(key, fetch, cacheable)
+                return value
+
+        self.stats['misses'] += 1
+        value = await fetch()
+        if cacheable(value):
+            self.put(key, value)
+        return value
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool]
+    ):
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                value = await fetch()
+                if cacheable(value):
+                    self.put(key, value)
+                self.stats['refreshes'] += 1
+            except Exception as e:
+                self.stats['refresh_errors'] += 1
+                logger.warning(f"⚠️ Tavily cache refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        asyncio.create_task(refresh())
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['stale_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'memory_entries': len(self._memory),
+            'hit_rate': round((self.stats['hits'] + self.stats['stale_hits']) / lookups, 3) if lookups else 0.0
+        }
+
+# Global instance
+tavily_cache = TavilyCache()
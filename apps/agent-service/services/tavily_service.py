@@ -1,30 +1,27 @@
-# services/tavily_service.py
 import os
+import asyncio
 import logging
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 
-logger = logging.getLogger(__name__)
+from services.tavily_cache import tavily_cache
+from utils.tavily_client import AsyncTavilyClient, AIOHTTP_AVAILABLE
 
-try:
-    from tavily import TavilyClient
-    TAVILY_AVAILABLE = True
-except ImportError:
-    logger.warning("⚠️ tavily-python not installed, using mock data")
-    TAVILY_AVAILABLE = False
+logger = logging.getLogger(__name__)
 
 class TavilyService:
     """Web search service using Tavily API"""
     
     def __init__(self):
         self.api_key = os.getenv("TAVILY_API_KEY", "")
+        self.cache = tavily_cache
         
         if not self.api_key:
             logger.warning("⚠️ TAVILY_API_KEY not set, using fallback data")
             self.client = None
-        elif TAVILY_AVAILABLE:
+        elif AIOHTTP_AVAILABLE:
             try:
-                self.client = TavilyClient(api_key=self.api_key)
+                self.client = AsyncTavilyClient(api_key=self.api_key)
                 logger.info("✅ Tavily client initialized")
             except Exception as e:
                 logger.error(f"❌ Tavily init error: {e}")
@@ -40,110 +37,106 @@ class TavilyService:
         interests: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
-        Combined search - one API call instead of 4 separate ones
-        Reduces cost by 75%
+        Search POIs, restaurants, events and weather concurrently
+        
+        Results are cached per location, check-in month/week, interests and dietary needs
         """
         try:
             if not self.client:
                 logger.warning("⚠️ Tavily client not available, using mock data")
                 return self._get_fallback_data(location, dates)
             
-            # Build comprehensive query
-            dietary_str = ", ".join(dietary) if dietary else ""
-            interests_str = ", ".join(interests) if interests else "popular attractions"
-            
-            query = f"""
-            For {location} travel from {dates.get('check_in')} to {dates.get('check_out')}:
-            1. Top attractions and points of interest ({interests_str})
-            2. Local events and festivals
-            3. {dietary_str} restaurants if specified, otherwise popular restaurants
-            4. Weather forecast
-            """
+            places_key = self.cache.places_key(location, dates.get('check_in'), interests, dietary)
+            weather_key = self.cache.weather_key(location, dates.get('check_in'))
             
-            logger.info(f"🔍 Tavily search: {location}")
-            
-            result = self.client.search(
-                query=query,
-                search_depth="advanced",
-                max_results=5
+            places, weather = await asyncio.gather(
+                self.cache.get_or_fetch(
+                    places_key,
+                    lambda: self._fetch_places(location, dates, dietary, interests),
+                    cacheable=lambda data: data is not None and not data.get('partial')
+                ),
+                self.cache.get_or_fetch(
+                    weather_key,
+                    lambda: self.search_weather(location, dates)
+                )
             )
             
-            # Parse and structure results
-            parsed_data = self._parse_tavily_results(result, location, dates)
-            
-            # If no weather found, do a dedicated weather search
-            if not parsed_data.get('weather'):
-                try:
-                    weather_query = f"weather forecast {location} {dates.get('check_in')} to {dates.get('check_out')}"
-                    weather_result = self.client.search(
-                        query=weather_query,
-                        search_depth="basic",
-                        max_results=2
-                    )
-                    
-                    if weather_result.get('results'):
-                        parsed_data['weather'] = {
-                            'summary': weather_result['results'][0].get('content', '')[:300],
-                            'source': weather_result['results'][0].get('url', '')
-                        }
-                        logger.info(f"✅ Weather data found for {location}")
-                except Exception as we:
-                    logger.warning(f"⚠️ Weather search failed: {we}")
-            
             logger.info(f"✅ Tavily search completed for {location}")
-            return parsed_data
+            return {
+                'pois': places['pois'],
+                'events': places['events'],
+                'restaurants': places['restaurants'],
+                'weather': weather
+            }
             
         except Exception as e:
             logger.error(f"❌ Tavily search error: {e}")
             return self._get_fallback_data(location, dates)
     
-    def _parse_tavily_results(self, result: Dict, location: str, dates: Dict) -> Dict[str, Any]:
-        """Parse Tavily API results into structured format"""
+    async def _fetch_places(
+        self,
+        location: str,
+        dates: Dict[str, str],
+        dietary: Optional[List[str]],
+        interests: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """
+        Run focused attraction, restaurant and event queries concurrently
+        
+        Each result is categorized by the query that returned it. Failed or
+        timed-out queries leave their category empty and mark the result partial;
+        if every query fails the error is raised.
+        """
+        dietary_str = " ".join(dietary) if dietary else ""
+        interests_str = ", ".join(interests) if interests else "popular attractions"
+        month = self._month_label(dates.get('check_in'))
+        
+        queries = {
+            'pois': (f"top attractions and things to do in {location} for {interests_str}", 10),
+            'restaurants': (f"best {dietary_str} restaurants in {location}".replace("  ", " "), 8),
+            'events': (f"events and festivals in {location} {month}".strip(), 5)
+        }
+        
+        logger.info(f"🔍 Tavily search: {location} ({len(queries)} queries)")
         
-        pois = []
-        events = []
-        restaurants = []
-        weather_info = None
+        results = await asyncio.gather(
+            *[self.client.search(query=query, max_results=limit) for query, limit in queries.values()],
+            return_exceptions=True
+        )
         
-        # Extract information from results
-        results_list = result.get('results', [])
+        places = {'pois': [], 'restaurants': [], 'events': [], 'partial': False}
+        seen_urls = set()
+        failures = 0
         
-        for item in results_list:
-            content = item.get('content', '').lower()
-            title = item.get('title', '')
-            url = item.get('url', '')
+        for category, result in zip(queries, results):
+            if isinstance(result, BaseException):
+                failures += 1
+                logger.warning(f"⚠️ Tavily {category} query failed: {result!r}")
+                continue
             
-            # Categorize based on content
-            if 'weather' in content or 'forecast' in content or 'temperature' in content:
-                weather_info = {
-                    'summary': item.get('content', '')[:200],
-                    'source': url
-                }
-            elif 'restaurant' in content or 'food' in content or 'dining' in content:
-                restaurants.append({
-                    'name': title,
-                    'description': content[:200],
-                    'source': url
-                })
-            elif 'event' in content or 'festival' in content or 'concert' in content:
-                events.append({
-                    'name': title,
-                    'description': content[:200],
-                    'source': url
-                })
-            else:
-                pois.append({
-                    'name': title,
-                    'description': content[:200],
+            for item in result.get('results', []):
+                url = item.get('url', '')
+                if url and url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                places[category].append({
+                    'name': item.get('title', ''),
+                    'description': item.get('content', '')[:200],
                     'source': url
                 })
         
-        return {
-            'pois': pois[:10],
-            'events': events[:5],
-            'restaurants': restaurants[:8],
-            'weather': weather_info
-        }
+        if failures == len(queries):
+            raise results[0]
+        
+        places['partial'] = failures > 0
+        return places
+    
+    def _month_label(self, check_in: Optional[str]) -> str:
+        """'November 2026' for event searches"""
+        try:
+            return datetime.strptime(str(check_in)[:10], '%Y-%m-%d').strftime('%B %Y')
+        except ValueError:
+            return ""
     
     def _get_fallback_data(self, location: str, dates: Dict) -> Dict[str, Any]:
         """
@@ -210,16 +203,17 @@ class TavilyService:
         }
     
     async def search_weather(self, location: str, dates: Dict) -> Optional[Dict[str, Any]]:
-        """Search for weather forecast (separate method if needed)"""
+        """Dedicated weather forecast search"""
         try:
             if not self.client:
                 return None
             
             query = f"weather forecast {location} {dates.get('check_in')} to {dates.get('check_out')}"
             
-            result = self.client.search(query=query, max_results=2)
+            result = await self.client.search(query=query, max_results=2)
             
             if result.get('results'):
+                logger.info(f"✅ Weather data found for {location}")
                 return {
                     'summary': result['results'][0].get('content', '')[:300],
                     'source': result['results'][0].get('url', '')
@@ -228,8 +222,22 @@ class TavilyService:
             return None
             
         except Exception as e:
-            logger.error(f"❌ Weather search error: {e}")
+            logger.error(f"❌ Weather search error: {e!r}")
+            return None
+    
+    async def get_weather(self, location: str, dates: Dict) -> Optional[Dict[str, Any]]:
+        """Weather alone (e.g. when POIs come from the POI index), through the cache"""
+        if not self.client:
             return None
+        return await self.cache.get_or_fetch(
+            self.cache.weather_key(location, dates.get('check_in')),
+            lambda: self.search_weather(location, dates)
+        )
+    
+    async def close(self):
+        """Release the pooled HTTP session"""
+        if self.client:
+            await self.client.close()
 
 # Global instance
 tavily_service = TavilyService()
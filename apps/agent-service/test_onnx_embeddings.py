@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Parity check and benchmark: int8 ONNX embedding backend vs. sentence-transformers (torch)
+
+Usage: python test_onnx_embeddings.py [--model-dir ./agent_data/onnx/all-MiniLM-L6-v2]
+Run export_onnx_model.py first. Exits non-zero if any sentence has cosine < 0.99.
+"""
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+PARITY_THRESHOLD = 0.99
+
+SENTENCES = [
+    "What is the cancellation policy?",
+    "Can I get a refund if the host cancels my reservation?",
+    "How do I modify my booking dates?",
+    "Vegan restaurants near the beach in San Diego",
+    "Family friendly things to do in Boston with young kids in winter",
+    "Guests must provide a valid government-issued ID at check-in.",
+    "Payment is charged in full at the time of booking unless a payment plan is selected, "
+    "in which case the remaining balance is due 14 days before check-in.",
+    "wifi",
+]
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--model-dir", default=os.getenv("EMBEDDING_ONNX_DIR", "./agent_data/onnx/all-MiniLM-L6-v2"))
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🧪 ONNX int8 embedding backend")
+    print("=" * 60)
+
+    started = time.perf_counter()
+    from rag.onnx_embedder import OnnxEmbedder
+    onnx_model = OnnxEmbedder(args.model_dir)
+    onnx_load = time.perf_counter() - started
+    print(f"⏱️ ONNX import + load: {onnx_load:.2f}s ({onnx_model.model_path.name})")
+
+    try:
+        started = time.perf_counter()
+        from sentence_transformers import SentenceTransformer
+        torch_model = SentenceTransformer("all-MiniLM-L6-v2")
+        torch_load = time.perf_counter() - started
+        print(f"⏱️ torch import + load: {torch_load:.2f}s")
+    except ImportError:
+        print("❌ sentence-transformers not installed; parity check needs the torch reference")
+        sys.exit(1)
+
+    # Parity: every sentence, encoded alone and as part of a padded batch
+    print("\n🔍 Parity (cosine similarity to torch output)")
+    reference = torch_model.encode(SENTENCES, normalize_embeddings=True)
+    batched = onnx_model.encode(SENTENCES)
+    singles = np.stack([onnx_model.encode(sentence) for sentence in SENTENCES])
+
+    worst = 1.0
+    for sentence, ref, vec_batch, vec_single in zip(SENTENCES, reference, batched, singles):
+        cos_batch = float(np.dot(ref, vec_batch) / (np.linalg.norm(ref) * np.linalg.norm(vec_batch)))
+        cos_single = float(np.dot(ref, vec_single) / (np.linalg.norm(ref) * np.linalg.norm(vec_single)))
+        worst = min(worst, cos_batch, cos_single)
+        print(f"   {min(cos_batch, cos_single):.4f}  {sentence[:50]}")
+
+    # Benchmark: single-query latency and batch throughput
+    print("\n⚡ Benchmark (best of 3)")
+    corpus = (SENTENCES * (args.batch // len(SENTENCES) + 1))[:args.batch]
+    for label, encode in (("torch", torch_model.encode), ("onnx-int8", onnx_model.encode)):
+        single = timed(lambda: [encode(s) for s in SENTENCES]) / len(SENTENCES)
+        batch = timed(lambda: encode(corpus))
+        print(f"   {label:<10} single {single * 1000:7.2f} ms/query   "
+              f"batch {len(corpus) / batch:8.1f} texts/s")
+
+    print("\n" + "=" * 60)
+    if worst < PARITY_THRESHOLD:
+        print(f"❌ Parity FAILED: worst cosine {worst:.4f} < {PARITY_THRESHOLD}")
+        sys.exit(1)
+    print(f"✅ Parity OK: worst cosine {worst:.4f}")
+    print("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -58,7 +58,9 @@ def main():
             for i, result in enumerate(results, 1):
                 print(f"\n   [{i}] Policy: {result['metadata'].get('policy_type', 'Unknown')}")
                 print(f"       Source: {result['metadata'].get('filename', 'Unknown')}")
-                print(f"       Similarity: {1 - result['distance']:.3f}")
+                if result['distance'] is not None:
+                    print(f"       Similarity: {1 - result['distance']:.3f}")
+                print(f"       Retrieval: {result.get('retrieval')} {result.get('scores', {})}")
                 print(f"       Content: {result['content'][:150]}...")
         else:
             print("   ❌ No results found")
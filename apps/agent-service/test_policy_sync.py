@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Checks that an unchanged policy corpus never waits for the embedding model
+
+Usage: python test_policy_sync.py
+Ingests the policies once (random vectors instead of the model), then, with the model
+still "loading", re-syncs from a fresh PolicyLoader (as after a restart) and reads the
+corpus revision; both must finish at once. Uses a temporary CHROMA_PERSIST_DIR.
+Exits non-zero on failure.
+"""
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+os.environ["CHROMA_PERSIST_DIR"] = tempfile.mkdtemp()
+os.environ.pop("POLICY_MANIFEST_PATH", None)
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rag.embeddings import embedding_service
+from rag.policy_loader import PolicyLoader
+
+TIMEOUT_SECONDS = 10
+
+def finishes(name, call):
+    """Run call on a thread; True if it returned within TIMEOUT_SECONDS"""
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=call()), daemon=True)
+    thread.start()
+    thread.join(TIMEOUT_SECONDS)
+    done = 'value' in result
+    print(f"   {'✅' if done else '❌'} {name}{'' if done else f' (still waiting after {TIMEOUT_SECONDS}s)'}")
+    return done, result.get('value')
+
+def main():
+    print("=" * 60)
+    print("🧪 Policy sync while the embedding model loads")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    embedding_service.encode_batch = lambda texts: rng.normal(size=(len(texts), embedding_service.dim)).astype(np.float32)
+    first = PolicyLoader().ingest_policies()
+    print(f"\n📚 First ingestion: {first['added']} chunks")
+
+    # Model load that never finishes
+    embedding_service._ready = threading.Event()
+    embedding_service._load_thread = threading.Thread(target=lambda: None)
+    embedding_service.ready_timeout = 60
+    print(f"⏳ Embedding model status: {embedding_service.status()}\n")
+
+    loader = PolicyLoader()
+    ok, summary = finishes("no-op sync", loader.ingest_policies)
+    unchanged = ok and summary['added'] == 0 and summary['removed'] == 0 and summary['unchanged'] == first['added']
+    print(f"   {'✅' if unchanged else '❌'} nothing re-ingested")
+    ok_revision, revision = finishes("corpus revision", PolicyLoader().corpus_revision)
+    same = ok_revision and revision == first['revision']
+    print(f"   {'✅' if same else '❌'} revision matches the first ingestion")
+
+    passed = ok and unchanged and ok_revision and same
+    print("\n" + "=" * 60)
+    print("✅ Policy sync checks passed" if passed else "❌ Policy sync checks FAILED")
+    print("=" * 60)
+    # Daemon threads may still be waiting on the model
+    os._exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Checks for the RAG write-behind queue: batching, retry with backoff, dead entries,
+backpressure, and the shutdown flush
+
+Usage: python test_rag_write_queue.py
+Embedding and storage are replaced by in-process fakes; the SQLite journal is real.
+Exits non-zero on failure.
+"""
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rag import write_queue
+from rag.write_queue import RAGWriteQueue
+
+class FakeMemory:
+    """Records stored bookings; fails the first `failures` calls, each call takes `delay` seconds"""
+
+    def __init__(self, failures: int = 0, delay: float = 0.0):
+        self.failures = failures
+        self.delay = delay
+        self.stored = []
+        self._lock = threading.Lock()
+
+    def remember_many(self, entries, embeddings):
+        time.sleep(self.delay)
+        with self._lock:
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError("vector store down")
+            self.stored.extend(entry['booking_id'] for entry in entries)
+        return [{'indexed': True, 'duplicate_of': None} for _ in entries]
+
+def make_queue(memory: FakeMemory, **settings) -> RAGWriteQueue:
+    write_queue.itinerary_memory = memory
+    queue = RAGWriteQueue()
+    queue.enabled = True
+    queue.path = Path(tempfile.mkdtemp()) / "rag_queue.db"
+    queue.batch_size = 4
+    queue.flush_interval = 0.05
+    queue.retry_base_seconds = 0.05
+    queue.full_wait_seconds = 0.2
+    for key, value in settings.items():
+        setattr(queue, key, value)
+    return queue
+
+async def enqueue(queue: RAGWriteQueue, booking_ids):
+    return [
+        await queue.enqueue(booking_id, "Austin, TX", {'itinerary': [{'day': 1}]}, 'couple', ['food'])
+        for booking_id in booking_ids
+    ]
+
+async def wait_for(condition, timeout: float = 3.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+
+def check(name, condition):
+    if not condition:
+        raise AssertionError(name)
+    print(f"   ✅ {name}")
+
+async def test_batches():
+    memory = FakeMemory()
+    queue = make_queue(memory)
+    # Journaled before the worker starts, so the first drain sees all ten
+    await enqueue(queue, range(10))
+    queue.start()
+    await wait_for(lambda: len(memory.stored) == 10)
+    await queue.stop()
+    stats = queue.get_stats()
+    check("every entry indexed once", sorted(memory.stored) == list(range(10)))
+    check("indexed in batches", stats['batches'] == 3 and stats['indexed'] == 10 and stats['depth'] == 0)
+
+async def test_retry():
+    memory = FakeMemory(failures=1)
+    queue = make_queue(memory)
+    queue.start()
+    await enqueue(queue, range(3))
+    await wait_for(lambda: len(memory.stored) == 3)
+    await queue.stop()
+    stats = queue.get_stats()
+    check("failed batch is retried after backoff", sorted(memory.stored) == [0, 1, 2])
+    check("retries counted", stats['retries'] == 3 and stats['dead'] == 0 and stats['last_error'] == "vector store down")
+
+async def test_dead_entries():
+    memory = FakeMemory(failures=10 ** 6)
+    queue = make_queue(memory, max_attempts=2)
+    queue.start()
+    await enqueue(queue, range(2))
+    await wait_for(lambda: queue.stats['dead'] == 2)
+    await queue.stop()
+    stats = queue.get_stats()
+    check("entries out of attempts are marked dead", stats['dead_entries'] == 2 and stats['depth'] == 0)
+    check("dead entries are not retried on shutdown", not memory.stored)
+
+async def test_backpressure():
+    queue = make_queue(FakeMemory(), max_depth=2)
+    accepted = await enqueue(queue, range(3))
+    check("full queue without a worker rejects", accepted == [True, True, False] and queue.stats['rejected'] == 1)
+
+    memory = FakeMemory(delay=0.05)
+    queue = make_queue(memory, max_depth=2, batch_size=2, full_wait_seconds=2.0)
+    queue.start()
+    accepted = await enqueue(queue, range(6))
+    await queue.stop()
+    check("full queue waits for the worker to drain", all(accepted) and sorted(memory.stored) == list(range(6)))
+
+async def test_stop_during_batch():
+    memory = FakeMemory(delay=0.3)
+    queue = make_queue(memory)
+    queue.start()
+    await enqueue(queue, range(4))
+    # The full batch wakes the worker; stop while it is being indexed
+    await wait_for(lambda: queue._batch_lock.locked())
+    await queue.stop()
+    check("in-flight batch is not indexed twice", sorted(memory.stored) == [0, 1, 2, 3])
+    check("counters match", queue.stats['indexed'] == 4 and queue.stats['batches'] == 1)
+
+def main():
+    write_queue.embedding_service.encode_batch = lambda texts: np.zeros((len(texts), 384), dtype=np.float32)
+
+    failed = False
+    for test in (test_batches, test_retry, test_dead_entries, test_backpressure, test_stop_during_batch):
+        print(f"\n🧪 {test.__name__[5:].replace('_', ' ')}")
+        try:
+            asyncio.run(test())
+        except AssertionError as e:
+            print(f"   ❌ {e}")
+            failed = True
+
+    print("\n" + "=" * 60)
+    print("❌ Write queue checks FAILED" if failed else "✅ Write queue checks passed")
+    print("=" * 60)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Conformance checks run identically against every vector store backend
+
+Usage: python test_vector_backends.py
+Runs against ChromaDB (if installed) and the NumPy index, including a
+persist/reopen round trip for the NumPy index. Exits non-zero on failure.
+"""
+import sys
+import uuid
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from rag.numpy_index import NumpyVectorClient
+from rag.collection_registry import CollectionHandle
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+RECORDS = {
+    "cancel-1": (unit(1, 0, 0, 0), "Full refund up to 48 hours before check-in", {"policy_type": "Cancellation Policy", "chunk_index": 0}),
+    "cancel-2": (unit(0.9, 0.1, 0, 0), "50% refund within 48 hours", {"policy_type": "Cancellation Policy", "chunk_index": 1}),
+    "pay-1": (unit(0, 1, 0, 0), "Payment is charged at booking", {"policy_type": "Payment Policy", "chunk_index": 0}),
+    "privacy-1": (unit(0, 0, 1, 0), "We never sell guest data", {"policy_type": "Privacy Policy", "chunk_index": 0, "region": "us"}),
+}
+
+def check(name, condition):
+    if not condition:
+        raise AssertionError(name)
+    print(f"   ✅ {name}")
+
+def seed(collection):
+    ids = list(RECORDS)
+    collection.add(
+        ids=ids,
+        embeddings=np.stack([RECORDS[i][0] for i in ids]),
+        documents=[RECORDS[i][1] for i in ids],
+        metadatas=[RECORDS[i][2] for i in ids]
+    )
+
+def run_suite(collection):
+    seed(collection)
+    check("count after add", collection.count() == 4)
+
+    # Query: order and squared-L2 distances
+    results = collection.query(query_embeddings=unit(1, 0, 0, 0)[None, :], n_results=2)
+    check("query returns nearest first", results["ids"][0] == ["cancel-1", "cancel-2"])
+    check("distance is squared L2", abs(results["distances"][0][0]) < 1e-5
+          and abs(results["distances"][0][1] - float(np.sum((unit(1, 0, 0, 0) - unit(0.9, 0.1, 0, 0)) ** 2))) < 1e-4)
+    check("query returns documents and metadatas",
+          results["documents"][0][0] == RECORDS["cancel-1"][1]
+          and results["metadatas"][0][0]["policy_type"] == "Cancellation Policy")
+
+    # Several queries at once
+    results = collection.query(query_embeddings=np.stack([unit(0, 1, 0, 0), unit(0, 0, 1, 0)]), n_results=1)
+    check("batched queries", results["ids"] == [["pay-1"], ["privacy-1"]])
+
+    # Where filters
+    where = {"policy_type": "Payment Policy"}
+    results = collection.query(query_embeddings=unit(1, 0, 0, 0)[None, :], n_results=3, where=where)
+    check("where $eq (implicit) pre-filters", results["ids"][0] == ["pay-1"])
+    check("where $ne", set(collection.get(where={"policy_type": {"$ne": "Cancellation Policy"}})["ids"]) == {"pay-1", "privacy-1"})
+    check("where $ne matches records missing the key", set(collection.get(where={"region": {"$ne": "us"}})["ids"]) == {"cancel-1", "cancel-2", "pay-1"})
+    check("where $in", set(collection.get(where={"policy_type": {"$in": ["Payment Policy", "Privacy Policy"]}})["ids"]) == {"pay-1", "privacy-1"})
+    check("where $nin", set(collection.get(where={"policy_type": {"$nin": ["Payment Policy", "Privacy Policy"]}})["ids"]) == {"cancel-1", "cancel-2"})
+    check("where $gt", set(collection.get(where={"chunk_index": {"$gt": 0}})["ids"]) == {"cancel-2"})
+    check("where $lte", len(collection.get(where={"chunk_index": {"$lte": 0}})["ids"]) == 3)
+    check("where $and", collection.get(where={"$and": [{"policy_type": "Cancellation Policy"}, {"chunk_index": 1}]})["ids"] == ["cancel-2"])
+    check("where $or", set(collection.get(where={"$or": [{"chunk_index": 1}, {"region": "us"}]})["ids"]) == {"cancel-2", "privacy-1"})
+
+    # get by id
+    fetched = collection.get(ids=["pay-1", "missing"])
+    check("get by ids skips unknown ids", fetched["ids"] == ["pay-1"] and fetched["documents"] == [RECORDS["pay-1"][1]])
+    fetched = collection.get(ids=["pay-1"], include=["embeddings"])
+    check("get embeddings", np.allclose(np.asarray(fetched["embeddings"])[0], RECORDS["pay-1"][0], atol=1e-6))
+
+    # Writes
+    collection.add(ids=["pay-1"], embeddings=unit(1, 1, 1, 1)[None, :], documents=["duplicate"], metadatas=[{"policy_type": "X"}])
+    check("add ignores existing ids", collection.get(ids=["pay-1"])["documents"] == [RECORDS["pay-1"][1]])
+
+    collection.upsert(ids=["pay-1", "pay-2"], embeddings=np.stack([unit(0, 1, 0.1, 0), unit(0, 1, 0, 1)]),
+                      documents=["Payment updated", "Payment plans"],
+                      metadatas=[{"chunk_index": 5}, {"policy_type": "Payment Policy", "chunk_index": 1}])
+    fetched = collection.get(ids=["pay-1"])
+    check("upsert updates existing records and merges metadata",
+          fetched["documents"] == ["Payment updated"] and fetched["metadatas"][0] == {"policy_type": "Payment Policy", "chunk_index": 5})
+    check("upsert inserts new records", collection.count() == 5)
+
+    collection.update(ids=["pay-2", "missing"], embeddings=np.stack([unit(0, 1, 0, 1), unit(1, 0, 0, 1)]),
+                      documents=["Payment plans v2", "ignored"])
+    check("update changes documents and ignores unknown ids", collection.get(ids=["pay-2"])["documents"] == ["Payment plans v2"])
+
+    collection.delete(where={"policy_type": "Payment Policy"})
+    check("delete by where", collection.count() == 3 and not collection.get(ids=["pay-1", "pay-2"])["ids"])
+    collection.delete(ids=["privacy-1"])
+    check("delete by ids", set(collection.get()["ids"]) == {"cancel-1", "cancel-2"})
+
+    results = collection.query(query_embeddings=unit(0, 0, 0, 1)[None, :], n_results=10)
+    check("n_results larger than the collection", len(results["ids"][0]) == 2)
+
+def main():
+    backends = []
+    try:
+        import chromadb
+        backends.append(("chroma", lambda: chromadb.Client().create_collection(f"conformance-{uuid.uuid4().hex[:8]}")))
+    except ImportError:
+        print("⚠️ chromadb not installed, checking the NumPy index only")
+
+    tmp = tempfile.mkdtemp()
+    backends.append(("numpy (memory)", lambda: NumpyVectorClient().create_collection("conformance")))
+    backends.append(("numpy (persisted)", lambda: NumpyVectorClient(tmp).create_collection("conformance")))
+    # Compact storage scores int8 codes and re-ranks in float32, so results match exactly
+    compact = {"mode": "int8", "collections": {"conformance"}, "dims": 0, "rerank": 4, "min_rows": 0}
+    backends.append(("numpy (int8 compact)", lambda: NumpyVectorClient(tempfile.mkdtemp(), compact=compact).create_collection("conformance")))
+    # Cached counts must stay correct across writes made through the handle
+    backends.append(("registry handle", lambda: CollectionHandle(NumpyVectorClient().create_collection("conformance"))))
+
+    failed = False
+    for name, make_collection in backends:
+        print(f"\n🧪 {name}")
+        try:
+            run_suite(make_collection())
+        except Exception as e:
+            print(f"   ❌ {e}")
+            failed = True
+
+    # Persisted NumPy collections reopen with the same contents
+    print("\n🧪 numpy (reopen)")
+    try:
+        reopened = NumpyVectorClient(tmp).get_collection("conformance")
+        check("reopen keeps records", set(reopened.get()["ids"]) == {"cancel-1", "cancel-2"})
+        check("reopen keeps embeddings", reopened.query(query_embeddings=unit(1, 0, 0, 0)[None, :], n_results=1)["ids"] == [["cancel-1"]])
+        check("reopened matrix is memory-mapped", isinstance(reopened._matrix, np.memmap))
+        index_dir = Path(tmp, "numpy_index")
+        check("only the current generation is on disk", len(list(index_dir.glob("*.f32"))) == len(list(index_dir.glob("*.npz"))) == 1)
+    except AssertionError as e:
+        print(f"   ❌ {e}")
+        failed = True
+
+    # Adds append to the matrix file and the journal instead of writing a new generation
+    print("\n🧪 numpy (append journal)")
+    try:
+        directory = tempfile.mkdtemp()
+        collection = NumpyVectorClient(directory).create_collection("journal")
+        collection.add(ids=["a"], embeddings=unit(1, 0, 0, 0)[None, :], metadatas=[{"n": 1}])
+        collection.add(ids=["b"], embeddings=unit(0, 1, 0, 0)[None, :], documents=["second"], metadatas=[{"ok": True, "score": 0.5}])
+        collection.add(ids=["c"], embeddings=unit(0, 0, 1, 0)[None, :], metadatas=[{"tags": "x", "mixed": [1, "y"]}])
+        journal = Path(directory, "numpy_index", f"journal.{collection._generation}.log")
+        check("adds are journaled in the current generation", journal.exists() and collection._journal_batches == 3)
+
+        # A batch cut short by a crash is ignored and overwritten by the next add
+        with open(journal, "ab") as f:
+            f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00partial")
+        reopened = NumpyVectorClient(directory).get_collection("journal")
+        check("reopen replays the journal", reopened.get(ids=["b"])["documents"] == ["second"] and reopened.count() == 3)
+        check("journal keeps metadata types", reopened.get(ids=["b", "c"])["metadatas"] == [
+            {"ok": True, "score": 0.5}, {"tags": "x", "mixed": [1, "y"]}
+        ])
+        reopened.add(ids=["d"], embeddings=unit(0, 0, 0, 1)[None, :])
+        reopened = NumpyVectorClient(directory).get_collection("journal")
+        check("torn batch is dropped", reopened.count() == 4 and reopened.query(
+            query_embeddings=unit(0, 0, 0, 1)[None, :], n_results=1)["ids"] == [["d"]])
+
+        reopened.update(ids=["a"], metadatas=[{"n": 2}])
+        check("updates write a new generation", not journal.exists() and reopened._journal_batches == 0)
+        check("metadata-only updates keep the matrix file", reopened._matrix_generation < reopened._generation)
+    except AssertionError as e:
+        print(f"   ❌ {e}")
+        failed = True
+
+    print("\n" + "=" * 60)
+    print("❌ Conformance FAILED" if failed else "✅ All backends conform")
+    print("=" * 60)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
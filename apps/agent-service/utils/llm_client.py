@@ -22,19 +22,36 @@ class LLMClient:
         self.model = os.getenv("OLLAMA_MODEL", "llama3")
         self.base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         
+        # Optional comma-separated list of Ollama servers to spread generation across
+        base_urls = os.getenv("OLLAMA_BASE_URLS", self.base_url)
+        self.base_urls = [url.strip() for url in base_urls.split(",") if url.strip()] or [self.base_url]
+        
+        self.backends = []
+        self.backend_urls = []
         if OLLAMA_AVAILABLE:
-            try:
-                self.llm = OllamaLLM(
-                    model=self.model,
-                    base_url=self.base_url,
-                    temperature=0.7
-                )
-                logger.info(f"✅ Ollama LLM initialized: {self.model}")
-            except Exception as e:
-                logger.error(f"❌ Ollama init error: {e}")
-                self.llm = None
-        else:
-            self.llm = None
+            for url in self.base_urls:
+                try:
+                    self.backends.append(OllamaLLM(
+                        model=self.model,
+                        base_url=url,
+                        temperature=0.7
+                    ))
+                    self.backend_urls.append(url)
+                    logger.info(f"✅ Ollama LLM initialized: {self.model} @ {url}")
+                except Exception as e:
+                    logger.error(f"❌ Ollama init error ({url}): {e}")
+        
+        # Requests currently running on each backend
+        self.in_flight = [0] * len(self.backends)
+        self.llm = self.backends[0] if self.backends else None
+    
+    def _pick_backend(self) -> int:
+        """Index of the least-loaded Ollama backend"""
+        return min(range(len(self.backends)), key=lambda i: self.in_flight[i])
+    
+    def is_idle(self) -> bool:
+        """True when no generation or chat request is running on any backend"""
+        return sum(self.in_flight) == 0
     
     def build_prompt(self, context: Dict[str, Any]) -> str:
         """
@@ -227,10 +244,15 @@ Return ONLY valid JSON with this exact structure:
             # Build prompt
             prompt = self.build_prompt(context)
             
-            logger.info(f"🤖 Generating itinerary with {self.model}...")
+            backend = self._pick_backend()
+            logger.info(f"🤖 Generating itinerary with {self.model} @ {self.backend_urls[backend]}...")
             
             # Call Ollama
-            response = self.llm.invoke(prompt)
+            self.in_flight[backend] += 1
+            try:
+                response = await self.backends[backend].ainvoke(prompt)
+            finally:
+                self.in_flight[backend] -= 1
             
             logger.info(f"✅ Ollama response received ({len(response)} chars)")
             
@@ -459,7 +481,9 @@ Return ONLY valid JSON with this exact structure:
                 "🌍 Learn a few basic phrases in the local language - it's always appreciated",
                 "📸 Take photos but also remember to enjoy the moment without your phone"
             ],
-            "weather_summary": weather_summary
+            "weather_summary": weather_summary,
+            # Lets callers that store plans (e.g. the itinerary bootstrap) tell this apart from a real one
+            "fallback": True
         }
     
     async def chat(self, prompt: str) -> str:
@@ -471,7 +495,12 @@ Return ONLY valid JSON with this exact structure:
                 logger.warning("⚠️ Ollama not available for chat")
                 return "I'm currently unavailable. Please try again later or ask about your bookings!"
             
-            response = self.llm.invoke(prompt)
+            backend = self._pick_backend()
+            self.in_flight[backend] += 1
+            try:
+                response = await self.backends[backend].ainvoke(prompt)
+            finally:
+                self.in_flight[backend] -= 1
             return response.strip()
             
         except Exception as e:
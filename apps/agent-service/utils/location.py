@@ -0,0 +1,5 @@
+import re
+
+def location_key(location: str) -> str:
+    """Normalize a "City, ST" string for use as a key ("san diego ca")"""
+    return re.sub(r'[^a-z0-9]+', ' ', (location or '').lower()).strip()
@@ -1,7 +1,7 @@
 # utils/mysql_client.py
 import os
 import json
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Iterator
 import mysql.connector
 from mysql.connector import pooling
 from datetime import datetime
@@ -53,6 +53,7 @@ class MySQLClient:
             query = """
                 SELECT 
                     b.id as booking_id,
+                    b.traveler_id,
                     b.check_in,
                     b.check_out,
                     b.number_of_guests,
@@ -75,18 +76,7 @@ class MySQLClient:
             result = cursor.fetchone()
             
             if result:
-                # Parse JSON fields
-                if result.get('amenities'):
-                    try:
-                        result['amenities'] = json.loads(result['amenities'])
-                    except:
-                        result['amenities'] = []
-                
-                # Convert dates to strings
-                if result.get('check_in'):
-                    result['check_in'] = result['check_in'].strftime('%Y-%m-%d')
-                if result.get('check_out'):
-                    result['check_out'] = result['check_out'].strftime('%Y-%m-%d')
+                self._format_booking_row(result)
                 
                 logger.info(f"✅ Booking {booking_id} fetched: {result['city']}, {result['state']}")
             else:
@@ -101,6 +91,182 @@ class MySQLClient:
             logger.error(f"❌ Error fetching booking {booking_id}: {e}", exc_info=True)
             return None
     
+    def get_bookings_details(self, booking_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Fetch booking details for many bookings in a single query
+        
+        Missing bookings are left out. Errors are raised, so callers can tell a DB
+        outage from bookings that don't exist.
+        """
+        if not booking_ids:
+            return []
+        
+        conn = self.get_connection()
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True)
+            
+            placeholders = ", ".join(["%s"] * len(booking_ids))
+            query = f"""
+                SELECT 
+                    b.id as booking_id,
+                    b.traveler_id,
+                    b.check_in,
+                    b.check_out,
+                    b.number_of_guests,
+                    b.party_type,
+                    b.status,
+                    p.property_name,
+                    p.city,
+                    p.state,
+                    p.address,
+                    p.bedrooms,
+                    p.bathrooms,
+                    p.amenities,
+                    p.property_type
+                FROM bookings b
+                JOIN properties p ON b.property_id = p.id
+                WHERE b.id IN ({placeholders})
+            """
+            
+            cursor.execute(query, tuple(booking_ids))
+            results = cursor.fetchall()
+            
+            for result in results:
+                self._format_booking_row(result)
+            
+            logger.info(f"✅ Fetched {len(results)}/{len(booking_ids)} bookings in one query")
+            return results
+        finally:
+            if cursor:
+                cursor.close()
+            conn.close()
+    
+    def get_upcoming_accepted_bookings(self, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        Fetch ACCEPTED bookings with check-in within the next `days` days
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor(dictionary=True)
+            
+            query = """
+                SELECT 
+                    b.id as booking_id,
+                    b.traveler_id,
+                    b.check_in
+                FROM bookings b
+                WHERE b.status = 'ACCEPTED'
+                  AND b.check_in >= CURDATE()
+                  AND b.check_in <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+                ORDER BY b.check_in ASC
+            """
+            
+            cursor.execute(query, (days,))
+            results = cursor.fetchall()
+            
+            for result in results:
+                if result.get('check_in'):
+                    result['check_in'] = result['check_in'].strftime('%Y-%m-%d')
+            
+            logger.info(f"✅ Found {len(results)} accepted bookings checking in within {days} days")
+            
+            cursor.close()
+            conn.close()
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"❌ Error fetching upcoming bookings: {e}", exc_info=True)
+            return []
+    
+    def _accepted_filter(self, past_only: bool) -> str:
+        return "b.status = 'ACCEPTED' AND b.id > %s" + (" AND b.check_out < CURDATE()" if past_only else "")
+    
+    def count_accepted_bookings(self, after_id: int = 0, past_only: bool = True) -> int:
+        """
+        Count ACCEPTED bookings with id above `after_id` (finished stays only with `past_only`)
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM bookings b WHERE {self._accepted_filter(past_only)}", (after_id,))
+            count = cursor.fetchone()[0]
+            cursor.close()
+            conn.close()
+            return count
+        except Exception as e:
+            logger.error(f"❌ Error counting accepted bookings: {e}")
+            return 0
+    
+    def stream_accepted_bookings(
+        self,
+        after_id: int = 0,
+        batch_size: int = 500,
+        past_only: bool = True,
+        limit: Optional[int] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream ACCEPTED bookings with property info in booking id order, `batch_size` rows at a time
+        
+        Uses an unbuffered cursor with fetchmany, so MySQL sends rows as they are read
+        instead of the whole result set landing in memory. Resume with the last booking
+        id seen as `after_id`. Errors are raised (this is meant for offline jobs).
+        """
+        conn = self.get_connection()
+        cursor = None
+        try:
+            cursor = conn.cursor(dictionary=True, buffered=False)
+            # The server waits on us while a batch is processed; don't let it drop the stream
+            cursor.execute("SET SESSION net_write_timeout = %s", (int(os.getenv("DB_STREAM_WRITE_TIMEOUT", "3600")),))
+            cursor.execute(f"""
+                SELECT 
+                    b.id as booking_id,
+                    b.traveler_id,
+                    b.check_in,
+                    b.check_out,
+                    b.number_of_guests,
+                    b.party_type,
+                    b.status,
+                    p.property_name,
+                    p.city,
+                    p.state,
+                    p.property_type
+                FROM bookings b
+                JOIN properties p ON b.property_id = p.id
+                WHERE {self._accepted_filter(past_only)}
+                ORDER BY b.id ASC
+                {"LIMIT %s" if limit else ""}
+            """, (after_id, limit) if limit else (after_id,))
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [self._format_booking_row(row) for row in rows]
+        finally:
+            # Stopping early leaves rows on the wire, which must be read before the connection is reused
+            if conn.unread_result:
+                conn.consume_results()
+            if cursor is not None:
+                cursor.close()
+            conn.close()
+    
+    def _format_booking_row(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse JSON fields and convert dates to strings (in place)"""
+        if result.get('amenities'):
+            try:
+                result['amenities'] = json.loads(result['amenities'])
+            except:
+                result['amenities'] = []
+        
+        if result.get('check_in'):
+            result['check_in'] = result['check_in'].strftime('%Y-%m-%d')
+        if result.get('check_out'):
+            result['check_out'] = result['check_out'].strftime('%Y-%m-%d')
+        
+        return result
+    
     def get_user_preferences(self, user_id: int) -> Dict[str, Any]:
         """
         Fetch user travel preferences (if table exists)
@@ -0,0 +1,135 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+
+class RateLimitedError(Exception):
+    """Raised when no rate-limit token becomes available in time"""
+
+class TokenBucket:
+    """Token bucket rate limiter shared by all callers of an API"""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, max_wait: float) -> Optional[float]:
+        """Reserve one token; returns seconds to wait for it, or None if over `max_wait`"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            wait = max(0.0, (1 - self.tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            # May go negative: later callers then wait behind this reservation
+            self.tokens -= 1
+            return wait
+
+    async def acquire(self, max_wait: float = 0.0) -> bool:
+        """
+        Take one token, waiting up to `max_wait` seconds for it
+
+        Returns False straight away if the wait would be longer than that.
+        """
+        wait = self._reserve(max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+class CircuitBreaker:
+    """
+    Closed -> open after consecutive failures (slow calls count as failures),
+    open -> half-open after `reset_timeout`, half-open -> closed on a successful probe
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        slow_call_seconds: float = 5.0,
+        reset_timeout: float = 30.0
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self.stats = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'opened': 0}
+
+    def allow_request(self) -> bool:
+        """Whether a call may go through right now (reserves the half-open probe)"""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            logger.info(f"🟡 Circuit '{self.name}' half-open, probing")
+
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+
+        self.stats['rejected'] += 1
+        return False
+
+    def release_probe(self):
+        """Give back a half-open probe slot that was reserved but not used"""
+        self._probe_in_flight = False
+
+    def record_success(self, latency: float):
+        self.stats['calls'] += 1
+        self._probe_in_flight = False
+        if latency > self.slow_call_seconds:
+            self.stats['slow_calls'] += 1
+            self._on_failure()
+            return
+
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            self.state = self.CLOSED
+            self.opened_at = None
+            logger.info(f"🟢 Circuit '{self.name}' closed")
+
+    def record_failure(self):
+        self.stats['calls'] += 1
+        self.stats['failures'] += 1
+        self._probe_in_flight = False
+        self._on_failure()
+
+    def _on_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.stats['opened'] += 1
+                logger.warning(f"🔴 Circuit '{self.name}' opened after {self.consecutive_failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'retry_in_seconds': round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+            if self.state == self.OPEN else 0.0,
+            **self.stats
+        }
@@ -0,0 +1,46 @@
+# utils/startup_report.py
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class StartupReport:
+    """Per-component startup timings"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, component: str, seconds: float, status: str = "ok"):
+        self.components[component] = {
+            'seconds': round(seconds, 3),
+            'status': status,
+            'finished_at': round(self.elapsed(), 3)
+        }
+        logger.info(f"⏱️ Startup: {component} {status} in {seconds:.2f}s")
+
+    @contextmanager
+    def track(self, component: str):
+        """Time a block; marks the component as failed if it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(component, time.perf_counter() - started, "error")
+            raise
+        self.record(component, time.perf_counter() - started)
+
+    def elapsed(self) -> float:
+        """Seconds since the process started importing the app"""
+        return time.perf_counter() - self.started_at
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'uptime_seconds': round(self.elapsed(), 3),
+            'components': self.components
+        }
+
+# Global instance
+startup_report = StartupReport()
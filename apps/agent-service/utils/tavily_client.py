@@ -0,0 +1,105 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+
+from utils.resilience import TokenBucket, CircuitBreaker, CircuitOpenError, RateLimitedError
+
+logger = logging.getLogger(__name__)
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    logger.warning("⚠️ aiohttp not installed, Tavily search unavailable")
+    AIOHTTP_AVAILABLE = False
+
+class AsyncTavilyClient:
+    """Async Tavily search client sharing one pooled HTTP session"""
+
+    API_URL = "https://api.tavily.com/search"
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.timeout = float(os.getenv("TAVILY_QUERY_TIMEOUT", "8"))
+        self.max_connections = int(os.getenv("TAVILY_MAX_CONNECTIONS", "10"))
+        self._session: Optional["aiohttp.ClientSession"] = None
+        
+        # Stay inside the plan's request quota; fail fast rather than queue for long
+        per_minute = float(os.getenv("TAVILY_RATE_LIMIT_PER_MINUTE", "100"))
+        self.rate_limiter = TokenBucket(
+            rate_per_second=per_minute / 60,
+            capacity=float(os.getenv("TAVILY_RATE_LIMIT_BURST", "10"))
+        )
+        self.rate_limit_max_wait = float(os.getenv("TAVILY_RATE_LIMIT_MAX_WAIT", "1"))
+        
+        # Stop calling Tavily while it is failing or slow
+        self.breaker = CircuitBreaker(
+            name="tavily",
+            failure_threshold=int(os.getenv("TAVILY_BREAKER_FAILURES", "5")),
+            slow_call_seconds=float(os.getenv("TAVILY_BREAKER_SLOW_SECONDS", "5")),
+            reset_timeout=float(os.getenv("TAVILY_BREAKER_RESET_SECONDS", "30"))
+        )
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Create the shared session lazily (needs a running event loop)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_key}"
+                }
+            )
+        return self._session
+
+    async def search(
+        self,
+        query: str,
+        search_depth: str = "basic",
+        max_results: int = 5,
+        timeout: Optional[float] = None,
+        **params: Any
+    ) -> Dict[str, Any]:
+        """
+        Run one Tavily search
+
+        Raises asyncio.TimeoutError after `timeout` seconds (default TAVILY_QUERY_TIMEOUT),
+        CircuitOpenError while the breaker is open and RateLimitedError when over quota
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError("Tavily circuit is open")
+        
+        if not await self.rate_limiter.acquire(max_wait=self.rate_limit_max_wait):
+            self.breaker.release_probe()
+            raise RateLimitedError("Tavily rate limit reached")
+        
+        payload = {
+            "api_key": self.api_key,
+            "query": query,
+            "search_depth": search_depth,
+            "max_results": max_results,
+            **params
+        }
+
+        async def post() -> Dict[str, Any]:
+            async with self._get_session().post(self.API_URL, json=payload) as response:
+                response.raise_for_status()
+                return await response.json()
+
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(post(), timeout=timeout or self.timeout)
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        
+        self.breaker.record_success(time.monotonic() - started)
+        return result
+
+    async def close(self):
+        """Close the pooled session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -1,8 +1,13 @@
 // apps/backend/controllers/ownerBookingController.js
 import { pool } from '../config/db.js';
+import axios from 'axios';
 
 const db = pool.promise();
 
+// Agent service URL
+const AGENT_SERVICE_URL = process.env.AGENT_SERVICE_URL || 'http://localhost:8000';
+const AGENT_SECRET = process.env.AGENT_SERVICE_SECRET || 'change-this-secret-in-production';
+
 // Get all bookings for owner's properties with statistics
 export const getOwnerBookings = async (req, res) => {
   try {
@@ -168,6 +173,19 @@ export const approveBooking = async (req, res) => {
       [id]
     );
 
+    // Let the agent service pre-generate the travel plan (fire and forget)
+    axios.post(
+      `${AGENT_SERVICE_URL}/agent/events/booking-accepted`,
+      {
+        booking_id: Number(id),
+        user_id: booking[0].traveler_id,
+        secret: AGENT_SECRET
+      },
+      { timeout: 5000 }
+    ).catch((err) => {
+      console.warn('⚠️ [Backend] Could not notify agent service of accepted booking:', err.message);
+    });
+
     res.json({
       success: true,
       message: 'Booking approved successfully'